@@ -189,6 +189,279 @@ def fetch_user_info(user_id: str) -> str:
             "error_type": type(e).__name__
         }, indent=2)
 
+@tool(
+    expected_credentials=[
+        {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
+    ]
+)
+def fetch_api_batch(endpoints: str) -> str:
+    """
+    Fetch several API endpoints in a single authenticated round-trip.
+    
+    Use this instead of calling fetch_api_data or fetch_user_info repeatedly
+    when a question needs several entities at once.
+    
+    Args:
+        endpoints: Comma-separated endpoint paths, each optionally with a query
+                   string (e.g., "/api/v1/users/123,/api/v1/orders?limit=5")
+        
+    Returns:
+        JSON string with one result (path, status, body) per endpoint
+        
+    Examples:
+        fetch_api_batch("/api/v1/users/123,/api/v1/users/456")
+        fetch_api_batch("/api/v1/products?status=active,/api/v1/dashboard")
+    """
+    # Fetch connection credentials
+    creds = connections.basic_auth(MY_APP_ID)
+    base_url = creds.url
+    
+    url = f"{base_url.rstrip('/')}/api/v1/batch"
+    paths = [p.strip() for p in endpoints.split(",") if p.strip()]
+    
+    try:
+        response = requests.post(
+            url,
+            json={"requests": [{"path": path} for path in paths]},
+            auth=HTTPBasicAuth(creds.username, creds.password),
+            timeout=30
+        )
+        response.raise_for_status()
+        return json.dumps(response.json(), indent=2)
+        
+    except requests.exceptions.RequestException as e:
+        return json.dumps({
+            "error": True,
+            "message": f"Batch request failed: {str(e)}",
+            "attempted_url": url,
+            "endpoints": paths
+        }, indent=2)
+
+@tool(
+    expected_credentials=[
+        {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
+    ]
+)
+def fetch_api_analytics(metrics: str = "", bins: int = 10, top: int = 20) -> str:
+    """
+    Fetch aggregated product and order analytics computed by the API.
+    
+    Use this instead of fetching raw product or order lists when a question
+    asks for totals, breakdowns or distributions.
+    
+    Args:
+        metrics: Optional comma-separated subset of revenue_by_status,
+                 stock_value_by_category, price_histogram, order_totals_per_user
+                 (default: all)
+        bins: Number of price histogram bins
+        top: Number of users to include in order_totals_per_user
+        
+    Returns:
+        JSON string with the requested metrics
+        
+    Examples:
+        fetch_api_analytics()
+        fetch_api_analytics("revenue_by_status,order_totals_per_user", top=5)
+    """
+    # Fetch connection credentials
+    creds = connections.basic_auth(MY_APP_ID)
+    base_url = creds.url
+    
+    url = f"{base_url.rstrip('/')}/api/v1/analytics"
+    params = {"bins": bins, "top": top}
+    if metrics:
+        params["metrics"] = metrics
+    
+    try:
+        response = requests.get(
+            url,
+            params=params,
+            auth=HTTPBasicAuth(creds.username, creds.password),
+            timeout=30
+        )
+        response.raise_for_status()
+        return json.dumps(response.json(), indent=2)
+        
+    except requests.exceptions.RequestException as e:
+        return json.dumps({
+            "error": True,
+            "message": f"Analytics request failed: {str(e)}",
+            "attempted_url": url
+        }, indent=2)
+
+@tool(
+    expected_credentials=[
+        {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
+    ]
+)
+def fetch_api_changes(since: int = 0, collections: str = "", limit: int = 1000) -> str:
+    """
+    Fetch records that changed after a version, instead of re-pulling whole collections.
+    
+    Each change has a version, collection, id and op ("upsert" with the current
+    record, or "delete" with no record). Pass the returned "version" as since on
+    the next call; if "has_more" is true, call again right away. Only recent
+    changes are kept: when the position is too old (or since=0 on a server that
+    started with data) the answer is {"resync": true, "version": ...}. Then
+    re-download the collections (e.g. with start_api_export) and continue
+    from that version.
+    
+    Args:
+        since: Last version already seen (0 for the start of the feed)
+        collections: Optional comma-separated subset of users, products, orders
+        limit: Maximum number of changes to return (1-10000)
+        
+    Returns:
+        JSON string with epoch, version, has_more and the list of changes
+        
+    Examples:
+        fetch_api_changes()
+        fetch_api_changes(since=1042, collections="orders")
+    """
+    # Fetch connection credentials
+    creds = connections.basic_auth(MY_APP_ID)
+    base_url = creds.url
+    
+    url = f"{base_url.rstrip('/')}/api/v1/changes"
+    params = {"since": since, "limit": limit}
+    if collections:
+        params["collections"] = collections
+    
+    try:
+        response = requests.get(
+            url,
+            params=params,
+            auth=HTTPBasicAuth(creds.username, creds.password),
+            timeout=30
+        )
+        if response.status_code == 410:
+            # The position is behind the retained changes: pass the resync instructions on
+            return json.dumps(response.json()["error"], indent=2)
+        response.raise_for_status()
+        return json.dumps(response.json(), indent=2)
+        
+    except requests.exceptions.RequestException as e:
+        return json.dumps({
+            "error": True,
+            "message": f"Change feed request failed: {str(e)}",
+            "attempted_url": url
+        }, indent=2)
+
+@tool(
+    expected_credentials=[
+        {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
+    ]
+)
+def start_api_export(collection: str, filters: str = "", fields: str = "") -> str:
+    """
+    Start exporting a whole collection as a background job and return at once.
+    
+    The response holds the job id and its status URL. Check on it with
+    check_api_job instead of waiting on one long request.
+    
+    Args:
+        collection: users, products or orders
+        filters: Optional filters in JSON format, same syntax as search_api_data
+            (e.g., '{"status": "pending", "total": {"gte": 100}}')
+        fields: Optional comma-separated fields to export (e.g., "id,status,total")
+        
+    Returns:
+        JSON string with the accepted job (id, status, status_url, result_url)
+        
+    Examples:
+        start_api_export("orders", '{"status": "pending"}')
+        start_api_export("users", fields="id,email,metadata.department")
+    """
+    # Fetch connection credentials
+    creds = connections.basic_auth(MY_APP_ID)
+    base_url = creds.url
+    
+    url = f"{base_url.rstrip('/')}/api/v1/jobs"
+    params = {"collection": collection}
+    if filters:
+        try:
+            params["filters"] = json.loads(filters)
+        except json.JSONDecodeError:
+            return json.dumps({"error": True, "message": "filters must be valid JSON"}, indent=2)
+    if fields:
+        params["fields"] = fields
+    
+    try:
+        response = requests.post(
+            url,
+            json={"type": "export", "params": params},
+            auth=HTTPBasicAuth(creds.username, creds.password),
+            timeout=30
+        )
+        response.raise_for_status()
+        return json.dumps(response.json(), indent=2)
+        
+    except requests.exceptions.RequestException as e:
+        return json.dumps({
+            "error": True,
+            "message": f"Export job submission failed: {str(e)}",
+            "attempted_url": url
+        }, indent=2)
+
+@tool(
+    expected_credentials=[
+        {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
+    ]
+)
+def check_api_job(job_id: str, fetch_result: bool = False, max_records: int = 100) -> str:
+    """
+    Check the status and progress of a background job, and optionally fetch its result.
+    
+    Status is one of queued, running, succeeded, failed or cancelled. Progress
+    shows done and total work units with a percentage. Results are available
+    once the job has succeeded.
+    
+    Args:
+        job_id: Id returned by start_api_export or a background import
+        fetch_result: Also download the result when the job has succeeded
+        max_records: Maximum number of exported records to include in the result
+        
+    Returns:
+        JSON string with the job status and, if requested and available, its result
+        
+    Examples:
+        check_api_job("3f2c9a...")
+        check_api_job("3f2c9a...", fetch_result=True, max_records=20)
+    """
+    # Fetch connection credentials
+    creds = connections.basic_auth(MY_APP_ID)
+    base_url = creds.url
+    auth = HTTPBasicAuth(creds.username, creds.password)
+    
+    url = f"{base_url.rstrip('/')}/api/v1/jobs/{job_id}"
+    
+    try:
+        response = requests.get(url, auth=auth, timeout=30)
+        response.raise_for_status()
+        job = response.json()
+        if fetch_result and job.get("data", {}).get("status") == "succeeded":
+            result = requests.get(f"{url}/result", auth=auth, timeout=60, stream=True)
+            result.raise_for_status()
+            if result.headers.get("content-type", "").startswith("application/x-ndjson"):
+                records = []
+                for line in result.iter_lines():
+                    if line:
+                        records.append(json.loads(line))
+                    if len(records) >= max_records:
+                        break
+                result.close()
+                job["result"] = {"records": records, "truncated": len(records) >= max_records}
+            else:
+                job["result"] = result.json().get("data")
+        return json.dumps(job, indent=2)
+        
+    except requests.exceptions.RequestException as e:
+        return json.dumps({
+            "error": True,
+            "message": f"Job status request failed: {str(e)}",
+            "attempted_url": url
+        }, indent=2)
+
 @tool(
     expected_credentials=[
         {"app_id": MY_APP_ID, "type": ConnectionType.BASIC_AUTH}
@@ -203,7 +476,9 @@ def search_api_data(query: str, filters: str = "") -> str:
     
     Args:
         query: The search query string
-        filters: Optional filters in JSON format (e.g., '{"status": "active", "type": "premium"}')
+        filters: Optional filters in JSON format: values match by equality, or use
+            "in", "gt", "gte", "lt", "lte" operators and dotted or nested fields
+            (e.g., '{"status": "active", "price": {"lt": 50}, "metadata.department": "Sales"}')
         
     Returns:
         JSON string containing search results
@@ -211,6 +486,7 @@ def search_api_data(query: str, filters: str = "") -> str:
     Examples:
         search_api_data("product")
         search_api_data("customer", '{"status": "active"}')
+        search_api_data("desk", '{"category": {"in": ["furniture", "office"]}, "price": {"gte": 100}}')
     """
     # Fetch connection credentials
     creds = connections.basic_auth(MY_APP_ID)
@@ -235,7 +511,8 @@ def search_api_data(query: str, filters: str = "") -> str:
     # Build query parameters
     params = {'q': query}
     if filter_dict:
-        params['filters'] = json.dumps(filter_dict)
+        # Canonical key order lets the server reuse its compiled filter plan
+        params['filters'] = json.dumps(filter_dict, sort_keys=True, separators=(',', ':'))
     
     try:
         # Make authenticated GET request with query parameters
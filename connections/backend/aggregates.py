@@ -0,0 +1,110 @@
+"""
+Incrementally maintained aggregates for the FastAPI backend.
+Counters and sums subscribe to repository writes so dashboard metrics are
+O(1) reads; a from-scratch recomputation is kept for consistency checks.
+"""
+from typing import Any, Dict, Optional
+
+from repository import Repository, get_field
+
+# Tolerance for comparing running float sums with recomputed ones
+SUM_TOLERANCE = 1e-6
+
+
+class GroupCounter:
+    """Number of records per value of a field"""
+
+    def __init__(self, repository: Repository, field: str):
+        self.field = field
+        self.counts: Dict[Any, int] = {}
+        for record in repository.all():
+            self._add(record, 1)
+        repository.subscribe(self._on_write)
+
+    def __getitem__(self, value: Any) -> int:
+        return self.counts.get(value, 0)
+
+    def _add(self, record: Dict[str, Any], delta: int) -> None:
+        value = get_field(record, self.field)
+        count = self.counts.get(value, 0) + delta
+        if count:
+            self.counts[value] = count
+        else:
+            self.counts.pop(value, None)
+
+    def _on_write(self, event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        if old is not None:
+            self._add(old, -1)
+        if new is not None:
+            self._add(new, 1)
+
+
+class FieldSum:
+    """Running sum of a numeric field"""
+
+    def __init__(self, repository: Repository, field: str):
+        self.field = field
+        self.total = 0.0
+        for record in repository.all():
+            self.total += get_field(record, field) or 0
+        repository.subscribe(self._on_write)
+
+    def _on_write(self, event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        if old is not None:
+            self.total -= get_field(old, self.field) or 0
+        if new is not None:
+            self.total += get_field(new, self.field) or 0
+
+
+class DashboardAggregates:
+    """Dashboard metrics maintained from user, product and order writes"""
+
+    def __init__(self, users: Repository, products: Repository, orders: Repository):
+        self.users = users
+        self.products = products
+        self.orders = orders
+        self.user_status = GroupCounter(users, "status")
+        self.product_status = GroupCounter(products, "status")
+        self.order_status = GroupCounter(orders, "status")
+        self.revenue = FieldSum(orders, "total")
+
+    def metrics(self) -> Dict[str, Any]:
+        """Current metrics in O(1)"""
+        return {
+            "total_users": len(self.users),
+            "active_users": self.user_status["active"],
+            "total_products": len(self.products),
+            "active_products": self.product_status["active"],
+            "total_orders": len(self.orders),
+            "pending_orders": self.order_status["pending"],
+            "completed_orders": self.order_status["completed"],
+            "total_revenue": round(self.revenue.total, 2)
+        }
+
+    def recompute(self) -> Dict[str, Any]:
+        """Metrics computed from scratch with full passes over the repositories"""
+        return {
+            "total_users": sum(1 for _ in self.users.all()),
+            "active_users": sum(1 for u in self.users.all() if u["status"] == "active"),
+            "total_products": sum(1 for _ in self.products.all()),
+            "active_products": sum(1 for p in self.products.all() if p["status"] == "active"),
+            "total_orders": sum(1 for _ in self.orders.all()),
+            "pending_orders": sum(1 for o in self.orders.all() if o["status"] == "pending"),
+            "completed_orders": sum(1 for o in self.orders.all() if o["status"] == "completed"),
+            "total_revenue": round(sum(o["total"] for o in self.orders.all()), 2)
+        }
+
+    def check(self) -> Dict[str, Any]:
+        """Compare incremental metrics against a full recomputation"""
+        incremental = self.metrics()
+        expected = self.recompute()
+        mismatches = {}
+        for name, value in expected.items():
+            actual = incremental[name]
+            if isinstance(value, float):
+                equal = abs(actual - value) <= SUM_TOLERANCE
+            else:
+                equal = actual == value
+            if not equal:
+                mismatches[name] = {"incremental": actual, "recomputed": value}
+        return {"consistent": not mismatches, "mismatches": mismatches}
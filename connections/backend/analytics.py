@@ -0,0 +1,194 @@
+"""
+Columnar analytics over the backend's product and order repositories.
+Each repository is mirrored into NumPy column arrays that follow its writes
+row by row (like the counters in aggregates.py); group-bys then run as
+vectorized bincounts over integer-coded key columns instead of loops over
+records.
+"""
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from repository import Repository, get_field
+
+# Label used for records whose categorical field is missing
+MISSING_LABEL = "unknown"
+
+ANALYTICS_METRICS = ("revenue_by_status", "stock_value_by_category", "price_histogram", "order_totals_per_user")
+
+INITIAL_CAPACITY = 1024
+
+
+class ColumnTable:
+    """
+    NumPy column arrays for selected fields of a repository. Categorical
+    fields are stored as integer codes into a per-field label list. Deleted
+    rows are masked out and their slots reused by later inserts.
+    """
+
+    def __init__(self, repository: Repository, numeric: Sequence[str] = (), categorical: Sequence[str] = ()):
+        self.numeric = tuple(numeric)
+        self.categorical = tuple(categorical)
+        self.size = 0
+        self._capacity = INITIAL_CAPACITY
+        self._rows: Dict[Any, int] = {}
+        self._free: List[int] = []
+        self._alive = np.zeros(self._capacity, dtype=bool)
+        self._numeric = {field: np.zeros(self._capacity, dtype=np.float64) for field in self.numeric}
+        self._codes = {field: np.zeros(self._capacity, dtype=np.int64) for field in self.categorical}
+        self._labels: Dict[str, List[str]] = {field: [] for field in self.categorical}
+        self._label_codes: Dict[str, Dict[str, int]] = {field: {} for field in self.categorical}
+        for record in repository.all():
+            self._set(record[repository.key], record)
+        repository.subscribe(self._on_write)
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        self._alive = np.resize(self._alive, self._capacity)
+        self._alive[self.size:] = False
+        for columns in (self._numeric, self._codes):
+            for field, column in columns.items():
+                columns[field] = np.resize(column, self._capacity)
+
+    def _code(self, field: str, value: Any) -> int:
+        label = MISSING_LABEL if value is None else str(value)
+        codes = self._label_codes[field]
+        code = codes.get(label)
+        if code is None:
+            code = codes[label] = len(codes)
+            self._labels[field].append(label)
+        return code
+
+    def _set(self, record_id: Any, record: Dict[str, Any]) -> None:
+        row = self._rows.get(record_id)
+        if row is None:
+            if self._free:
+                row = self._free.pop()
+            else:
+                if self.size == self._capacity:
+                    self._grow()
+                row = self.size
+                self.size += 1
+            self._rows[record_id] = row
+        self._alive[row] = True
+        for field in self.numeric:
+            self._numeric[field][row] = get_field(record, field) or 0
+        for field in self.categorical:
+            self._codes[field][row] = self._code(field, get_field(record, field))
+
+    def _on_write(self, event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        if new is not None:
+            self._set(record_id, new)
+            return
+        row = self._rows.pop(record_id, None)
+        if row is not None:
+            self._alive[row] = False
+            self._free.append(row)
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Mask of live rows"""
+        return self._alive[:self.size]
+
+    def column(self, field: str) -> np.ndarray:
+        return self._numeric[field][:self.size]
+
+    def codes(self, field: str) -> np.ndarray:
+        return self._codes[field][:self.size]
+
+    def labels(self, field: str) -> List[str]:
+        return self._labels[field]
+
+
+def group_sums(codes: np.ndarray, groups: int, weights: np.ndarray, alive: np.ndarray) -> np.ndarray:
+    """Sum weights of live rows per group code"""
+    return np.bincount(codes, weights=np.where(alive, weights, 0.0), minlength=groups)
+
+
+def group_counts(codes: np.ndarray, groups: int, alive: np.ndarray) -> np.ndarray:
+    """Number of live rows per group code"""
+    return np.bincount(codes, weights=alive, minlength=groups).astype(np.int64)
+
+
+def _money(value: Any) -> float:
+    return round(float(value), 2)
+
+
+class Analytics:
+    """Vectorized product and order analytics"""
+
+    def __init__(self, products: Repository, orders: Repository):
+        self.products = ColumnTable(products, numeric=("price", "stock"), categorical=("category", "status"))
+        self.orders = ColumnTable(orders, numeric=("total",), categorical=("status", "user_id"))
+
+    def revenue_by_status(self) -> Dict[str, Dict[str, Any]]:
+        """Order count and revenue per order status"""
+        table = self.orders
+        labels, codes, alive = table.labels("status"), table.codes("status"), table.alive
+        counts = group_counts(codes, len(labels), alive)
+        revenue = group_sums(codes, len(labels), table.column("total"), alive)
+        return {
+            label: {"orders": int(count), "revenue": _money(total)}
+            for label, count, total in sorted(zip(labels, counts, revenue)) if count
+        }
+
+    def stock_value_by_category(self) -> Dict[str, Dict[str, Any]]:
+        """Products, units in stock and stock value (price x stock) per category"""
+        table = self.products
+        labels, codes, alive = table.labels("category"), table.codes("category"), table.alive
+        price, stock = table.column("price"), table.column("stock")
+        counts = group_counts(codes, len(labels), alive)
+        units = group_sums(codes, len(labels), stock, alive)
+        value = group_sums(codes, len(labels), price * stock, alive)
+        return {
+            label: {"products": int(count), "units": int(unit_count), "stock_value": _money(total)}
+            for label, count, unit_count, total in sorted(zip(labels, counts, units, value)) if count
+        }
+
+    def price_histogram(self, bins: int = 10) -> Dict[str, Any]:
+        """Equal-width price histogram with summary statistics"""
+        price = self.products.column("price")[self.products.alive]
+        if not price.size:
+            return {"count": 0, "bins": []}
+        counts, edges = np.histogram(price, bins=bins)
+        return {
+            "count": int(price.size),
+            "min": _money(price.min()),
+            "max": _money(price.max()),
+            "mean": _money(price.mean()),
+            "median": _money(np.median(price)),
+            "bins": [
+                {"min": _money(low), "max": _money(high), "count": int(count)}
+                for low, high, count in zip(edges[:-1], edges[1:], counts)
+            ],
+        }
+
+    def order_totals_per_user(self, top: int = 20) -> List[Dict[str, Any]]:
+        """Order count, total and average per user, largest totals first"""
+        table = self.orders
+        labels, codes, alive = table.labels("user_id"), table.codes("user_id"), table.alive
+        counts = group_counts(codes, len(labels), alive)
+        totals = group_sums(codes, len(labels), table.column("total"), alive)
+        # Users whose orders were all deleted keep a code but must not be ranked;
+        # the stable sort keeps ties in first-seen order
+        ranked = np.flatnonzero(counts)
+        order = ranked[np.argsort(-totals[ranked], kind="stable")][:top]
+        return [
+            {
+                "user_id": labels[i],
+                "orders": int(counts[i]),
+                "total": _money(totals[i]),
+                "average": _money(totals[i] / counts[i]),
+            }
+            for i in order
+        ]
+
+    def compute(self, metrics: Sequence[str] = ANALYTICS_METRICS, bins: int = 10, top: int = 20) -> Dict[str, Any]:
+        """Selected metrics by name"""
+        builders = {
+            "revenue_by_status": self.revenue_by_status,
+            "stock_value_by_category": self.stock_value_by_category,
+            "price_histogram": lambda: self.price_histogram(bins),
+            "order_totals_per_user": lambda: self.order_totals_per_user(top),
+        }
+        return {name: builders[name]() for name in metrics}
@@ -0,0 +1,167 @@
+"""
+Credential store for the FastAPI backend.
+Passwords are kept only as salted PBKDF2 hashes. Tokens and API keys are
+random, high-entropy strings, so a keyed HMAC-SHA256 digest protects them
+without a slow hash. Credentials that already passed verification are
+remembered in a TTL-bounded LRU cache keyed by an HMAC fingerprint, so the
+expensive hash runs once per credential rather than once per request; failed
+ones are remembered briefly in a separate cache.
+"""
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+DEFAULT_ITERATIONS = 100_000
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries expire after a fixed or per-entry deadline.
+    With weigh (e.g. len for byte strings), the total weight of the entries is
+    also kept within maxweight; an entry heavier than that on its own is not stored.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 10_000,
+        ttl: float = 300.0,
+        maxweight: Optional[int] = None,
+        weigh: Optional[Callable[[Any], int]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self._weigh = weigh
+        self.weight = 0
+        # key -> (deadline, value, weight)
+        self._data: "OrderedDict[Hashable, Tuple[float, Any, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return a live entry and mark it most recently used, or None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value, weight = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.weight -= weight
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store an entry, evicting least recently used ones while over maxsize or maxweight"""
+        if self.maxsize <= 0:
+            return
+        weight = self._weigh(value) if self._weigh else 0
+        if self.maxweight is not None and weight > self.maxweight:
+            return
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            previous = self._data.pop(key, None)
+            if previous is not None:
+                self.weight -= previous[2]
+            self._data[key] = (expires_at, value, weight)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+                self.weight -= self._data.popitem(last=False)[1][2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+
+class CredentialStore:
+    """Hashed storage for passwords and tokens with caches of verified and failed credentials"""
+
+    def __init__(
+        self,
+        iterations: int = DEFAULT_ITERATIONS,
+        cache_size: int = 10_000,
+        cache_ttl: float = 300.0,
+        failure_ttl: float = 5.0,
+    ):
+        self.iterations = iterations
+        # username -> (salt, PBKDF2 hash)
+        self._passwords: Dict[str, Tuple[bytes, bytes]] = {}
+        # Salt hashed for unknown users, so they cost the same as wrong passwords
+        self._dummy_salt = secrets.token_bytes(16)
+        # Tokens are looked up by value, so they share one store-wide HMAC key;
+        # token kind -> set of HMAC-SHA256 digests
+        self._token_key = secrets.token_bytes(32)
+        self._tokens: Dict[str, set] = {}
+        self._fingerprint_key = secrets.token_bytes(32)
+        # Verified credentials; failures get their own short-lived cache so a
+        # flood of bad credentials cannot evict the good ones
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.failures = TTLCache(maxsize=cache_size, ttl=failure_ttl)
+
+    def _hash(self, secret: str, salt: bytes) -> bytes:
+        return hashlib.pbkdf2_hmac("sha256", secret.encode("utf-8"), salt, self.iterations)
+
+    def _digest(self, token: str) -> bytes:
+        return hmac.new(self._token_key, token.encode("utf-8"), hashlib.sha256).digest()
+
+    def _invalidate(self) -> None:
+        self.cache.clear()
+        self.failures.clear()
+
+    # Registration
+
+    def add_password(self, username: str, password: str) -> None:
+        """Register a basic auth user"""
+        salt = secrets.token_bytes(16)
+        self._passwords[username] = (salt, self._hash(password, salt))
+        self._invalidate()
+
+    def remove_password(self, username: str) -> None:
+        """Remove a basic auth user and drop cached verifications"""
+        self._passwords.pop(username, None)
+        self._invalidate()
+
+    def add_token(self, kind: str, token: str) -> None:
+        """Register a token of the given kind (e.g. bearer, api_key, client_id)"""
+        self._tokens.setdefault(kind, set()).add(self._digest(token))
+        self._invalidate()
+
+    def revoke_token(self, kind: str, token: str) -> None:
+        """Revoke a token and drop cached verifications"""
+        self._tokens.get(kind, set()).discard(self._digest(token))
+        self._invalidate()
+
+    # Verification
+
+    def check_password(self, username: str, password: str) -> bool:
+        """Verify a username/password pair against its salted hash"""
+        entry = self._passwords.get(username)
+        if entry is None:
+            # Hash anyway so unknown users cost the same as wrong passwords
+            self._hash(password, self._dummy_salt)
+            return False
+        salt, expected = entry
+        return hmac.compare_digest(self._hash(password, salt), expected)
+
+    def check_token(self, kind: str, token: str) -> bool:
+        """Verify a token of the given kind"""
+        return self._digest(token) in self._tokens.get(kind, ())
+
+    def fingerprint(self, *parts: Optional[str]) -> bytes:
+        """Keyed digest of a credential (e.g. header name and value), safe to use as a cache key"""
+        material = "\x00".join(part or "" for part in parts).encode("utf-8")
+        return hmac.new(self._fingerprint_key, material, hashlib.sha256).digest()
+
+
+def iterations_from_env() -> int:
+    """PBKDF2 work factor for passwords, overridable with AUTH_HASH_ITERATIONS"""
+    return int(os.getenv("AUTH_HASH_ITERATIONS", DEFAULT_ITERATIONS))
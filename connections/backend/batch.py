@@ -0,0 +1,121 @@
+"""
+In-process execution of batched read requests for the FastAPI backend.
+Sub-requests are dispatched straight into the ASGI app, concurrently and
+without touching the network, carrying the already-verified identity of the
+batch request in the ASGI scope state. Each sub-request gets a time limit,
+and the app decides which routes (e.g. streaming ones) may not be batched.
+"""
+import asyncio
+import json
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from starlette.routing import Match
+
+# Key under which the batch request's verified identity is stored in a
+# sub-request's scope state; only server-built scopes can carry it
+BATCH_AUTH_STATE_KEY = "batch_auth"
+
+
+async def call_app(
+    app,
+    path: str,
+    query_string: str = "",
+    headers: Optional[List[Tuple[bytes, bytes]]] = None,
+    state: Optional[Dict[str, Any]] = None,
+) -> Tuple[int, Dict[str, str], bytes]:
+    """Run a GET request through an ASGI app and collect (status, headers, body)"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "query_string": query_string.encode("utf-8"),
+        "root_path": "",
+        "headers": headers or [],
+        "client": ("batch", 0),
+        "server": ("batch", 0),
+        "state": dict(state or {}),
+    }
+    response: Dict[str, Any] = {"status": 500, "headers": {}, "body": []}
+    request_sent = False
+    response_complete = asyncio.Event()
+
+    async def receive():
+        # The (empty) request body once; after that, like a real client connection,
+        # wait until the response is complete before reporting the disconnect
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode("latin-1"): v.decode("latin-1") for k, v in message.get("headers", [])}
+        elif message["type"] == "http.response.body":
+            response["body"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], b"".join(response["body"])
+
+
+def split_path(path: str, query: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """Combine an optional inline query string with a query dict"""
+    parts = urlsplit(path)
+    query_string = parts.query
+    if query:
+        extra = urlencode(query, doseq=True)
+        query_string = f"{query_string}&{extra}" if query_string else extra
+    return parts.path, query_string
+
+
+def route_path(app, path: str) -> Optional[str]:
+    """Path template of the app route a GET request to path would reach, or None"""
+    scope = {"type": "http", "method": "GET", "path": path, "root_path": ""}
+    for route in app.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+async def run_batch(
+    app,
+    items: List[Tuple[str, Optional[Dict[str, Any]]]],
+    auth: Dict[str, Any],
+    concurrency: int = 8,
+    timeout: float = 30.0,
+) -> List[Dict[str, Any]]:
+    """
+    Execute (path, query) sub-requests concurrently and return per-item status and body.
+    A sub-request still running after timeout seconds is abandoned with a 504.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    state = {BATCH_AUTH_STATE_KEY: auth}
+    headers = [(b"accept", b"application/json")]
+
+    async def run_one(path: str, query: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        route, query_string = split_path(path, query)
+        async with semaphore:
+            try:
+                status_code, response_headers, body = await asyncio.wait_for(
+                    call_app(app, route, query_string, headers, state), timeout
+                )
+            except asyncio.TimeoutError:
+                detail = {"error": "Batch sub-request timed out", "status_code": 504}
+                return {"path": path, "query": query or {}, "status": 504, "body": detail}
+        if response_headers.get("content-type", "").startswith("application/json") and body:
+            content: Any = json.loads(body)
+        else:
+            content = body.decode("utf-8", errors="replace")
+        return {"path": path, "query": query or {}, "status": status_code, "body": content}
+
+    return await asyncio.gather(*(run_one(path, query) for path, query in items))
@@ -0,0 +1,803 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks for the FastAPI backend hot paths.
+
+Usage:
+    python benchmark.py auth [--iterations N]
+    python benchmark.py encode [--sizes 1000,10000,100000]
+    python benchmark.py compress [--sizes 1000,10000,100000]
+    python benchmark.py workers [--workers 1,2,4,8] [--duration 10]
+    python benchmark.py restore [--sizes 100000,1000000]
+    python benchmark.py analytics [--sizes 1000,10000,100000]
+    python benchmark.py memory [--sizes 10000,100000,1000000]
+    python benchmark.py export [--sizes 10000,100000,1000000]
+    python benchmark.py suite [--sizes 1000,10000,100000] [--output results.json] [--baseline FILE]
+
+Set AUTH_HASH_ITERATIONS to change the PBKDF2 work factor used by the
+credential store for passwords (default 100000).
+"""
+
+import argparse
+import base64
+import http.client
+import json
+import multiprocessing
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.parse
+
+# Color codes for output
+GREEN = '\033[0;32m'
+YELLOW = '\033[1;33m'
+BLUE = '\033[0;34m'
+NC = '\033[0m'  # No Color
+
+# Headers for each auth scheme, using the demo credentials
+AUTH_HEADERS = {
+    "basic": {"authorization": "Basic " + base64.b64encode(b"demo:demo123").decode("ascii")},
+    "bearer": {"authorization": "Bearer demo-token-456"},
+    "api_key": {"x_api_key": "demo-api-key"},
+    "key_value": {"x_client_id": "client-123"},
+}
+
+# Plaintext credential tables of the original implementation, used as the "before" baseline
+LEGACY_BASIC_CREDENTIALS = {"admin": "admin123", "user": "password", "demo": "demo123"}
+LEGACY_BEARER_TOKENS = {"token123abc", "demo-token-456", "test-bearer-token"}
+LEGACY_API_KEYS = {"api-key-12345", "demo-api-key", "test-key-xyz"}
+LEGACY_KEY_VALUE_PAIRS = {
+    "client-id": ["client-123", "client-456"],
+    "x-api-token": ["secret-token-1", "secret-token-2"]
+}
+
+
+def legacy_verify_any_auth(x_api_key=None, x_client_id=None, x_api_token=None, authorization=None):
+    """The original per-request verification: parse, decode and compare on every call"""
+    if authorization and authorization.startswith("Basic "):
+        try:
+            credentials = base64.b64decode(authorization.split(" ")[1]).decode("utf-8")
+            username, password = credentials.split(":", 1)
+            if username in LEGACY_BASIC_CREDENTIALS and secrets.compare_digest(
+                password.encode("utf8"),
+                LEGACY_BASIC_CREDENTIALS[username].encode("utf8")
+            ):
+                return {"auth_type": "basic", "user": username}
+        except Exception:
+            pass
+    if authorization and authorization.startswith("Bearer "):
+        token = authorization.split(" ")[1]
+        if token in LEGACY_BEARER_TOKENS:
+            return {"auth_type": "bearer", "token": token}
+    if x_api_key and x_api_key in LEGACY_API_KEYS:
+        return {"auth_type": "api_key", "api_key": x_api_key}
+    if x_client_id and x_client_id in LEGACY_KEY_VALUE_PAIRS.get("client-id", []):
+        return {"auth_type": "key_value", "client_id": x_client_id}
+    if x_api_token and x_api_token in LEGACY_KEY_VALUE_PAIRS.get("x-api-token", []):
+        return {"auth_type": "key_value", "api_token": x_api_token}
+    return None
+
+
+def time_per_call(func, iterations):
+    """Return the mean wall time of func() in microseconds"""
+    func()  # warm up
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def print_table(title, columns, rows):
+    """Print a simple aligned table"""
+    print(f"\n{BLUE}{title}{NC}")
+    widths = [max(len(str(c)), *(len(str(r[i])) for r in rows)) for i, c in enumerate(columns)]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(v).ljust(w) for v, w in zip(row, widths)))
+
+
+def async_time_per_call(func, iterations):
+    """Return the mean wall time of await func() in microseconds, measured inside one event loop"""
+    import asyncio
+
+    async def run():
+        await func()  # warm up
+        start = time.perf_counter()
+        for _ in range(iterations):
+            await func()
+        return (time.perf_counter() - start) / iterations * 1e6
+    return asyncio.run(run())
+
+
+def bench_auth(args):
+    """Per-request auth overhead: legacy plaintext checks vs. the shipped verify_any_auth, uncached and cached"""
+    from starlette.requests import Request
+    import fastapi_app
+    from fastapi_app import CREDENTIALS, authenticate_headers, verify_any_auth
+
+    # Admission control is a separate cost; time credential verification only
+    fastapi_app.RATE_LIMIT_ENABLED = False
+    print(f"{YELLOW}PBKDF2 iterations: {CREDENTIALS.iterations}{NC}")
+    uncached_iterations = max(1, args.iterations // 1000)
+    rows = []
+    for scheme, headers in AUTH_HEADERS.items():
+        values = (
+            headers.get("authorization"),
+            headers.get("x_api_key"),
+            headers.get("x_client_id"),
+            headers.get("x_api_token"),
+        )
+        assert authenticate_headers(*values), f"{scheme} credentials rejected"
+
+        async def verify():
+            request = Request({"type": "http", "headers": [], "state": {}})
+            return await verify_any_auth(
+                request, x_api_key=values[1], x_client_id=values[2], x_api_token=values[3], authorization=values[0]
+            )
+
+        legacy_us = time_per_call(lambda: legacy_verify_any_auth(**headers), args.iterations)
+        uncached_us = time_per_call(lambda: authenticate_headers(*values), uncached_iterations)
+        cached_us = async_time_per_call(verify, args.iterations)
+        rows.append((scheme, f"{legacy_us:.2f}", f"{uncached_us:.2f}", f"{cached_us:.2f}"))
+
+    print_table(
+        "verify_any_auth overhead (microseconds per request)",
+        ("scheme", "legacy plaintext", "hashed, uncached", "verify_any_auth, cached"),
+        rows,
+    )
+    print(f"\n{GREEN}Cached verification cost is independent of the hash work factor{NC}")
+
+
+def bench_encode(args):
+    """Encode time and throughput of list payloads: FastAPI default path vs. pluggable encoders"""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from encoding import ENCODERS
+    from fastapi_app import MOCK_PRODUCTS, MOCK_USERS
+
+    def fastapi_default(payload):
+        return JSONResponse(jsonable_encoder(payload)).body
+
+    encoders = {"fastapi default": fastapi_default}
+    encoders.update(ENCODERS)
+
+    rows = []
+    for size in args.sizes:
+        collections = {
+            "products": scaled_records(MOCK_PRODUCTS, size, lambda i: i + 1),
+            "users": scaled_records(list(MOCK_USERS.values()), size, str),
+        }
+        for collection, items in collections.items():
+            payload = {"success": True, "auth_method": "basic", "data": {"items": items, "total": size}}
+            repeat = max(1, args.iterations // size)
+            for name, encode in encoders.items():
+                nbytes = len(encode(payload))
+                ms = time_per_call(lambda: encode(payload), repeat) / 1000
+                rows.append((collection, size, name, f"{ms:.2f}", f"{nbytes / ms / 1000:.1f}"))
+
+    print_table(
+        "Response encoding (per payload)",
+        ("collection", "items", "encoder", "ms", "MB/s"),
+        rows,
+    )
+
+
+def bench_compress(args):
+    """Bytes on the wire vs. CPU cost for each content coding and level"""
+    from compression import SUPPORTED_ENCODINGS, compress
+    from encoding import encode_json
+    from fastapi_app import MOCK_PRODUCTS, MOCK_USERS
+
+    settings = [("gzip", level) for level in (1, 6, 9)]
+    if "br" in SUPPORTED_ENCODINGS:
+        settings += [("br", quality) for quality in (1, 4, 9, 11)]
+
+    rows = []
+    for size in args.sizes:
+        collections = {
+            "products": scaled_records(MOCK_PRODUCTS, size, lambda i: i + 1),
+            "users": scaled_records(list(MOCK_USERS.values()), size, str),
+        }
+        for collection, items in collections.items():
+            body = encode_json({"success": True, "auth_method": "basic", "data": {"items": items, "total": size}})
+            rows.append((collection, size, "identity", "-", len(body), "1.00", "0.00", "-"))
+            repeat = max(1, args.iterations // (size * 10))
+            for encoding, level in settings:
+                nbytes = len(compress(body, encoding, level))
+                ms = time_per_call(lambda: compress(body, encoding, level), repeat) / 1000
+                rows.append((
+                    collection, size, encoding, level, nbytes,
+                    f"{len(body) / nbytes:.2f}", f"{ms:.2f}", f"{len(body) / ms / 1000:.1f}",
+                ))
+
+    print_table(
+        "Response compression (per payload)",
+        ("collection", "items", "encoding", "level", "bytes", "ratio", "ms", "MB/s in"),
+        rows,
+    )
+
+
+def dict_loop_analytics(products, orders):
+    """The same group-bys as analytics.Analytics, written as loops over record dicts"""
+    revenue, stock_value, per_user = {}, {}, {}
+    for order in orders:
+        entry = revenue.setdefault(order["status"], [0, 0.0])
+        entry[0] += 1
+        entry[1] += order["total"]
+        user = per_user.setdefault(order["user_id"], [0, 0.0])
+        user[0] += 1
+        user[1] += order["total"]
+    for product in products:
+        entry = stock_value.setdefault(product["category"], [0, 0, 0.0])
+        entry[0] += 1
+        entry[1] += product["stock"]
+        entry[2] += product["price"] * product["stock"]
+    prices = sorted(product["price"] for product in products)
+    low, high = prices[0], prices[-1]
+    width = (high - low) / 10 or 1
+    histogram = [0] * 10
+    for price in prices:
+        histogram[min(int((price - low) / width), 9)] += 1
+    top_users = sorted(per_user.items(), key=lambda item: -item[1][1])[:20]
+    return revenue, stock_value, histogram, top_users
+
+
+def bench_analytics(args):
+    """Analytics group-bys: loops over dicts vs. NumPy columns, plus the cost of keeping columns current"""
+    from analytics import Analytics
+    from fastapi_app import MOCK_ORDERS, MOCK_PRODUCTS
+    from repository import Repository
+
+    rows = []
+    for size in args.sizes:
+        products = Repository("products")
+        products.insert_many(
+            dict(record, price=record["price"] * (1 + i % 97 / 100), stock=(record["stock"] + i) % 200)
+            for i, record in enumerate(scaled_records(MOCK_PRODUCTS, size, lambda i: i + 1))
+        )
+        orders = Repository("orders")
+        orders.insert_many(
+            dict(record, user_id=str(i % 1000), total=record["total"] * (1 + i % 89 / 100))
+            for i, record in enumerate(scaled_records(MOCK_ORDERS, size, lambda i: f"ORD-{i}"))
+        )
+        start = time.perf_counter()
+        analytics = Analytics(products, orders)
+        build_ms = (time.perf_counter() - start) * 1000
+        repeat = max(1, args.iterations // size)
+
+        loop_us = time_per_call(lambda: dict_loop_analytics(list(products.all()), list(orders.all())), repeat)
+        numpy_us = time_per_call(analytics.compute, repeat)
+        # Column maintenance cost paid by each repository write
+        product_id = next(iter(products.all()))["id"]
+        write_us = time_per_call(lambda: products.update(product_id, {"stock": 7}), 10000)
+        rows.append((
+            size, f"{loop_us / 1000:.2f}", f"{numpy_us / 1000:.3f}", f"{loop_us / numpy_us:.0f}x",
+            f"{build_ms:.1f}", f"{write_us:.1f}",
+        ))
+
+    print_table(
+        "Analytics: all four metrics",
+        ("records", "dict loops ms", "numpy ms", "speedup", "column build ms (once)", "update us (per write)"),
+        rows,
+    )
+
+
+def bench_restore(args):
+    """Cold-start cost of rebuilding the users repository: NDJSON reseed vs. WAL replay vs. mmap snapshot"""
+    from fastapi_app import MOCK_USERS
+    from repository import Repository
+    from storage import DurableStorage, WriteAheadLog, gc_paused, read_snapshot, write_snapshot
+
+    def new_repository():
+        return Repository("users", indexes=("status", "metadata.department"))
+
+    rows = []
+    for size in args.sizes:
+        records = [
+            dict(record, metadata=dict(record["metadata"]))
+            for record in scaled_records(list(MOCK_USERS.values()), size, str)
+        ]
+        with tempfile.TemporaryDirectory() as data_dir:
+            ndjson_path = os.path.join(data_dir, "users.ndjson")
+            with open(ndjson_path, "w") as f:
+                f.writelines(json.dumps(record) + "\n" for record in records)
+            snapshot_dir = os.path.join(data_dir, "snapshot")
+            os.makedirs(snapshot_dir)
+            snapshot_path = os.path.join(snapshot_dir, "snapshot.bin")
+            snapshot_bytes = write_snapshot(snapshot_path, {"users": records}, size)
+            # A data directory without a snapshot, so DurableStorage.restore() replays the whole log
+            replay_dir = os.path.join(data_dir, "replay")
+            wal = WriteAheadLog(os.path.join(replay_dir, "wal"), fsync=False)
+            wal.open()
+            for record in records:
+                wal.append(("users", "insert", record["id"], record))
+            wal.close()
+            wal_bytes = sum(os.path.getsize(path) for _, path in wal.segments())
+
+            start = time.perf_counter()
+            repository = new_repository()
+            with open(ndjson_path) as f:
+                repository.insert_many(json.loads(line) for line in f)
+            ndjson_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            DurableStorage(replay_dir, {"users": new_repository()}).restore()
+            wal_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            with gc_paused():
+                read_snapshot(snapshot_path)
+            decode_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            DurableStorage(snapshot_dir, {"users": new_repository()}).restore()
+            snapshot_s = time.perf_counter() - start
+
+            ndjson_bytes = os.path.getsize(ndjson_path)
+
+        rows.append((
+            size, f"{ndjson_s:.2f}", f"{wal_s:.2f}", f"{snapshot_s:.2f}", f"{decode_s:.2f}",
+            f"{ndjson_bytes / 1e6:.1f}", f"{wal_bytes / 1e6:.1f}", f"{snapshot_bytes / 1e6:.1f}",
+        ))
+
+    print_table(
+        "Users repository restore (seconds, including index build)",
+        ("records", "ndjson", "wal replay", "snapshot", "of which decode", "ndjson MB", "wal MB", "snapshot MB"),
+        rows,
+    )
+
+
+def _load_client(port, duration, write_every, client_id, results):
+    """One keep-alive HTTP client: list reads with a user create every write_every requests"""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    headers = {"x-api-key": "demo-api-key", "content-type": "application/json"}
+    done = errors = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if write_every and done % write_every == write_every - 1:
+            body = json.dumps({
+                "username": f"bench-{client_id}-{done}", "email": f"bench-{client_id}-{done}@example.com",
+                "first_name": "Bench", "last_name": "User", "department": "Load",
+            })
+            conn.request("POST", "/api/v1/users", body=body, headers=headers)
+        else:
+            conn.request("GET", "/api/v1/users?department=Load&limit=20", headers=headers)
+        response = conn.getresponse()
+        response.read()
+        done += 1
+        errors += response.status >= 400
+    results.put((done, errors))
+
+
+def _wait_for_server(port, timeout=60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/health")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server on port {port} did not become healthy")
+
+
+def bench_workers(args):
+    """Request throughput of serve_workers.py with N workers sharing state through the SQLite journal"""
+    rows = []
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as state_dir:
+            server = subprocess.Popen(
+                [sys.executable, "serve_workers.py", "--workers", str(workers), "--port", str(args.port),
+                 "--state-dir", state_dir, "--log-level", "warning"],
+                cwd=os.path.dirname(os.path.abspath(__file__)),
+                env=dict(os.environ, RATE_LIMIT_ENABLED="0"),
+            )
+            try:
+                _wait_for_server(args.port)
+                # Health answers as soon as one worker is up; give the rest time to finish importing
+                time.sleep(args.warmup)
+                results = multiprocessing.Queue()
+                clients = [
+                    multiprocessing.Process(
+                        target=_load_client, args=(args.port, args.duration, args.write_every, i, results)
+                    )
+                    for i in range(args.clients)
+                ]
+                for client in clients:
+                    client.start()
+                totals = [results.get() for _ in clients]
+                for client in clients:
+                    client.join()
+            finally:
+                server.terminate()
+                server.wait()
+        requests_done = sum(done for done, _ in totals)
+        errors = sum(err for _, err in totals)
+        rows.append((workers, args.clients, requests_done, errors, f"{requests_done / args.duration:,.0f}"))
+
+    print_table(
+        f"Throughput with shared state ({os.cpu_count()} CPUs, 1 write per {args.write_every} requests)",
+        ("workers", "clients", "requests", "errors", "req/s"),
+        rows,
+    )
+
+
+# Hot-path cases of the suite benchmark, requested through the whole ASGI stack:
+# (name, path, whether the route serves from the response cache)
+# Filter DSL expression exercising in, ranges and a nested field
+SUITE_FILTER = json.dumps({
+    "category": {"in": ["furniture", "office"]}, "price": {"gte": 50, "lt": 400},
+    "metadata": {"department": "Sales"},
+})
+SUITE_REQUESTS = [
+    ("search", "/api/v1/search?q=desk&limit=10", False),
+    ("search_filtered", "/api/v1/search?q=desk&limit=10&filters=%7B%22category%22%3A%22furniture%22%7D", False),
+    ("search_filtered_range", "/api/v1/search?q=desk+sales&limit=10&filters=" + urllib.parse.quote(SUITE_FILTER), False),
+    ("get_products_filtered", "/api/v1/products?status=active&category=electronics&limit=50", True),
+    ("list_users_filtered", "/api/v1/users?department=Engineering&limit=50", True),
+    ("list_users_sorted", "/api/v1/users?status=active&sort=-created_at&limit=50", True),
+    ("get_dashboard", "/api/v1/dashboard", False),
+]
+SUITE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+
+async def measure(call, min_time, repeats=5):
+    """
+    Microseconds per await of call() in the fastest of several timed rounds
+    (slower rounds only add scheduler and machine noise); each round runs
+    enough calls to take at least min_time seconds.
+    """
+    await call()  # warm up
+    count = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(count):
+            await call()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 10 or count >= 1 << 20:
+            break
+        count *= 2
+    count = max(1, int(count * min_time / max(elapsed, 1e-9)))
+    rounds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(count):
+            await call()
+        rounds.append((time.perf_counter() - start) / count * 1e6)
+    return min(rounds)
+
+
+async def asgi_get(app, path, headers):
+    """Send a GET straight into an ASGI app, without a client or a socket; returns the status code"""
+    raw_path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": raw_path, "raw_path": raw_path.encode(), "root_path": "",
+        "query_string": query.encode(), "headers": headers,
+        "client": ("127.0.0.1", 50000), "server": ("testserver", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            sent.append(message["status"])
+
+    await app(scope, receive, send)
+    return sent[0]
+
+
+async def run_suite_cases(min_time):
+    """Measure every hot-path case against the dataset loaded by fastapi_app; returns {case: microseconds}"""
+    from starlette.requests import Request
+    from encoding import encode_json
+    from fastapi_app import (
+        PRODUCTS, RESPONSE_CACHE, SEARCH_FILTERS, USERS, app, authenticate_headers, verify_any_auth,
+    )
+
+    results = {}
+    for scheme, headers in AUTH_HEADERS.items():
+        values = (headers.get("authorization"), headers.get("x_api_key"), headers.get("x_client_id"), headers.get("x_api_token"))
+
+        async def verify():
+            request = Request({"type": "http", "headers": [], "state": {}})
+            return await verify_any_auth(
+                request, x_api_key=values[1], x_client_id=values[2], x_api_token=values[3], authorization=values[0]
+            )
+
+        async def uncached():
+            return authenticate_headers(*values)
+
+        results[f"verify_any_auth.{scheme}"] = await measure(verify, min_time)
+        results[f"authenticate_headers.{scheme}.uncached"] = await measure(uncached, min_time, repeats=3)
+
+    headers = [(b"x-api-key", b"demo-api-key"), (b"accept-encoding", b"identity")]
+    for name, path, cacheable in SUITE_REQUESTS:
+        async def request():
+            assert await asgi_get(app, path, headers) == 200, path
+
+        async def uncached():
+            # Every request misses the response cache, as after a write
+            RESPONSE_CACHE.entries.clear()
+            assert await asgi_get(app, path, headers) == 200, path
+
+        if cacheable:
+            results[f"{name}.cached"] = await measure(request, min_time)
+            results[f"{name}.uncached"] = await measure(uncached, min_time)
+        else:
+            results[name] = await measure(request, min_time)
+
+    async def plan_cached():
+        return SEARCH_FILTERS.get(SUITE_FILTER)
+
+    async def plan_uncached():
+        SEARCH_FILTERS.plans.clear()
+        return SEARCH_FILTERS.get(SUITE_FILTER)
+
+    results["search_filters.cached"] = await measure(plan_cached, min_time)
+    results["search_filters.uncached"] = await measure(plan_uncached, min_time)
+
+    pages = {
+        "products": PRODUCTS.query(limit=100),
+        "users": USERS.query(limit=100),
+    }
+    for collection, items in pages.items():
+        payload = {"success": True, "auth_method": "api_key", "data": {"items": items, "total": len(items)}}
+
+        async def encode():
+            return encode_json(payload)
+
+        results[f"serialize.{collection}_page_100"] = await measure(encode, min_time)
+    return results
+
+
+def memory_repositories(compact):
+    """Users, products and orders repositories configured like the app's"""
+    from repository import Repository
+    return {
+        "users": Repository(
+            "users", indexes=("status", "metadata.department"), sortable=("last_login",),
+            compact=compact, shared=("roles", "metadata.location"),
+        ),
+        "products": Repository("products", indexes=("status", "category"), sortable=("price",), compact=compact),
+        "orders": Repository(
+            "orders", indexes=("status", "user_id"), sortable=("total",), ranges=("created_at",), compact=compact,
+        ),
+    }
+
+
+def bench_memory(args):
+    """Memory held by the repositories in dict and compact storage, plus the read cost of compact rows"""
+    import tracemalloc
+    from synthetic import generate_dataset
+
+    rows = []
+    for size in args.sizes:
+        measured = {}
+        for compact in (False, True):
+            repositories = memory_repositories(compact)
+            tracemalloc.start()
+            start = time.perf_counter()
+            for name, records in generate_dataset(size).items():
+                # A JSON round trip gives every record its own strings, as imports and restores do
+                repositories[name].insert_many(json.loads(json.dumps(record)) for record in records)
+            load_s = time.perf_counter() - start
+            held, _ = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            users, orders = repositories["users"], repositories["orders"]
+            user_id = str(1000 + size // 10)
+            get_us = time_per_call(lambda: users.get(user_id), args.iterations)
+            page_us = time_per_call(
+                lambda: users.page({"metadata.department": "Sales"}, sort="-last_login", limit=100), 20
+            )
+            scan_us = time_per_call(lambda: orders.count({"status": "pending", "total": 100.0}), 3)
+            measured[compact] = (held, load_s, get_us, page_us, scan_us)
+            del repositories, users, orders
+
+        for compact, (held, load_s, get_us, page_us, scan_us) in measured.items():
+            rows.append((
+                size, "compact" if compact else "dict", f"{held / 1e6:.1f}", f"{held / size:.0f}",
+                f"{measured[False][0] / held:.2f}x", f"{load_s:.2f}", f"{get_us:.2f}",
+                f"{page_us / 1000:.2f}", f"{scan_us / 1000:.1f}",
+            ))
+
+    print_table(
+        "Repository memory (users, products and orders incl. indexes) and read cost",
+        ("records", "storage", "MB", "bytes/record", "saving", "load s (traced)", "get us",
+         "page of 100 ms", "residual scan ms"),
+        rows,
+    )
+
+
+def bench_export(args):
+    """Bulk export of orders: JSON encoding of the records vs. Arrow IPC and Parquet from ColumnarExport"""
+    from columnar_export import ColumnarExport, export_available
+    from encoding import encode_json
+    from fastapi_app import EXPORT_SCHEMAS
+    from filters import compile_predicate, parse_filters
+    from repository import project
+    from synthetic import generate_dataset
+
+    if not export_available():
+        print(f"{YELLOW}pyarrow is not installed; columnar export is unavailable{NC}")
+        return 1
+    cases = {
+        "all columns": (None, {}),
+        "3 columns, filtered": (["id", "total", "created_at"], {"status": "completed", "total": {"gte": 100}}),
+    }
+    rows = []
+    for size in args.sizes:
+        orders = memory_repositories(False)["orders"]
+        orders.insert_many(generate_dataset(size)["orders"])
+        for case, (columns, filters) in cases.items():
+            conditions = parse_filters(filters)
+            predicate = compile_predicate(conditions)
+
+            def as_json():
+                records = [record for record in orders.all() if predicate is None or predicate(record)]
+                return encode_json([project(record, columns) for record in records] if columns else records)
+
+            export = ColumnarExport(orders, EXPORT_SCHEMAS["orders"], columns, conditions)
+            encoders = {
+                "json": as_json,
+                "arrow": lambda: b"".join(export.stream(export.ids(), "arrow")),
+                "parquet": lambda: b"".join(export.stream(export.ids(), "parquet")),
+            }
+            for name, encode in encoders.items():
+                encode()  # warm up (pyarrow loads its time zone database on first use)
+                start = time.perf_counter()
+                body = encode()
+                elapsed = time.perf_counter() - start
+                rows.append((len(orders), case, name, f"{elapsed * 1000:.0f}", f"{len(body) / 1e6:.2f}"))
+
+    print_table("Orders export (build and encode the whole body)", ("orders", "case", "format", "ms", "MB"), rows)
+
+
+def suite_child(args):
+    """Run the suite in this process against the dataset of SYNTHETIC_SCALE; prints JSON results"""
+    import asyncio
+    results = asyncio.run(run_suite_cases(args.min_time))
+    json.dump(results, sys.stdout)
+
+
+def compare_to_baseline(results, baseline, threshold):
+    """Rows of (size, case, baseline us, current us, ratio, flag) and the number of regressions"""
+    rows, regressions = [], 0
+    for size, cases in results.items():
+        for case, current in cases.items():
+            previous = baseline.get(size, {}).get(case)
+            if previous is None:
+                rows.append((size, case, "-", f"{current:.1f}", "-", "new"))
+                continue
+            ratio = current / previous if previous else float("inf")
+            flag = ""
+            if ratio > 1 + threshold:
+                flag = "REGRESSION"
+                regressions += 1
+            elif ratio < 1 / (1 + threshold):
+                flag = "faster"
+            rows.append((size, case, f"{previous:.1f}", f"{current:.1f}", f"{ratio:.2f}", flag))
+    return rows, regressions
+
+
+def bench_suite(args):
+    """
+    Request hot paths (auth per scheme, search, filtered lists, dashboard,
+    serialization) at each dataset size, compared against a stored baseline
+    """
+    if args.scale is not None:
+        return suite_child(args)
+
+    results = {}
+    for size in args.sizes:
+        # One process per size: the app loads its dataset at import time
+        env = dict(os.environ, SYNTHETIC_SCALE=str(size), RATE_LIMIT_ENABLED="0")
+        env.pop("DATA_DIR", None)
+        env.pop("SHARED_STATE_DB", None)
+        print(f"{YELLOW}Measuring {size} records...{NC}", file=sys.stderr)
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "suite", "--scale", str(size),
+             "--min-time", str(args.min_time)],
+            cwd=os.path.dirname(os.path.abspath(__file__)), env=env, check=True, capture_output=True, text=True,
+        ).stdout
+        results[str(size)] = json.loads(output)
+
+    report = {
+        "meta": {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "cpus": os.cpu_count(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "unit": "microseconds per call",
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+        print(f"{GREEN}Results written to {args.output}{NC}")
+
+    if not args.baseline or not os.path.exists(args.baseline):
+        print_table(
+            "Hot paths (microseconds per call)",
+            ("records", "case", "us"),
+            [(size, case, f"{us:.1f}") for size, cases in results.items() for case, us in cases.items()],
+        )
+        if args.baseline:
+            # Timings only compare on the same machine, so the first run there becomes the baseline
+            with open(args.baseline, "w") as f:
+                json.dump(report, f, indent=2, sort_keys=True)
+            print(f"\n{GREEN}No baseline found; this run was written to {args.baseline} as the baseline{NC}")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+
+    rows, regressions = compare_to_baseline(results, baseline, args.threshold)
+    print_table(
+        f"Hot paths vs. {args.baseline} (microseconds per call, threshold {args.threshold:.0%})",
+        ("records", "case", "baseline", "current", "ratio", ""),
+        rows,
+    )
+    if regressions:
+        print(f"\n{YELLOW}{regressions} case(s) slower than the baseline by more than {args.threshold:.0%}{NC}")
+        return 1
+    print(f"\n{GREEN}No regressions against the baseline{NC}")
+    return 0
+
+
+BENCHMARKS = {
+    "analytics": bench_analytics,
+    "auth": bench_auth,
+    "compress": bench_compress,
+    "encode": bench_encode,
+    "export": bench_export,
+    "memory": bench_memory,
+    "restore": bench_restore,
+    "suite": bench_suite,
+    "workers": bench_workers,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI backend micro-benchmarks")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS), help="Benchmark to run")
+    parser.add_argument("--iterations", type=int, default=20000, help="Iterations per measurement")
+    parser.add_argument(
+        "--sizes",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[1000, 10000, 100000],
+        help="Comma-separated dataset sizes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=lambda value: [int(v) for v in value.split(",")],
+        default=[1, 2, 4, 8],
+        help="Comma-separated uvicorn worker counts (workers benchmark)",
+    )
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent client processes (workers benchmark)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per run (workers benchmark)")
+    parser.add_argument("--write-every", type=int, default=20, help="Send a write every N requests; 0 for reads only")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds to let all workers start (workers benchmark)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the benchmark server (workers benchmark)")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timed round (suite benchmark)")
+    parser.add_argument("--output", default=None, help="Write results as JSON to this file (suite benchmark)")
+    parser.add_argument(
+        "--baseline", default=SUITE_BASELINE, help="Baseline JSON to compare against (suite benchmark)"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.25, help="Relative slowdown reported as a regression (suite benchmark)"
+    )
+    parser.add_argument("--scale", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    return BENCHMARKS[args.benchmark](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
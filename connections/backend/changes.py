@@ -0,0 +1,194 @@
+"""
+Change feed for incremental sync with the FastAPI backend.
+Every repository write gives the written record the next value of a global,
+monotonically increasing version. Consumers ask for everything after the
+last version they saw and get the current state of each changed record, or
+a tombstone if it was deleted, instead of re-downloading whole collections.
+Waiters let Server-Sent Events streams wake up as soon as a write lands.
+The log holds record keys only; record bodies are read from the repositories
+when changes are served, so the feed never pins copies of the data. Only the
+newest changes are retained, so the feed's size follows the write rate, not
+the dataset: records loaded at startup and changes that fell out of the
+window are not in it, and consumers behind it must resync (download the
+collections, then follow the feed from the version they were given).
+"""
+import asyncio
+import bisect
+import threading
+import uuid
+from typing import Any, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+from repository import Repository
+
+# Latest changes (upserts and delete tombstones) retained; older positions
+# stop being resumable and consumers must resync
+MAX_CHANGES = 100_000
+
+RecordKey = Tuple[str, Hashable]
+
+# Placeholder record of logged upserts, replaced with the current record when served
+UPSERT: Dict[str, Any] = {}
+
+
+class Change(NamedTuple):
+    """Latest state of a record as of version; record is None for a tombstone"""
+    version: int
+    collection: str
+    record_id: Any
+    record: Optional[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "collection": self.collection,
+            "id": self.record_id,
+            "op": "delete" if self.record is None else "upsert",
+            "record": self.record,
+        }
+
+
+class ChangeFeedExpired(Exception):
+    """The requested position predates the retained changes"""
+
+
+class ChangeWaiter:
+    """Wakes one async consumer (e.g. an SSE stream) when the feed advances"""
+
+    def __init__(self, feed: "ChangeFeed"):
+        self.feed = feed
+        self._loop = asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        # Set while a wake-up is scheduled, so a burst of writes schedules only one
+        self._pending = False
+
+    def notify(self) -> None:
+        """Called by the feed on every write, possibly from another thread"""
+        if not self._pending:
+            self._pending = True
+            self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for a write; False if none arrived within timeout seconds"""
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._event.clear()
+        self._pending = False
+        return True
+
+    def close(self) -> None:
+        self.feed._unwatch(self)
+
+
+class ChangeFeed:
+    """
+    Versioned log of the newest repository writes. Only the latest change per
+    record is kept live: superseded log entries are skipped on read and
+    compacted away once they make up half of the log. Once more than
+    max_changes records have live changes, the oldest are dropped and the
+    horizon moves past them.
+    """
+
+    def __init__(
+        self,
+        repositories: Dict[str, Repository],
+        epoch: Optional[str] = None,
+        max_changes: int = MAX_CHANGES,
+    ):
+        # Versions restart when the process does; a new epoch tells consumers to resync
+        self.epoch = epoch or uuid.uuid4().hex[:16]
+        self.max_changes = max_changes
+        # Records present at startup are not logged: they count as version 1 together,
+        # so consumers start by downloading them and then follow the feed from there
+        self.version = 1 if any(len(repository) for repository in repositories.values()) else 0
+        # Changes after positions below the horizon are no longer complete
+        self.horizon = self.version
+        self._log: List[Change] = []
+        self._versions: List[int] = []
+        # Latest change per record, in version order
+        self._latest: Dict[RecordKey, Change] = {}
+        self._repositories = repositories
+        self._waiters: List[ChangeWaiter] = []
+        self._lock = threading.Lock()
+        for name, repository in repositories.items():
+            repository.subscribe(self._listener(name))
+
+    def _listener(self, collection: str):
+        def on_write(event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+            with self._lock:
+                self._append(collection, record_id, deleted=new is None)
+            for waiter in list(self._waiters):
+                waiter.notify()
+        return on_write
+
+    def _append(self, collection: str, record_id: Any, deleted: bool) -> None:
+        self.version += 1
+        # Logged without the record; since() attaches the current one
+        change = Change(self.version, collection, record_id, None if deleted else UPSERT)
+        key = (collection, record_id)
+        self._log.append(change)
+        self._versions.append(change.version)
+        # Re-inserted so the dict stays in version order
+        self._latest.pop(key, None)
+        self._latest[key] = change
+        if len(self._latest) > self.max_changes:
+            oldest = next(iter(self._latest))
+            self.horizon = self._latest.pop(oldest).version
+        if len(self._log) > 2 * len(self._latest) + 1024:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._log = list(self._latest.values())
+        self._versions = [change.version for change in self._log]
+
+    def version_of(self, collection: str, record_id: Any) -> Optional[int]:
+        """Version of a record's latest write, or None if unknown"""
+        change = self._latest.get((collection, record_id))
+        return change.version if change is not None else None
+
+    def since(
+        self,
+        version: int,
+        collections: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[List[Change], int, bool]:
+        """
+        Latest changes with a version above the given one, oldest first.
+        Returns (changes, position to resume from, whether more changes follow).
+        Raises ChangeFeedExpired if version is behind the horizon.
+        """
+        with self._lock:
+            if version < self.horizon:
+                raise ChangeFeedExpired(f"Changes after version {version} are no longer available")
+            wanted = set(collections) if collections else None
+            changes: List[Change] = []
+            for i in range(bisect.bisect_right(self._versions, version), len(self._log)):
+                change = self._log[i]
+                key = (change.collection, change.record_id)
+                if self._latest.get(key) is not change:
+                    continue
+                if wanted is not None and change.collection not in wanted:
+                    continue
+                if change.record is UPSERT:
+                    change = change._replace(record=self._repositories[change.collection].get(change.record_id))
+                changes.append(change)
+                if limit is not None and len(changes) > limit:
+                    return changes[:limit], changes[limit - 1].version, True
+            return changes, self.version, False
+
+    def watch(self) -> ChangeWaiter:
+        """Register a waiter for the calling event loop"""
+        waiter = ChangeWaiter(self)
+        self._waiters.append(waiter)
+        return waiter
+
+    def _unwatch(self, waiter: ChangeWaiter) -> None:
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+
+
+def format_sse(event: str, data: bytes, event_id: Optional[int] = None) -> bytes:
+    """One Server-Sent Events message; data must be a single line (e.g. compact JSON)"""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\n".encode("utf-8") + b"data: " + data + b"\n\n"
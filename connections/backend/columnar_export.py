@@ -0,0 +1,192 @@
+"""
+Columnar bulk export of repository records as Arrow IPC streams or Parquet.
+Every exportable collection has a fixed column schema. Index lookups pick the
+candidate records, which are then read batch by batch, column by column,
+straight from the repository's stored rows. Remaining filter conditions are
+evaluated on those columns (range conditions on numeric columns as Arrow
+compute kernels), and only the requested columns are converted. pyarrow is
+optional; without it exports are unavailable.
+"""
+from datetime import datetime, timezone
+from functools import reduce
+from itertools import compress
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from filters import COMPARISONS, CollectionFilter, Condition, compile_check
+from repository import Repository
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = pq = None
+
+# Format name -> (media type, file extension)
+EXPORT_FORMATS = {
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+class ExportError(ValueError):
+    """Export parameters that cannot be satisfied"""
+
+
+def export_available() -> bool:
+    return pa is not None
+
+
+def arrow_type(name: str) -> "pa.DataType":
+    """Arrow type of a schema type name ("category" is a dictionary-encoded string)"""
+    return {
+        "string": pa.string(),
+        "category": pa.dictionary(pa.int32(), pa.string()),
+        "int64": pa.int64(),
+        "float64": pa.float64(),
+        "bool": pa.bool_(),
+        "timestamp": pa.timestamp("us", tz="UTC"),
+        "list<string>": pa.list_(pa.string()),
+        "list<int64>": pa.list_(pa.int64()),
+    }[name]
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    """ISO 8601 string as an aware datetime (UTC when it has no offset), or None"""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _numeric(type: "pa.DataType") -> bool:
+    return pa.types.is_integer(type) or pa.types.is_floating(type)
+
+
+def _coerce(value: Any, type: "pa.DataType") -> Any:
+    if pa.types.is_timestamp(type):
+        return _parse_timestamp(value)
+    try:
+        return pa.scalar(value, type=type).as_py()
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, ValueError, OverflowError):
+        return None
+
+
+def column_array(values: List[Any], type: "pa.DataType") -> "pa.Array":
+    """Arrow array of a column; values that do not fit the type become nulls"""
+    if _numeric(type) and any(value is True or value is False for value in values):
+        # pyarrow would read booleans as 1 and 0, but they are not numbers to the filters
+        values = [None if value is True or value is False else value for value in values]
+    try:
+        if pa.types.is_timestamp(type):
+            return pa.array(values, type=pa.string()).cast(type)
+        return pa.array(values, type=type)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError, OverflowError):
+        # Slow path: convert value by value rather than failing a stream already under way
+        return pa.array([_coerce(value, type) for value in values], type=type)
+
+
+def _compare(array: "pa.Array", condition: Condition) -> "pa.BooleanArray":
+    kernel = {"gt": pc.greater, "gte": pc.greater_equal, "lt": pc.less, "lte": pc.less_equal}[condition.op]
+    result = kernel(array, condition.value)
+    # filters.py only compares finite numbers
+    return pc.and_(result, pc.is_finite(array)) if pa.types.is_floating(array.type) else result
+
+
+class _Chunks:
+    """Write-only file object collecting what a writer produced since the last drain"""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts = []
+        return data
+
+
+class ColumnarExport:
+    """Validated export of one collection: selected columns, compiled filter and Arrow schema"""
+
+    def __init__(
+        self,
+        repository: Repository,
+        schema: Dict[str, str],
+        columns: Optional[Sequence[str]] = None,
+        conditions: Sequence[Condition] = (),
+    ):
+        columns = list(columns) if columns else list(schema)
+        unknown = [name for name in (*columns, *(c.field for c in conditions)) if name not in schema]
+        if unknown:
+            raise ExportError(
+                f"Unknown column '{unknown[0]}' for {repository.name}. Available: {', '.join(schema)}"
+            )
+        self.repository = repository
+        self.types = {name: arrow_type(type) for name, type in schema.items()}
+        self.schema = pa.schema([pa.field(name, self.types[name]) for name in dict.fromkeys(columns)])
+        self.filter = CollectionFilter(conditions, repository.indexed_fields)
+        # Range conditions on numeric columns run as Arrow kernels on the built arrays;
+        # the rest are checked value by value before any array is built
+        self.vectorized = [c for c in self.filter.residual if c.op in COMPARISONS and _numeric(self.types[c.field])]
+        self.checks = [(c.field, compile_check(c)) for c in self.filter.residual if c not in self.vectorized]
+
+    def ids(self) -> List[Any]:
+        """Keys of the candidate records, taken up front so later writes do not disturb the export"""
+        return self.filter.candidate_ids(self.repository)
+
+    def batches(self, ids: Sequence[Any], batch_size: int) -> Iterator["pa.RecordBatch"]:
+        """Record batches of the matching records among ids"""
+        names = self.schema.names
+        arrays_needed = list(dict.fromkeys([*names, *(c.field for c in self.vectorized)]))
+        fields = list(dict.fromkeys([*arrays_needed, *(field for field, _ in self.checks)]))
+        for start in range(0, len(ids), batch_size):
+            columns = self.repository.columns(ids[start:start + batch_size], fields)
+            if self.checks:
+                mask = [True] * len(columns[fields[0]])
+                for field, check in self.checks:
+                    mask = [keep and check(value) for keep, value in zip(mask, columns[field])]
+                if not any(mask):
+                    continue
+                columns = {field: list(compress(columns[field], mask)) for field in arrays_needed}
+            arrays = {field: column_array(columns[field], self.types[field]) for field in arrays_needed}
+            batch = pa.RecordBatch.from_arrays([arrays[name] for name in names], schema=self.schema)
+            if self.vectorized:
+                # Nulls (missing or mistyped values) compare as null and are dropped, like non-numbers in filters.py
+                batch = batch.filter(reduce(pc.and_, (_compare(arrays[c.field], c) for c in self.vectorized)))
+                if not batch.num_rows:
+                    continue
+            yield batch
+
+    def stream(self, ids: Sequence[Any], format: str, batch_size: int = 10_000) -> Iterator[bytes]:
+        """Encoded output, one chunk per record batch (an Arrow IPC message or a Parquet row group)"""
+        sink = _Chunks()
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, self.schema)
+        else:
+            writer = pa.ipc.new_stream(sink, self.schema)
+        for batch in self.batches(ids, batch_size):
+            writer.write_batch(batch)
+            data = sink.drain()
+            if data:
+                yield data
+        writer.close()
+        yield sink.drain()
@@ -0,0 +1,159 @@
+"""
+Compact record encoding for large in-memory repositories.
+A record is stored as a tuple whose first item is its Shape, the layout
+shared by every record with the same keys in the same order (including the
+keys of nested dicts such as metadata), followed by the leaf values. Field
+names are therefore stored once per shape instead of once per record, lists
+become tuples and repeated values of shared fields (status, category,
+department, roles) are interned so all records point at one object. Records
+are materialized back into dicts only when they leave the repository.
+Shapes are compiled code, so a codec compiles a bounded number of them;
+records with any further layout are kept as plain dicts behind PLAIN.
+"""
+import copy
+import sys
+from typing import Any, Callable, Dict, Iterable, Set, Tuple
+
+# Layout entry for a list field, stored as a tuple
+LIST = "list"
+
+# Shapes compiled per codec, and distinct list values interned per codec
+MAX_SHAPES = 1024
+MAX_INTERNED_TUPLES = 65_536
+
+Row = Tuple[Any, ...]
+
+
+class Shape:
+    """Field layout of a family of records, with accessors compiled for it"""
+
+    __slots__ = ("layout", "positions", "lists", "nested", "materialize")
+
+    def __init__(self, layout: Tuple[Any, ...]):
+        self.layout = layout
+        # Dotted path -> position in the row, for scalar and list fields
+        self.positions: Dict[str, int] = {}
+        self.lists: Set[int] = set()
+        # Dotted path -> builder of the nested dict at that path
+        self.nested: Dict[str, Callable[[Row], Dict[str, Any]]] = {}
+        self.materialize = self._compile(self._source(layout, "", [1]))
+
+    def _source(self, layout: Tuple[Any, ...], prefix: str, counter: list) -> str:
+        """Python expression building the dict for layout from a row r"""
+        items = []
+        for entry in layout:
+            name, kind = entry if isinstance(entry, tuple) else (entry, None)
+            path = f"{prefix}{name}"
+            if kind is None or kind == LIST:
+                index = counter[0]
+                counter[0] += 1
+                self.positions[path] = index
+                if kind == LIST:
+                    self.lists.add(index)
+                    items.append(f"{name!r}: list(r[{index}])")
+                else:
+                    items.append(f"{name!r}: r[{index}]")
+            else:
+                source = self._source(kind, f"{path}.", counter)
+                self.nested[path] = self._compile(source)
+                items.append(f"{name!r}: {source}")
+        return "{" + ", ".join(items) + "}"
+
+    @staticmethod
+    def _compile(source: str) -> Callable[[Row], Dict[str, Any]]:
+        # Keys are emitted with repr(), so the generated code is a plain dict display
+        return eval(f"lambda r: {source}", {"__builtins__": {"list": list}})
+
+    def get(self, row: Row, path: str, default: Any = None) -> Any:
+        index = self.positions.get(path)
+        if index is not None:
+            value = row[index]
+            return list(value) if index in self.lists else value
+        build = self.nested.get(path)
+        if build is not None:
+            return build(row)
+        return default
+
+
+class PlainShape:
+    """Shape of rows that hold a private copy of the record as a dict: (PLAIN, record)"""
+
+    __slots__ = ()
+
+    @staticmethod
+    def materialize(row: Row) -> Dict[str, Any]:
+        return copy.deepcopy(row[1])
+
+    @staticmethod
+    def get(row: Row, path: str, default: Any = None) -> Any:
+        value: Any = row[1]
+        for part in path.split("."):
+            if not isinstance(value, dict) or part not in value:
+                return default
+            value = value[part]
+        return value
+
+
+PLAIN = PlainShape()
+
+
+class RecordCodec:
+    """Encodes dict records into compact rows and back"""
+
+    def __init__(self, shared: Iterable[str] = (), max_shapes: int = MAX_SHAPES):
+        # Dotted paths whose values repeat across records and are worth interning
+        self.shared = frozenset(shared)
+        self.max_shapes = max_shapes
+        self._shapes: Dict[Tuple[Any, ...], Shape] = {}
+        self._tuples: Dict[Tuple[Any, ...], Tuple[Any, ...]] = {}
+
+    @property
+    def shapes(self) -> int:
+        return len(self._shapes)
+
+    def encode(self, record: Dict[str, Any]) -> Row:
+        values = [None]
+        layout = self._flatten(record, "", values)
+        shape = self._shapes.get(layout)
+        if shape is None:
+            if len(self._shapes) >= self.max_shapes:
+                return (PLAIN, copy.deepcopy(record))
+            shape = self._shapes[layout] = Shape(layout)
+        values[0] = shape
+        return tuple(values)
+
+    def _flatten(self, record: Dict[str, Any], prefix: str, values: list) -> Tuple[Any, ...]:
+        layout = []
+        shared = self.shared
+        for name, value in record.items():
+            kind = type(value)
+            if kind is dict:
+                layout.append((name, self._flatten(value, f"{prefix}{name}.", values)))
+                continue
+            if kind is list:
+                value = tuple(value)
+                if f"{prefix}{name}" in shared:
+                    try:
+                        if len(self._tuples) < MAX_INTERNED_TUPLES:
+                            value = self._tuples.setdefault(value, value)
+                        else:
+                            value = self._tuples.get(value, value)
+                    except TypeError:
+                        pass
+                layout.append((name, LIST))
+            else:
+                if kind is str and f"{prefix}{name}" in shared:
+                    value = sys.intern(value)
+                layout.append(name)
+            values.append(value)
+        return tuple(layout)
+
+    @staticmethod
+    def decode(row: Row) -> Dict[str, Any]:
+        return row[0].materialize(row)
+
+    @staticmethod
+    def field(row: Row, path: str, default: Any = None) -> Any:
+        """Read a dotted field from a row, like get_field does from a dict"""
+        return row[0].get(row, path, default)
+
@@ -0,0 +1,217 @@
+"""
+Negotiated gzip/brotli response compression for the FastAPI backend.
+A pure ASGI middleware picks an encoding from Accept-Encoding, compresses
+complete responses above a size threshold, compresses streamed (NDJSON)
+responses chunk by chunk, and caches compressed variants of responses that
+carry a strong ETag so repeated reads do not pay the compression cost again.
+"""
+import gzip
+import zlib
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from auth_store import TTLCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+# Encodings in order of preference when the client weighs them equally
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/", "application/vnd.apache.arrow")
+# Server-sent events must reach the client as they are written, not once a compressor block fills
+INCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def negotiate_encoding(accept_encoding: str, supported: Tuple[str, ...] = SUPPORTED_ENCODINGS) -> Optional[str]:
+    """Pick the best supported content coding for an Accept-Encoding header, or None"""
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding] = q
+
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = weights.get(coding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(body: bytes, encoding: str, level: int) -> bytes:
+    """One-shot compression of a complete body"""
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+class StreamCompressor:
+    """Incremental compressor that flushes after every chunk so records reach the client promptly"""
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data) + self._compressor.flush()
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def _suffix_etag(etag: str, encoding: str) -> str:
+    """Distinct strong ETag for a compressed representation"""
+    if etag.endswith('"'):
+        return f'{etag[:-1]}-{encoding}"'
+    return etag
+
+
+def _strip_etag_suffixes(if_none_match: str, encoding: str) -> str:
+    """Map compressed-variant ETags in If-None-Match back to the identity ETag"""
+    return if_none_match.replace(f'-{encoding}"', '"')
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware applying negotiated gzip/brotli compression"""
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        cached_gzip_level: int = 9,
+        cached_brotli_quality: int = 9,
+        cache_size: int = 256,
+        cache_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": gzip_level, "br": brotli_quality}
+        # Cached variants are compressed once, so they can afford a higher level
+        self.cached_levels = {"gzip": cached_gzip_level, "br": cached_brotli_quality}
+        self.variants = TTLCache(maxsize=cache_size, ttl=3600.0, maxweight=cache_bytes, weigh=len)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        encoding = negotiate_encoding(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = headers.get("if-none-match")
+        variant_validator = bool(if_none_match) and f'-{encoding}"' in if_none_match
+        if variant_validator:
+            raw = [(k, v) for k, v in scope["headers"] if k != b"if-none-match"]
+            raw.append((b"if-none-match", _strip_etag_suffixes(if_none_match, encoding).encode("latin-1")))
+            # Rewritten in place: outer middleware (metrics) reads the route the router sets on this scope
+            scope["headers"] = raw
+
+        responder = _CompressionResponder(self, encoding, send, variant_validator)
+        await self.app(scope, receive, responder)
+
+
+class _CompressionResponder:
+    """Per-response state machine wrapping the downstream send()"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send, variant_validator: bool):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        # The client revalidated a compressed variant, so a 304 must echo its ETag
+        self.variant_validator = variant_validator
+        self.start_message = None
+        self.mode = None  # "passthrough", "stream" once the first body message is seen
+        self.compressor: Optional[StreamCompressor] = None
+
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+
+        if self.mode is None:
+            await self._first_body(message)
+        elif self.mode == "stream":
+            body = self.compressor.chunk(message.get("body", b""))
+            more_body = message.get("more_body", False)
+            if not more_body:
+                body += self.compressor.finish()
+            await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+        else:
+            await self.send(message)
+
+    async def _first_body(self, message) -> None:
+        start = self.start_message
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        content_type = headers.get("content-type", "")
+
+        compressible = (
+            start["status"] not in (204, 206, 304)
+            and "content-encoding" not in headers
+            and "content-range" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith(INCOMPRESSIBLE_TYPES)
+            and (more_body or len(body) >= self.middleware.minimum_size)
+        )
+        if not compressible:
+            self.mode = "passthrough"
+            if start["status"] == 304 and self.variant_validator and "etag" in headers:
+                headers["etag"] = _suffix_etag(headers["etag"], self.encoding)
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+
+        if more_body:
+            self.mode = "stream"
+            del headers["content-length"]
+            self.compressor = StreamCompressor(self.encoding, self.middleware.levels[self.encoding])
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": self.compressor.chunk(body), "more_body": True})
+            return
+
+        self.mode = "passthrough"
+        etag = headers.get("etag")
+        if etag:
+            key = (etag, self.encoding)
+            compressed = self.middleware.variants.get(key)
+            if compressed is None:
+                compressed = compress(body, self.encoding, self.middleware.cached_levels[self.encoding])
+                self.middleware.variants.set(key, compressed)
+            headers["etag"] = _suffix_etag(etag, self.encoding)
+        else:
+            compressed = compress(body, self.encoding, self.middleware.levels[self.encoding])
+        headers["content-length"] = str(len(compressed))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": False})
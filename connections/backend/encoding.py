@@ -0,0 +1,52 @@
+"""
+JSON encoding for FastAPI backend responses.
+Uses orjson when it is installed and falls back to the standard library
+encoder otherwise; set JSON_ENCODER=json or JSON_ENCODER=orjson to choose
+explicitly.
+"""
+import json
+import os
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Payloads may have non-string keys, as json.dumps accepts; orjson encodes them only with
+# OPT_NON_STR_KEYS, so releases without it are not used
+if orjson is not None and not hasattr(orjson, "OPT_NON_STR_KEYS"):  # pragma: no cover - old orjson
+    orjson = None
+
+
+def _stdlib_dumps(payload: Any) -> bytes:
+    return json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def _orjson_dumps(payload: Any) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+
+
+ENCODERS: Dict[str, Callable[[Any], bytes]] = {"json": _stdlib_dumps}
+if orjson is not None:
+    ENCODERS["orjson"] = _orjson_dumps
+
+
+def get_encoder(name: Optional[str] = None) -> Callable[[Any], bytes]:
+    """Return the encoder named by JSON_ENCODER, defaulting to the fastest available"""
+    name = name or os.getenv("JSON_ENCODER") or ("orjson" if orjson is not None else "json")
+    if name not in ENCODERS:
+        raise ValueError(f"Unknown or unavailable JSON encoder '{name}'. Available: {', '.join(ENCODERS)}")
+    return ENCODERS[name]
+
+
+encode_json = get_encoder()
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with the configured encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return encode_json(content)
@@ -3,20 +3,68 @@ FastAPI Backend Application for API Data Fetcher Example
 This app provides authenticated API endpoints for the watsonx agents to consume.
 Supports multiple authentication methods: Basic Auth, Bearer Token, API Key, and Key-Value headers.
 """
-from fastapi import FastAPI, HTTPException, Depends, Query, status, Header, Request
+from fastapi import FastAPI, HTTPException, Depends, Query, status, Header, Request, Response
 from fastapi.security import HTTPBasic, HTTPBasicCredentials, HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any, Union
-import secrets
-from datetime import datetime
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List, Dict, Any, Callable, Sequence, Tuple, Union
+import asyncio
+import base64
+import hashlib
+import itertools
+import os
+import shutil
+import tempfile
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from enum import Enum
 
+from aggregates import DashboardAggregates
+from analytics import ANALYTICS_METRICS, Analytics
+from auth_store import CredentialStore, iterations_from_env
+from batch import BATCH_AUTH_STATE_KEY, route_path, run_batch, split_path
+from changes import ChangeFeed, ChangeFeedExpired, format_sse
+from columnar_export import EXPORT_FORMATS, ColumnarExport, ExportError, export_available
+from compression import CompressionMiddleware
+from encoding import FastJSONResponse, encode_json
+from filters import FilterCache, FilterError, compile_predicate, parse_filter_text, parse_filters
+from ingest import ingest, iter_csv_rows, iter_lines, iter_ndjson_rows
+from jobs import SUCCEEDED, FileResult, Job, JobManager, JobQueueFull
+from jwt_auth import InvalidToken, JWTVerifier, looks_like_jwt
+from metrics import AUTH_METHOD_STATE_KEY, PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, RequestMetrics
+from rate_limit import (
+    PRIORITY_BULK, PRIORITY_CRITICAL, PRIORITY_DEFAULT,
+    AdmissionController, Limit, MemoryBucketStore, SQLiteBucketStore, retry_after_header,
+)
+from repository import Range, Repository, decode_cursor, encode_cursor, project
+from response_cache import ResponseCache
+from search_index import SearchEngine
+from shared_state import LocalWrites, SharedJournal, SharedStateMiddleware
+from storage import DurableStorage
+from synthetic import FIRST_PRODUCT_ID, FIRST_USER_ID, generate_dataset, split_scale
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the job workers and periodic snapshots while serving; flush the write-ahead log on shutdown"""
+    await JOBS.start()
+    snapshots = asyncio.create_task(STORAGE.run_periodic_snapshots()) if STORAGE is not None else None
+    try:
+        yield
+    finally:
+        await JOBS.stop()
+        if snapshots is not None:
+            snapshots.cancel()
+            STORAGE.close()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="API Data Fetcher Backend",
     description="Demo API with multiple authentication methods for IBM Watsonx Orchestrate agents",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -28,6 +76,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Negotiated gzip/brotli compression for large and streamed responses
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESSION_MIN_SIZE", "1024")))
+
+# Request metrics (latency, sizes, status codes) exposed in Prometheus format
+REQUEST_METRICS = RequestMetrics()
+app.add_middleware(MetricsMiddleware, metrics=REQUEST_METRICS)
+
 # Authentication schemes
 basic_security = HTTPBasic()
 bearer_security = HTTPBearer()
@@ -39,29 +94,70 @@ class AuthType(str, Enum):
     API_KEY = "api_key"
     KEY_VALUE = "key_value"
 
-# Mock credentials for different auth types (in production, use a proper database)
-VALID_BASIC_CREDENTIALS = {
-    "admin": "admin123",
-    "user": "password",
-    "demo": "demo123"
-}
+# Mock credentials for different auth types (in production, use a proper database).
+# Only salted hashes are kept in memory; see auth_store.CredentialStore.
+CREDENTIALS = CredentialStore(iterations=iterations_from_env())
 
-VALID_BEARER_TOKENS = {
-    "token123abc",
-    "demo-token-456",
-    "test-bearer-token"
-}
+for _username, _password in (("admin", "admin123"), ("user", "password"), ("demo", "demo123")):
+    CREDENTIALS.add_password(_username, _password)
 
-VALID_API_KEYS = {
-    "api-key-12345",
-    "demo-api-key",
-    "test-key-xyz"
-}
+for _kind, _tokens in (
+    ("bearer", ("token123abc", "demo-token-456", "test-bearer-token")),
+    ("api_key", ("api-key-12345", "demo-api-key", "test-key-xyz")),
+    ("client_id", ("client-123", "client-456")),
+    ("api_token", ("secret-token-1", "secret-token-2")),
+):
+    for _token in _tokens:
+        CREDENTIALS.add_token(_kind, _token)
 
-VALID_KEY_VALUE_PAIRS = {
-    "client-id": ["client-123", "client-456"],
-    "x-api-token": ["secret-token-1", "secret-token-2"]
-}
+# Signed JWT bearer tokens, verified locally with PyJWT against the keys in
+# JWT_JWKS_FILE (RS256/384/512 or HS256/384/512). Tokens must carry exp and an
+# aud matching JWT_AUDIENCE; JWT_ISSUER additionally pins iss.
+JWT_JWKS_FILE = os.getenv("JWT_JWKS_FILE")
+JWT = None
+if JWT_JWKS_FILE:
+    if not os.getenv("JWT_AUDIENCE"):
+        raise RuntimeError("JWT_AUDIENCE must be set when JWT_JWKS_FILE is configured")
+    JWT = JWTVerifier(
+        JWT_JWKS_FILE,
+        audience=os.environ["JWT_AUDIENCE"],
+        issuer=os.getenv("JWT_ISSUER") or None,
+        leeway=float(os.getenv("JWT_LEEWAY", "30")),
+    )
+
+# Token-bucket admission control per credential and per route. Set RATE_LIMIT_DB
+# to a file path to share bucket state between worker processes. Per-route buckets
+# are shared by every credential, so they should be sized for the whole deployment;
+# bulk routes only get one when RATE_LIMIT_BULK_ROUTE_RPS is set.
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+
+def env_limit(name: str, default: str, queue: int) -> Optional[Limit]:
+    """Limit of rate env var name (requests/second, burst of twice that); unset or empty disables it"""
+    value = os.getenv(name, default)
+    if not value:
+        return None
+    rate = float(value)
+    return Limit(rate=rate, burst=max(5, int(rate * 2)), queue=queue)
+
+ADMISSION = AdmissionController(
+    store=SQLiteBucketStore(os.environ["RATE_LIMIT_DB"]) if os.getenv("RATE_LIMIT_DB") else MemoryBucketStore(),
+    credential_limits={
+        PRIORITY_DEFAULT: env_limit("RATE_LIMIT_RPS", "50", queue=20),
+        PRIORITY_BULK: env_limit("RATE_LIMIT_BULK_RPS", "1", queue=2),
+    },
+    route_limits={
+        PRIORITY_DEFAULT: env_limit("RATE_LIMIT_ROUTE_RPS", "500", queue=100),
+        PRIORITY_BULK: env_limit("RATE_LIMIT_BULK_ROUTE_RPS", "", queue=5),
+    },
+    # Batches count as one default request: they exist to save round-trips on ordinary reads
+    route_classes={
+        "/": PRIORITY_CRITICAL,
+        "/health": PRIORITY_CRITICAL,
+        "/api/v1/metrics/prometheus": PRIORITY_CRITICAL,
+        "/api/v1/import/{collection}": PRIORITY_BULK,
+        "/api/v1/export/{collection}": PRIORITY_BULK,
+    },
+)
 
 # Mock database
 MOCK_USERS = {
@@ -187,6 +283,252 @@ MOCK_ORDERS = [
     }
 ]
 
+# COMPACT_STORAGE=1 stores records as encoded rows with interned repeated values
+# (see compact.py), trading a little CPU per returned record for much less memory
+COMPACT_STORAGE = os.getenv("COMPACT_STORAGE", "0") == "1"
+
+# Repositories over the mock collections with secondary indexes on the filtered fields
+USERS = Repository(
+    "users",
+    key="id",
+    indexes=("status", "metadata.department"),
+    sortable=("id", "username", "email", "last_name", "status", "created_at", "last_login"),
+    compact=COMPACT_STORAGE,
+    shared=("roles", "metadata.location"),
+)
+USER_IDS = itertools.count(max(int(user_id) for user_id in MOCK_USERS) + 1)
+
+PRODUCTS = Repository(
+    "products",
+    key="id",
+    indexes=("status", "category"),
+    sortable=("id", "name", "category", "status", "price", "stock"),
+    compact=COMPACT_STORAGE,
+)
+PRODUCT_IDS = itertools.count(max(product["id"] for product in MOCK_PRODUCTS) + 1)
+
+ORDERS = Repository(
+    "orders",
+    key="id",
+    indexes=("status", "user_id"),
+    sortable=("id", "user_id", "status", "total", "created_at"),
+    ranges=("created_at",),
+    compact=COMPACT_STORAGE,
+)
+
+REPOSITORIES = {"users": USERS, "products": PRODUCTS, "orders": ORDERS}
+
+# SYNTHETIC_SCALE=N adds N generated records (split across users, products and orders)
+# to the mock data; the same SYNTHETIC_SEED always yields the same dataset
+SYNTHETIC_SCALE = int(os.getenv("SYNTHETIC_SCALE", "0"))
+SYNTHETIC_SEED = int(os.getenv("SYNTHETIC_SEED", "42"))
+SYNTHETIC_BATCH = 50000
+
+def seed_repositories() -> None:
+    """Load the mock collections, plus the synthetic dataset when SYNTHETIC_SCALE is set"""
+    global USER_IDS, PRODUCT_IDS
+    USERS.load(MOCK_USERS.values())
+    PRODUCTS.load(MOCK_PRODUCTS)
+    ORDERS.load(MOCK_ORDERS)
+    if SYNTHETIC_SCALE <= 0:
+        return
+    for name, records in generate_dataset(SYNTHETIC_SCALE, SYNTHETIC_SEED).items():
+        repository = REPOSITORIES[name]
+        # Batches keep memory flat while streaming millions of generated records
+        while repository.insert_many(itertools.islice(records, SYNTHETIC_BATCH)):
+            pass
+    # Start new ids after the generated ones instead of skipping over them one by one
+    sizes = split_scale(SYNTHETIC_SCALE)
+    USER_IDS = itertools.count(FIRST_USER_ID + sizes["users"])
+    PRODUCT_IDS = itertools.count(FIRST_PRODUCT_ID + sizes["products"])
+
+# With DATA_DIR set, data survives restarts: the latest snapshot is memory-mapped and
+# the write-ahead log after it replayed; the mock data only seeds an empty directory
+if os.getenv("DATA_DIR"):
+    if os.getenv("SHARED_STATE_DB"):
+        raise RuntimeError("DATA_DIR persistence is only supported with a single worker process")
+    STORAGE = DurableStorage(
+        os.environ["DATA_DIR"],
+        REPOSITORIES,
+        snapshot_interval=float(os.getenv("SNAPSHOT_INTERVAL", "300")),
+    )
+    restored = STORAGE.restore()
+    if not restored:
+        seed_repositories()
+    STORAGE.attach()
+    if not restored:
+        STORAGE.snapshot()
+else:
+    STORAGE = None
+    seed_repositories()
+
+# With several worker processes (run_server.sh start-workers), writes are replicated
+# through a shared SQLite journal named by SHARED_STATE_DB; otherwise they apply locally
+if os.getenv("SHARED_STATE_DB"):
+    JOURNAL = SharedJournal(os.environ["SHARED_STATE_DB"], REPOSITORIES)
+    app.add_middleware(SharedStateMiddleware, journal=JOURNAL)
+else:
+    JOURNAL = LocalWrites()
+
+# Full-text search index over products and users, kept in sync with repository writes
+SEARCH = SearchEngine()
+SEARCH.register("products", PRODUCTS, {"name": 2.0, "description": 1.0})
+SEARCH.register("users", USERS, {"username": 1.0, "email": 1.0, "metadata.department": 1.0})
+
+# Dashboard counters maintained incrementally from repository writes
+DASHBOARD = DashboardAggregates(USERS, PRODUCTS, ORDERS)
+
+# Columnar (NumPy) mirrors of products and orders for vectorized analytics
+ANALYTICS = Analytics(PRODUCTS, ORDERS)
+
+# Versioned change feed for incremental sync (/api/v1/changes); worker processes apply
+# writes in journal order, so they agree on versions and share the journal's epoch.
+# CHANGE_FEED_SIZE bounds how many records' latest changes are retained.
+CHANGES = ChangeFeed(REPOSITORIES, epoch=JOURNAL.epoch, max_changes=int(os.getenv("CHANGE_FEED_SIZE", "100000")))
+CHANGES_PAGE_SIZE = 1000
+SSE_POLL_INTERVAL = 1.0
+SSE_KEEPALIVE_INTERVAL = 15.0
+
+# Encoded responses of read endpoints, invalidated by repository versions and
+# bounded by total body size (RESPONSE_CACHE_MAX_BYTES, default 64 MiB)
+RESPONSE_CACHE = ResponseCache(max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024))))
+
+# Content type for newline-delimited JSON streaming of list endpoints
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+NDJSON_CHUNK_SIZE = 500
+
+# Background jobs (/api/v1/jobs) run on a bounded pool of worker tasks; jobs live in the
+# process that accepted them, so with several workers clients must poll the same process
+JOBS = JobManager(
+    workers=int(os.getenv("JOB_WORKERS", "2")),
+    max_pending=int(os.getenv("JOB_MAX_PENDING", "100")),
+    retention=float(os.getenv("JOB_RETENTION", "3600")),
+)
+# Records (or upload bytes, for imports) processed between progress updates and checkpoints
+JOB_CHUNK_SIZE = 1000
+JOB_READ_SIZE = 65536
+# File extension of a job result download, by the result's media type
+RESULT_EXTENSIONS = {NDJSON_MEDIA_TYPE: "ndjson", **dict(EXPORT_FORMATS.values())}
+
+async def wait_durable() -> None:
+    """Wait for the group commit that makes this request's writes durable (no-op without DATA_DIR)"""
+    if STORAGE is not None:
+        await STORAGE.durable()
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """Parse a comma-separated projection such as 'id,name,metadata.department'"""
+    if not fields:
+        return None
+    return [f.strip() for f in fields.split(",") if f.strip()] or None
+
+def parse_timestamp(name: str, value: Optional[str]) -> Optional[str]:
+    """Normalize an ISO 8601 date or datetime to the stored 'YYYY-MM-DDTHH:MM:SSZ' form (naive values are UTC)"""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name}: expected an ISO 8601 date or datetime")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc)
+    return parsed.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def expand_order_items(order: Dict[str, Any]) -> Dict[str, Any]:
+    """Replace an order's product ids with the product records (unknown ids are marked missing)"""
+    items = []
+    for product_id in order.get("items") or ():
+        product = PRODUCTS.get(product_id)
+        items.append(product if product is not None else {"id": product_id, "missing": True})
+    return {**order, "items": items}
+
+def iter_ndjson(
+    records: List[Dict[str, Any]],
+    fields: Optional[List[str]],
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+):
+    """Yield NDJSON chunks of records, serializing at most NDJSON_CHUNK_SIZE rows at a time"""
+    for start in range(0, len(records), NDJSON_CHUNK_SIZE):
+        chunk = records[start:start + NDJSON_CHUNK_SIZE]
+        if transform:
+            chunk = [transform(record) for record in chunk]
+        if fields:
+            chunk = [project(record, fields) for record in chunk]
+        yield b"".join(encode_json(record) + b"\n" for record in chunk)
+
+def iter_ndjson_ids(
+    repository: Repository,
+    ids: List[Any],
+    fields: Optional[List[str]],
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+):
+    """Like iter_ndjson, but read the records of ids one chunk at a time; records deleted meanwhile are skipped"""
+    for start in range(0, len(ids), NDJSON_CHUNK_SIZE):
+        chunk = [record for record in map(repository.get, ids[start:start + NDJSON_CHUNK_SIZE]) if record is not None]
+        if chunk:
+            yield from iter_ndjson(chunk, fields, transform)
+
+def list_records(
+    request: Request,
+    repository: Repository,
+    filters: Dict[str, Any],
+    auth: Dict[str, Any],
+    items_key: str = "items",
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    related: Sequence[Repository] = (),
+):
+    """
+    Shared implementation of the list endpoints.
+    Supports keyset cursor pagination, field projection and, when the client sends
+    'Accept: application/x-ndjson', a streamed response with one record per line.
+    JSON responses are served from the response cache with ETags.
+    transform rewrites each record before projection (e.g. to join related records);
+    related lists the other repositories it reads, so their writes invalidate the cache.
+    """
+    projection = parse_fields(fields)
+
+    def fetch():
+        try:
+            after = decode_cursor(cursor, sort) if cursor else None
+            records, position = repository.page(filters, sort=sort, limit=limit, after=after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return records, encode_cursor(sort, position) if position is not None else None
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        if sort is None and limit is None and cursor is None:
+            # A full unsorted listing: only the matching keys are collected up front,
+            # records are read and serialized chunk by chunk as the client consumes them
+            return StreamingResponse(
+                iter_ndjson_ids(repository, repository.ids(filters), projection, transform),
+                media_type=NDJSON_MEDIA_TYPE,
+            )
+        records, next_cursor = fetch()
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return StreamingResponse(
+            iter_ndjson(records, projection, transform), media_type=NDJSON_MEDIA_TYPE, headers=headers
+        )
+
+    def build():
+        records, next_cursor = fetch()
+        if transform:
+            records = [transform(record) for record in records]
+        items = [project(record, projection) for record in records] if projection else records
+        return {
+            "success": True,
+            "auth_method": auth.get("auth_type"),
+            "data": {
+                items_key: items,
+                "total": repository.count(filters),
+                "next_cursor": next_cursor
+            }
+        }
+
+    return RESPONSE_CACHE.respond(request, auth, (repository, *related), build)
+
 # Pydantic models
 class UserCreate(BaseModel):
     username: str
@@ -195,41 +537,184 @@ class UserCreate(BaseModel):
     last_name: str
     department: Optional[str] = None
 
+class UserImport(UserCreate):
+    id: Optional[Union[str, int]] = None
+    status: str = "active"
+    location: Optional[str] = None
+    roles: List[str] = ["user"]
+    created_at: Optional[str] = None
+
+    @field_validator("roles", mode="before")
+    @classmethod
+    def split_roles(cls, value):
+        # CSV uploads list roles as "user;editor"
+        if isinstance(value, str):
+            return [role.strip() for role in value.split(";") if role.strip()]
+        return value
+
+class ProductImport(BaseModel):
+    id: Optional[int] = None
+    name: str
+    category: str
+    status: str = "active"
+    price: float = Field(..., ge=0)
+    stock: int = Field(0, ge=0)
+    description: str = ""
+
+class BatchItem(BaseModel):
+    path: str
+    query: Optional[Dict[str, Any]] = None
+
+class BatchRequest(BaseModel):
+    requests: List[BatchItem] = Field(..., min_length=1, max_length=50)
+
+def next_free_id(counter, repository: Repository, cast=str):
+    """Draw ids from a counter, skipping any already taken by explicitly supplied ids"""
+    while True:
+        record_id = cast(next(counter))
+        if record_id not in repository:
+            return record_id
+
+def build_user_record(user_data: UserCreate) -> Dict[str, Any]:
+    """Build a stored user record from a create or import payload"""
+    record_id = getattr(user_data, "id", None)
+    return {
+        "id": str(record_id) if record_id is not None else next_free_id(USER_IDS, USERS),
+        "username": user_data.username,
+        "email": user_data.email,
+        "first_name": user_data.first_name,
+        "last_name": user_data.last_name,
+        "status": getattr(user_data, "status", "active"),
+        "created_at": getattr(user_data, "created_at", None) or datetime.utcnow().isoformat() + "Z",
+        "last_login": None,
+        "roles": getattr(user_data, "roles", ["user"]),
+        "metadata": {
+            "department": user_data.department,
+            "location": getattr(user_data, "location", None)
+        }
+    }
+
+def build_product_record(product_data: ProductImport) -> Dict[str, Any]:
+    """Build a stored product record from an import payload"""
+    record = product_data.model_dump()
+    if record["id"] is None:
+        record["id"] = next_free_id(PRODUCT_IDS, PRODUCTS, int)
+    return record
+
+# Collections accepted by the bulk import endpoint: repository, row validator and
+# validated row -> record builder (run inside the write transaction)
+IMPORTERS = {
+    "users": (USERS, UserImport.model_validate, build_user_record),
+    "products": (PRODUCTS, ProductImport.model_validate, build_product_record),
+}
+
+def export_plan(collection: Any, filters: Any) -> Tuple[Repository, Dict[str, Any], Optional[Callable[[Dict[str, Any]], bool]]]:
+    """Validate export parameters into (repository, indexable equality filters, residual predicate)"""
+    if collection not in REPOSITORIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown collection '{collection}'. Exportable: {', '.join(REPOSITORIES)}"
+        )
+    try:
+        conditions = parse_filters(filters or {})
+    except FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Single equality conditions go to Repository.find (index lookups); the rest become a predicate
+    equality: Dict[str, Any] = {}
+    residual = []
+    for condition in conditions:
+        if condition.op == "eq" and condition.value is not None and condition.field not in equality:
+            equality[condition.field] = condition.value
+        else:
+            residual.append(condition)
+    return REPOSITORIES[collection], equality, compile_predicate(residual)
+
+async def run_export_job(job: Job) -> FileResult:
+    """Write the matching records of a collection to an NDJSON spool file"""
+    repository, equality, predicate = export_plan(job.params["collection"], job.params.get("filters"))
+    fields = job.params.get("fields")
+    # Keys are collected up front and records read chunk by chunk, so writes between
+    # checkpoints never disturb the iteration
+    ids = repository.ids(equality)
+    job.progress(0, len(ids))
+    path = job.spool("export.ndjson")
+    exported = 0
+    with open(path, "wb") as f:
+        for start in range(0, len(ids), JOB_CHUNK_SIZE):
+            records = [
+                record for record in map(repository.get, ids[start:start + JOB_CHUNK_SIZE])
+                if record is not None and (predicate is None or predicate(record))
+            ]
+            for chunk in iter_ndjson(records, fields):
+                f.write(chunk)
+            exported += len(records)
+            job.progress(min(start + JOB_CHUNK_SIZE, len(ids)), message=f"{exported} records written")
+            await job.checkpoint()
+    return FileResult(path, NDJSON_MEDIA_TYPE, os.path.getsize(path))
+
+async def run_import_job(job: Job) -> Dict[str, Any]:
+    """Ingest an upload spooled by /api/v1/import/{collection}?background=true"""
+    collection, format, path = job.params["collection"], job.params["format"], job.params["path"]
+    repository, validate, prepare = IMPORTERS[collection]
+    size = os.path.getsize(path)
+    job.progress(0, size, message="bytes read")
+
+    async def chunks():
+        done = 0
+        with open(path, "rb") as f:
+            while data := f.read(JOB_READ_SIZE):
+                done += len(data)
+                yield data
+                job.progress(done)
+                await job.checkpoint()
+
+    lines = iter_lines(chunks())
+    rows = iter_csv_rows(lines) if format == "csv" else iter_ndjson_rows(lines)
+    report = await ingest(rows, repository, prepare, transaction=JOURNAL.write, validate=validate)
+    await wait_durable()
+    return dict(collection=collection, format=format, **report.to_dict())
+
+JOBS.register("export", run_export_job)
+JOBS.register("import", run_import_job)
+
+# Job types that can be submitted directly to POST /api/v1/jobs (imports need an upload)
+SUBMITTABLE_JOBS = ("export",)
+
+class JobRequest(BaseModel):
+    type: str
+    params: Dict[str, Any] = {}
+
 # Authentication functions
 
-def verify_basic_auth(credentials: HTTPBasicCredentials = Depends(basic_security)) -> Dict[str, str]:
-    """Verify basic authentication credentials"""
-    username = credentials.username
-    password = credentials.password
+async def verify_basic_auth(request: Request, credentials: HTTPBasicCredentials = Depends(basic_security)) -> Dict[str, str]:
+    """Verify basic authentication credentials, through the credential caches like verify_any_auth"""
+    auth = await check_credential_cached("authorization", request.headers["authorization"])
     
-    if username not in VALID_BASIC_CREDENTIALS or not secrets.compare_digest(
-        password.encode("utf8"),
-        VALID_BASIC_CREDENTIALS[username].encode("utf8")
-    ):
+    if auth is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid basic auth credentials",
             headers={"WWW-Authenticate": "Basic"},
         )
     
-    return {"auth_type": AuthType.BASIC, "user": username}
+    return dict(auth)
 
 def verify_bearer_token(credentials: HTTPAuthorizationCredentials = Depends(bearer_security)) -> Dict[str, str]:
     """Verify bearer token authentication"""
-    token = credentials.credentials
+    auth = check_bearer_header(credentials.credentials)
     
-    if token not in VALID_BEARER_TOKENS:
+    if auth is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid bearer token",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    return {"auth_type": AuthType.BEARER, "token": token}
+    return auth
 
 def verify_api_key(x_api_key: Optional[str] = Header(None)) -> Dict[str, str]:
     """Verify API key authentication via header"""
-    if not x_api_key or x_api_key not in VALID_API_KEYS:
+    if not x_api_key or not CREDENTIALS.check_token("api_key", x_api_key):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or missing API key",
@@ -243,10 +728,10 @@ def verify_key_value(
     x_api_token: Optional[str] = Header(None)
 ) -> Dict[str, str]:
     """Verify key-value pair authentication via custom headers"""
-    if x_client_id and x_client_id in VALID_KEY_VALUE_PAIRS.get("client-id", []):
+    if x_client_id and CREDENTIALS.check_token("client_id", x_client_id):
         return {"auth_type": AuthType.KEY_VALUE, "client_id": x_client_id}
     
-    if x_api_token and x_api_token in VALID_KEY_VALUE_PAIRS.get("x-api-token", []):
+    if x_api_token and CREDENTIALS.check_token("api_token", x_api_token):
         return {"auth_type": AuthType.KEY_VALUE, "api_token": x_api_token}
     
     raise HTTPException(
@@ -254,7 +739,113 @@ def verify_key_value(
         detail="Invalid or missing key-value authentication headers",
     )
 
-def verify_any_auth(
+def check_basic_header(value: str) -> Optional[Dict[str, Any]]:
+    """Validate the credentials part of an 'Authorization: Basic ...' header"""
+    try:
+        username, password = base64.b64decode(value, validate=True).decode("utf-8").split(":", 1)
+    except ValueError:
+        return None
+    if CREDENTIALS.check_password(username, password):
+        return {"auth_type": AuthType.BASIC, "user": username}
+    return None
+
+def check_bearer_header(value: str) -> Optional[Dict[str, Any]]:
+    """Validate the token part of an 'Authorization: Bearer ...' header"""
+    if CREDENTIALS.check_token("bearer", value):
+        return {"auth_type": AuthType.BEARER, "token": value}
+    if JWT is not None and looks_like_jwt(value):
+        try:
+            claims = JWT.verify(value)
+        except InvalidToken:
+            return None
+        return {
+            "auth_type": AuthType.BEARER,
+            "subject": claims.get("sub"),
+            "issuer": claims.get("iss"),
+            "expires_at": claims["exp"],
+        }
+    return None
+
+def is_jwt_header(value: str) -> bool:
+    """Whether an Authorization header carries a bearer token for the JWT verifier"""
+    scheme, _, token = value.partition(" ")
+    return JWT is not None and scheme.lower() == "bearer" and looks_like_jwt(token.strip())
+
+# Authorization header schemes, dispatched on the (case-insensitive) prefix
+AUTHORIZATION_SCHEMES = {
+    "basic": check_basic_header,
+    "bearer": check_bearer_header,
+}
+
+def presented_credentials(
+    authorization: Optional[str],
+    x_api_key: Optional[str],
+    x_client_id: Optional[str],
+    x_api_token: Optional[str]
+) -> List[Tuple[str, str]]:
+    """(header, value) of each credential sent, in resolution order: Authorization header, API key, Key-Value"""
+    headers = (
+        ("authorization", authorization),
+        ("x-api-key", x_api_key),
+        ("x-client-id", x_client_id),
+        ("x-api-token", x_api_token),
+    )
+    return [(header, value) for header, value in headers if value]
+
+def check_credential(header: str, value: str) -> Optional[Dict[str, Any]]:
+    """Verify a single credential header"""
+    if header == "authorization":
+        scheme, _, value = value.partition(" ")
+        handler = AUTHORIZATION_SCHEMES.get(scheme.lower())
+        return handler(value.strip()) if handler else None
+    if header == "x-api-key" and CREDENTIALS.check_token("api_key", value):
+        return {"auth_type": AuthType.API_KEY, "api_key": value}
+    if header == "x-client-id" and CREDENTIALS.check_token("client_id", value):
+        return {"auth_type": AuthType.KEY_VALUE, "client_id": value}
+    if header == "x-api-token" and CREDENTIALS.check_token("api_token", value):
+        return {"auth_type": AuthType.KEY_VALUE, "api_token": value}
+    return None
+
+def authenticate_headers(
+    authorization: Optional[str],
+    x_api_key: Optional[str],
+    x_client_id: Optional[str],
+    x_api_token: Optional[str]
+) -> Optional[Dict[str, Any]]:
+    """Resolve credentials in order: Authorization header, API key, Key-Value"""
+    for header, value in presented_credentials(authorization, x_api_key, x_client_id, x_api_token):
+        result = check_credential(header, value)
+        if result:
+            return result
+    return None
+
+async def check_credential_cached(header: str, value: str) -> Optional[Dict[str, Any]]:
+    """
+    check_credential behind the credential caches, keyed per credential.
+    Authorization headers (password hashes, JWT signatures) are checked in the
+    threadpool; token digests are cheap enough for the event loop. JWTs bypass
+    these caches: the verifier caches them itself and drops them as soon as it
+    picks up a rotated key set.
+    """
+    if header == "authorization" and is_jwt_header(value):
+        return await run_in_threadpool(check_credential, header, value)
+    fingerprint = CREDENTIALS.fingerprint(header, value)
+    auth = CREDENTIALS.cache.get(fingerprint)
+    if auth is not None:
+        return auth
+    if CREDENTIALS.failures.get(fingerprint) is not None:
+        return None
+    if header == "authorization":
+        auth = await run_in_threadpool(check_credential, header, value)
+    else:
+        auth = check_credential(header, value)
+    if auth is None:
+        CREDENTIALS.failures.set(fingerprint, True)
+    else:
+        CREDENTIALS.cache.set(fingerprint, auth)
+    return auth
+
+async def verify_any_auth(
     request: Request,
     x_api_key: Optional[str] = Header(None),
     x_client_id: Optional[str] = Header(None),
@@ -263,265 +854,301 @@ def verify_any_auth(
 ) -> Dict[str, Any]:
     """
     Flexible authentication that accepts any valid auth method.
-    Tries different auth methods in order: Basic, Bearer, API Key, Key-Value
+    Tries different auth methods in order: Basic, Bearer, API Key, Key-Value.
+    Each credential is verified once and then served from the credential cache;
+    failures are cached briefly so repeated bad credentials are not rehashed.
+    Sub-requests of /api/v1/batch reuse the identity verified for the batch
+    (and its admission); other requests then pass the token-bucket limiter.
     """
-    # Try Basic Auth
-    if authorization and authorization.startswith("Basic "):
-        try:
-            import base64
-            credentials = base64.b64decode(authorization.split(" ")[1]).decode("utf-8")
-            username, password = credentials.split(":", 1)
-            
-            if username in VALID_BASIC_CREDENTIALS and secrets.compare_digest(
-                password.encode("utf8"),
-                VALID_BASIC_CREDENTIALS[username].encode("utf8")
-            ):
-                return {"auth_type": AuthType.BASIC, "user": username}
-        except Exception:
-            pass
-    
-    # Try Bearer Token
-    if authorization and authorization.startswith("Bearer "):
-        token = authorization.split(" ")[1]
-        if token in VALID_BEARER_TOKENS:
-            return {"auth_type": AuthType.BEARER, "token": token}
+    state = request.scope.setdefault("state", {})
+    batch_auth = state.get(BATCH_AUTH_STATE_KEY)
+    if batch_auth is not None:
+        state[AUTH_METHOD_STATE_KEY] = batch_auth["auth_type"].value
+        return dict(batch_auth)
     
-    # Try API Key
-    if x_api_key and x_api_key in VALID_API_KEYS:
-        return {"auth_type": AuthType.API_KEY, "api_key": x_api_key}
-    
-    # Try Key-Value
-    if x_client_id and x_client_id in VALID_KEY_VALUE_PAIRS.get("client-id", []):
-        return {"auth_type": AuthType.KEY_VALUE, "client_id": x_client_id}
+    auth = None
+    for header, value in presented_credentials(authorization, x_api_key, x_client_id, x_api_token):
+        auth = await check_credential_cached(header, value)
+        if auth is not None:
+            break
     
-    if x_api_token and x_api_token in VALID_KEY_VALUE_PAIRS.get("x-api-token", []):
-        return {"auth_type": AuthType.KEY_VALUE, "api_token": x_api_token}
+    if auth is None:
+        # No valid authentication found
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Authentication required. Supported methods: Basic Auth, Bearer Token, API Key (x-api-key), or Key-Value (x-client-id or x-api-token)",
+            headers={"WWW-Authenticate": "Basic, Bearer, ApiKey"},
+        )
     
-    # No valid authentication found
-    raise HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Authentication required. Supported methods: Basic Auth, Bearer Token, API Key (x-api-key), or Key-Value (x-client-id or x-api-token)",
-        headers={"WWW-Authenticate": "Basic, Bearer, ApiKey"},
-    )
+    # Label request metrics with the resolved auth method
+    state[AUTH_METHOD_STATE_KEY] = auth["auth_type"].value
+    if RATE_LIMIT_ENABLED:
+        await admit_request(request, auth)
+    return dict(auth)
+
+def credential_key(auth: Dict[str, Any]) -> str:
+    """
+    Stable, non-secret identifier for the credential behind a request (same in every worker).
+    JWTs are keyed by subject and issuer, so a renewed token keeps its rate limits and jobs.
+    """
+    principal = "|".join(f"{k}={v}" for k, v in sorted(auth.items()) if k not in ("auth_type", "expires_at"))
+    return hashlib.sha256(f"{auth['auth_type'].value}|{principal}".encode("utf-8")).hexdigest()[:32]
+
+async def admit_request(request: Request, auth: Dict[str, Any]) -> None:
+    """Draw from the credential and route buckets; wait out a short queue or reject with 429"""
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+    if ADMISSION.store.blocking:
+        decision = await run_in_threadpool(ADMISSION.check, route, credential_key(auth))
+    else:
+        decision = ADMISSION.check(route, credential_key(auth))
+    if not decision.admitted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Rate limit exceeded for this credential or route",
+            headers={"Retry-After": retry_after_header(decision)},
+        )
+    if decision.delay > 0:
+        await asyncio.sleep(decision.delay)
+
+# Static payloads are encoded once at import time
+ROOT_BODY = encode_json({
+    "message": "API Data Fetcher Backend - Multi-Auth Support",
+    "version": "2.0.0",
+    "authentication": {
+        "supported_methods": ["Basic Auth", "Bearer Token", "API Key", "Key-Value Headers"],
+        "note": "Most endpoints accept any valid authentication method"
+    },
+    "docs": "/docs",
+    "test_credentials": {
+        "basic_auth": {
+            "username": "demo",
+            "password": "demo123"
+        },
+        "bearer_token": "demo-token-456",
+        "api_key": "demo-api-key",
+        "key_value": {
+            "x-client-id": "client-123",
+            "x-api-token": "secret-token-1"
+        }
+    }
+})
+HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
 
 # Root endpoint
 @app.get("/")
 async def root():
     """Root endpoint - API information"""
-    return {
-        "message": "API Data Fetcher Backend - Multi-Auth Support",
-        "version": "2.0.0",
-        "authentication": {
-            "supported_methods": ["Basic Auth", "Bearer Token", "API Key", "Key-Value Headers"],
-            "note": "Most endpoints accept any valid authentication method"
-        },
-        "docs": "/docs",
-        "test_credentials": {
-            "basic_auth": {
-                "username": "demo",
-                "password": "demo123"
-            },
-            "bearer_token": "demo-token-456",
-            "api_key": "demo-api-key",
-            "key_value": {
-                "x-client-id": "client-123",
-                "x-api-token": "secret-token-1"
-            }
-        }
-    }
+    return Response(content=ROOT_BODY, media_type="application/json")
 
 # Health check endpoint (no auth required)
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat() + "Z"
-    }
+    timestamp = datetime.utcnow().isoformat() + "Z"
+    return Response(content=HEALTH_PREFIX + timestamp.encode("ascii") + b'"}', media_type="application/json")
 
 # API v1 endpoints with flexible authentication
 
 @app.get("/api/v1/data")
-async def get_data(auth: Dict[str, Any] = Depends(verify_any_auth)):
+async def get_data(request: Request, auth: Dict[str, Any] = Depends(verify_any_auth)):
     """Get general data - accepts any valid authentication method"""
-    return {
-        "success": True,
-        "auth_method": auth.get("auth_type"),
-        "data": {
-            "items": MOCK_PRODUCTS[:3],
-            "total": len(MOCK_PRODUCTS[:3])
+    def build():
+        items = PRODUCTS.query(limit=3)
+        return {
+            "success": True,
+            "auth_method": auth.get("auth_type"),
+            "data": {
+                "items": items,
+                "total": len(items)
+            }
         }
-    }
+    
+    return RESPONSE_CACHE.respond(request, auth, (PRODUCTS,), build)
 
 @app.get("/api/v1/products")
 async def get_products(
+    request: Request,
     status: Optional[str] = Query(None, description="Filter by status"),
     category: Optional[str] = Query(None, description="Filter by category"),
+    sort: Optional[str] = Query(None, description="Sort field, prefix with '-' for descending (e.g. -price)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,name,price)"),
     auth: Dict[str, Any] = Depends(verify_any_auth)
 ):
     """Get all products with optional filters - accepts any valid authentication"""
-    products = MOCK_PRODUCTS.copy()
-    
-    # Apply filters
-    if status:
-        products = [p for p in products if p["status"] == status]
-    if category:
-        products = [p for p in products if p["category"] == category]
-    
-    return {
-        "success": True,
-        "auth_method": auth.get("auth_type"),
-        "data": {
-            "items": products,
-            "total": len(products)
-        }
-    }
+    return list_records(
+        request, PRODUCTS, {"status": status, "category": category}, auth,
+        sort=sort, limit=limit, cursor=cursor, fields=fields
+    )
 
 @app.get("/api/v1/orders")
-async def get_orders(auth: Dict[str, Any] = Depends(verify_any_auth)):
-    """Get all orders - accepts any valid authentication"""
-    return {
-        "success": True,
-        "auth_method": auth.get("auth_type"),
-        "data": {
-            "items": MOCK_ORDERS,
-            "total": len(MOCK_ORDERS)
-        }
-    }
+async def get_orders(
+    request: Request,
+    user_id: Optional[str] = Query(None, description="Filter by user id"),
+    status: Optional[str] = Query(None, description="Filter by status"),
+    created_after: Optional[str] = Query(None, description="Only orders created after this ISO 8601 date or datetime"),
+    created_before: Optional[str] = Query(None, description="Only orders created before this ISO 8601 date or datetime"),
+    expand: Optional[str] = Query(None, description="'items' replaces product ids with product records"),
+    sort: Optional[str] = Query(None, description="Sort field, prefix with '-' for descending (e.g. -created_at)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,status,total)"),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """Get orders with optional filters and product expansion - accepts any valid authentication"""
+    if expand not in (None, "", "items"):
+        raise HTTPException(status_code=400, detail="Unsupported expand value. Supported: items")
+    filters = {"user_id": user_id, "status": status}
+    low, high = parse_timestamp("created_after", created_after), parse_timestamp("created_before", created_before)
+    if low or high:
+        filters["created_at"] = Range(low, high)
+    if expand:
+        return list_records(
+            request, ORDERS, filters, auth, sort=sort, limit=limit, cursor=cursor, fields=fields,
+            transform=expand_order_items, related=(PRODUCTS,)
+        )
+    return list_records(request, ORDERS, filters, auth, sort=sort, limit=limit, cursor=cursor, fields=fields)
 
 @app.get("/api/v1/users/{user_id}")
 async def get_user(
+    request: Request,
     user_id: str,
     auth: Dict[str, Any] = Depends(verify_any_auth)
 ):
     """Get user information by ID - accepts any valid authentication"""
-    if user_id not in MOCK_USERS:
+    user = USERS.get(user_id)
+    if user is None:
         raise HTTPException(
             status_code=404,
             detail=f"User with ID '{user_id}' not found"
         )
     
-    return {
+    return RESPONSE_CACHE.respond(request, auth, (USERS,), lambda: {
         "success": True,
         "auth_method": auth.get("auth_type"),
-        "data": MOCK_USERS[user_id]
-    }
+        "data": user
+    })
 
 @app.get("/api/v1/users")
 async def list_users(
+    request: Request,
     status: Optional[str] = Query(None, description="Filter by status"),
     department: Optional[str] = Query(None, description="Filter by department"),
+    sort: Optional[str] = Query(None, description="Sort field, prefix with '-' for descending (e.g. -created_at)"),
+    limit: Optional[int] = Query(None, ge=1, description="Page size; enables cursor pagination"),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next_cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (e.g. id,username,metadata.department)"),
     auth: Dict[str, Any] = Depends(verify_any_auth)
 ):
     """List all users with optional filters - accepts any valid authentication"""
-    users = list(MOCK_USERS.values())
-    
-    # Apply filters
-    if status:
-        users = [u for u in users if u["status"] == status]
-    if department:
-        users = [u for u in users if u["metadata"].get("department") == department]
-    
-    return {
-        "success": True,
-        "auth_method": auth.get("auth_type"),
-        "data": {
-            "users": users,
-            "total": len(users)
+    return list_records(
+        request, USERS, {"status": status, "metadata.department": department}, auth,
+        items_key="users", sort=sort, limit=limit, cursor=cursor, fields=fields
+    )
+
+# Filter fields honoured by search for each collection; others are ignored for that collection
+SEARCH_FILTER_FIELDS = {
+    "products": ("status", "category", "price", "stock"),
+    "users": ("status", "roles", "metadata.department", "metadata.location"),
+}
+SEARCH_FILTERS = FilterCache(SEARCH_FILTER_FIELDS, REPOSITORIES, maxsize=256)
+
+def format_search_result(collection: str, record: Dict[str, Any], score: float) -> Dict[str, Any]:
+    """Shape a ranked record into a search result entry"""
+    if collection == "products":
+        return {
+            "id": f"prod_{record['id']}",
+            "title": record["name"],
+            "description": record["description"],
+            "relevance_score": round(score, 4),
+            "category": record["category"],
+            "url": f"/api/v1/products/{record['id']}"
         }
+    return {
+        "id": f"user_{record['id']}",
+        "title": f"{record['first_name']} {record['last_name']}",
+        "description": f"User: {record['username']} - {record['metadata'].get('department')}",
+        "relevance_score": round(score, 4),
+        "category": "users",
+        "url": f"/api/v1/users/{record['id']}"
     }
 
 @app.get("/api/v1/search")
 async def search_data(
     q: str = Query(..., description="Search query"),
-    filters: Optional[str] = Query(None, description="JSON filters"),
+    filters: Optional[str] = Query(
+        None, description='JSON filters, e.g. {"category": {"in": ["office"]}, "price": {"lt": 50}}'
+    ),
+    offset: int = Query(0, ge=0, description="Number of ranked results to skip"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results to return"),
     auth: Dict[str, Any] = Depends(verify_any_auth)
 ):
     """Search for data with query and optional filters - accepts any valid authentication"""
-    import json
-    
-    # Parse filters if provided
-    filter_dict = {}
+    # Compiled filter plans are cached, so a repeated filter string is neither parsed nor planned again
+    accepts_id = accepts = None
     if filters:
         try:
-            filter_dict = json.loads(filters)
-        except json.JSONDecodeError:
-            raise HTTPException(
-                status_code=400,
-                detail="Invalid JSON in filters parameter"
-            )
-    
-    # Simple search implementation
-    results = []
-    
-    # Search in products
-    for product in MOCK_PRODUCTS:
-        if q.lower() in product["name"].lower() or q.lower() in product["description"].lower():
-            # Apply filters if specified
-            if filter_dict:
-                if "status" in filter_dict and product["status"] != filter_dict["status"]:
-                    continue
-                if "category" in filter_dict and product["category"] != filter_dict["category"]:
-                    continue
-            
-            results.append({
-                "id": f"prod_{product['id']}",
-                "title": product["name"],
-                "description": product["description"],
-                "relevance_score": 0.95 if q.lower() in product["name"].lower() else 0.75,
-                "category": product["category"],
-                "url": f"/api/v1/products/{product['id']}"
-            })
-    
-    # Search in users
-    for user in MOCK_USERS.values():
-        if q.lower() in user["username"].lower() or q.lower() in user["email"].lower():
-            if filter_dict and "status" in filter_dict and user["status"] != filter_dict["status"]:
-                continue
-            
-            results.append({
-                "id": f"user_{user['id']}",
-                "title": f"{user['first_name']} {user['last_name']}",
-                "description": f"User: {user['username']} - {user['metadata']['department']}",
-                "relevance_score": 0.85,
-                "category": "users",
-                "url": f"/api/v1/users/{user['id']}"
-            })
+            plan = SEARCH_FILTERS.get(filters)
+        except FilterError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        accepts_id, accepts = plan.bind(REPOSITORIES)
     
-    # Sort by relevance
-    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    # Rank with BM25 over the inverted index
+    total, page = SEARCH.search(q, predicate=accepts, offset=offset, limit=limit, accepts_id=accepts_id)
+    results = [format_search_result(collection, record, score) for collection, record, score in page]
     
     return {
         "success": True,
         "auth_method": auth.get("auth_type"),
         "data": {
             "results": results,
-            "total_results": len(results),
-            "page": 1,
-            "per_page": 10
+            "total_results": total,
+            "page": offset // limit + 1,
+            "per_page": limit,
+            "offset": offset
         }
     }
 
 @app.get("/api/v1/dashboard")
-async def get_dashboard(auth: Dict[str, Any] = Depends(verify_any_auth)):
+async def get_dashboard(
+    verify: bool = Query(False, description="Recompute metrics from scratch and report any mismatch"),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
     """Get dashboard metrics - accepts any valid authentication"""
+    data = {"metrics": DASHBOARD.metrics()}
+    if verify:
+        data["consistency"] = DASHBOARD.check()
+    
     return {
         "success": True,
         "auth_method": auth.get("auth_type"),
-        "data": {
-            "metrics": {
-                "total_users": len(MOCK_USERS),
-                "active_users": sum(1 for u in MOCK_USERS.values() if u["status"] == "active"),
-                "total_products": len(MOCK_PRODUCTS),
-                "active_products": sum(1 for p in MOCK_PRODUCTS if p["status"] == "active"),
-                "total_orders": len(MOCK_ORDERS),
-                "pending_orders": sum(1 for o in MOCK_ORDERS if o["status"] == "pending"),
-                "completed_orders": sum(1 for o in MOCK_ORDERS if o["status"] == "completed"),
-                "total_revenue": sum(o["total"] for o in MOCK_ORDERS)
-            }
-        }
+        "data": data
     }
 
+@app.get("/api/v1/analytics")
+async def get_analytics(
+    request: Request,
+    metrics: Optional[str] = Query(None, description=f"Comma-separated subset of: {', '.join(ANALYTICS_METRICS)}"),
+    bins: int = Query(10, ge=1, le=100, description="Number of price histogram bins"),
+    top: int = Query(20, ge=1, le=1000, description="Number of users in order_totals_per_user"),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """Get product and order analytics computed over column arrays - accepts any valid authentication"""
+    selected = parse_fields(metrics) or list(ANALYTICS_METRICS)
+    unknown = [name for name in selected if name not in ANALYTICS_METRICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown metrics: {', '.join(unknown)}. Available: {', '.join(ANALYTICS_METRICS)}")
+    
+    def build():
+        return {
+            "success": True,
+            "auth_method": auth.get("auth_type"),
+            "data": ANALYTICS.compute(selected, bins=bins, top=top)
+        }
+    
+    return RESPONSE_CACHE.respond(request, auth, (PRODUCTS, ORDERS), build)
+
 @app.get("/api/v1/metrics")
 async def get_metrics(auth: Dict[str, Any] = Depends(verify_any_auth)):
     """Get system metrics - accepts any valid authentication"""
@@ -531,27 +1158,421 @@ async def get_metrics(auth: Dict[str, Any] = Depends(verify_any_auth)):
         "data": {
             "metrics": {
                 "api_version": "2.0.0",
-                "total_users": len(MOCK_USERS),
-                "total_products": len(MOCK_PRODUCTS),
-                "total_orders": len(MOCK_ORDERS),
+                "total_users": len(USERS),
+                "total_products": len(PRODUCTS),
+                "total_orders": len(ORDERS),
                 "timestamp": datetime.utcnow().isoformat() + "Z"
             }
         }
     }
 
+@app.get("/api/v1/metrics/prometheus")
+async def get_prometheus_metrics(auth: Dict[str, Any] = Depends(verify_any_auth)):
+    """Request metrics in Prometheus text exposition format - accepts any valid authentication"""
+    return Response(content=REQUEST_METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+def resync(message: str) -> Dict[str, Any]:
+    """
+    Answer for a position the change feed can no longer serve: the client
+    re-downloads the collections, then follows the feed from version
+    (changes made while it downloads are delivered again, as upserts).
+    """
+    return {"resync": True, "message": message, "epoch": CHANGES.epoch, "version": CHANGES.version}
+
+def resync_required(message: str) -> HTTPException:
+    return HTTPException(status_code=410, detail=resync(message))
+
+def changes_position(since: Optional[int], epoch: Optional[str], collections: Optional[str]):
+    """Validate a change feed position; returns the collections to include"""
+    names = parse_fields(collections)
+    unknown = [name for name in names or () if name not in REPOSITORIES]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(unknown)}. Available: {', '.join(REPOSITORIES)}")
+    if epoch and epoch != CHANGES.epoch and since:
+        raise resync_required("The change feed was reset since this position")
+    if since and since > CHANGES.version:
+        raise HTTPException(status_code=400, detail=f"since is ahead of the current version {CHANGES.version}")
+    return names
+
+@app.get("/api/v1/changes")
+async def get_changes(
+    since: int = Query(0, ge=0, description="Return changes after this version (0: from the start, if still retained)"),
+    epoch: Optional[str] = Query(None, description="Epoch returned with the previous page; a mismatch means resync"),
+    collections: Optional[str] = Query(None, description="Comma-separated collections (default: all)"),
+    limit: int = Query(CHANGES_PAGE_SIZE, ge=1, le=10000, description="Maximum number of changes to return"),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """Records written after a version: upserts with their current state and delete tombstones - accepts any valid authentication"""
+    names = changes_position(since, epoch, collections)
+    try:
+        changes, version, has_more = CHANGES.since(since, names, limit)
+    except ChangeFeedExpired as e:
+        raise resync_required(str(e))
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": {
+            "epoch": CHANGES.epoch,
+            "since": since,
+            "version": version,
+            "has_more": has_more,
+            "changes": [change.to_dict() for change in changes]
+        }
+    }
+
+@app.get("/api/v1/changes/stream")
+async def stream_changes(
+    since: Optional[int] = Query(None, ge=0, description="Replay changes after this version first (default: only new changes)"),
+    epoch: Optional[str] = Query(None, description="Epoch of the since version; a mismatch means resync"),
+    collections: Optional[str] = Query(None, description="Comma-separated collections (default: all)"),
+    last_event_id: Optional[str] = Header(None),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """Server-Sent Events stream of changes as they are written - accepts any valid authentication"""
+    if last_event_id and last_event_id.isdigit():
+        # Reconnecting EventSource clients resume after the last event they received
+        since = int(last_event_id)
+    names = changes_position(since, epoch, collections)
+    position = CHANGES.version if since is None else since
+    if position < CHANGES.horizon:
+        raise resync_required(f"Changes after version {position} are no longer available")
+
+    async def events():
+        nonlocal position
+        waiter = CHANGES.watch()
+        try:
+            hello = {"epoch": CHANGES.epoch, "version": position}
+            yield b"retry: 3000\n" + format_sse("ready", encode_json(hello))
+            idle = 0.0
+            while True:
+                try:
+                    changes, position, has_more = CHANGES.since(position, names, CHANGES_PAGE_SIZE)
+                except ChangeFeedExpired as e:
+                    yield format_sse("reset", encode_json(resync(str(e))))
+                    return
+                if changes:
+                    yield b"".join(
+                        format_sse("change", encode_json(change.to_dict()), change.version) for change in changes
+                    )
+                    idle = 0.0
+                if has_more:
+                    continue
+                if not await waiter.wait(SSE_POLL_INTERVAL):
+                    # Writes made by other worker processes only arrive when this worker syncs
+                    JOURNAL.sync()
+                    idle += SSE_POLL_INTERVAL
+                    if idle >= SSE_KEEPALIVE_INTERVAL:
+                        yield b": keep-alive\n\n"
+                        idle = 0.0
+        finally:
+            waiter.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @app.post("/api/v1/users")
 async def create_user(
     user_data: UserCreate,
     auth: Dict[str, Any] = Depends(verify_any_auth)
 ):
-    """Create a new user (demo endpoint) - accepts any valid authentication"""
+    """Create a new user - accepts any valid authentication"""
+    async with JOURNAL.write():
+        user = USERS.insert(build_user_record(user_data))
+    await wait_durable()
+    
     return {
         "success": True,
         "auth_method": auth.get("auth_type"),
-        "message": "User created successfully (demo)",
-        "data": user_data.dict()
+        "message": "User created successfully",
+        "data": user
     }
 
+# Routes whose responses are streamed (downloads, long-lived feeds) and cannot be
+# collected into a batch response
+UNBATCHABLE_ROUTES = {
+    "/api/v1/changes/stream",
+    "/api/v1/export/{collection}",
+    "/api/v1/jobs/{job_id}/result",
+}
+BATCH_ITEM_TIMEOUT = float(os.getenv("BATCH_ITEM_TIMEOUT", "30"))
+
+@app.post("/api/v1/batch")
+async def batch_requests(
+    batch: BatchRequest,
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """Run several GET reads in one round-trip - authenticates once, executes concurrently in-process"""
+    for item in batch.requests:
+        if not item.path.startswith("/api/v1/") or item.path.startswith("/api/v1/batch"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported batch path '{item.path}'. Only /api/v1/ read endpoints can be batched"
+            )
+        if route_path(app, split_path(item.path, None)[0]) in UNBATCHABLE_ROUTES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported batch path '{item.path}'. Streaming endpoints cannot be batched"
+            )
+    
+    results = await run_batch(
+        app, [(item.path, item.query) for item in batch.requests], auth, timeout=BATCH_ITEM_TIMEOUT
+    )
+    
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": {
+            "results": results,
+            "total": len(results)
+        }
+    }
+
+@app.post("/api/v1/import/{collection}")
+async def bulk_import(
+    collection: str,
+    request: Request,
+    format: Optional[str] = Query(None, description="ndjson or csv (default: inferred from Content-Type or file name)"),
+    background: bool = Query(False, description="Spool the upload and import it as a background job (202 + job id)"),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """
+    Bulk import users or products from a streamed NDJSON or CSV upload - accepts any valid authentication.
+    The body can be sent raw or as a multipart form file field named 'file'.
+    Rows are validated and indexed in chunks; invalid rows are reported individually.
+    With background=true the upload is only stored, and the import runs as a job.
+    """
+    if collection not in IMPORTERS:
+        raise HTTPException(status_code=400, detail=f"Unknown collection '{collection}'. Importable: {', '.join(IMPORTERS)}")
+    repository, validate, prepare = IMPORTERS[collection]
+    if background and JOBS.full:
+        raise job_queue_full()
+    
+    content_type = request.headers.get("content-type", "")
+    form = None
+    try:
+        if content_type.startswith("multipart/form-data"):
+            # Multipart uploads are spooled to a temporary file by the form parser
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None or isinstance(upload, str):
+                raise HTTPException(status_code=400, detail="Multipart upload must include a 'file' field")
+            content_type = upload.content_type or ""
+            if format is None and (upload.filename or "").lower().endswith(".csv"):
+                format = "csv"
+        
+            async def chunks():
+                while True:
+                    data = await upload.read(65536)
+                    if not data:
+                        break
+                    yield data
+        else:
+            chunks = request.stream
+    
+        if format is None:
+            format = "csv" if "csv" in content_type else "ndjson"
+        if format not in ("ndjson", "csv"):
+            raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    
+        if background:
+            spool_dir = tempfile.mkdtemp(prefix="import-")
+            path = os.path.join(spool_dir, f"upload.{format}")
+            try:
+                with open(path, "wb") as f:
+                    async for data in chunks():
+                        f.write(data)
+                return submit_job("import", {"collection": collection, "format": format, "path": path}, auth, spool_dir)
+            except BaseException:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+                raise
+    
+        lines = iter_lines(chunks())
+        rows = iter_csv_rows(lines) if format == "csv" else iter_ndjson_rows(lines)
+        report = await ingest(rows, repository, prepare, transaction=JOURNAL.write, validate=validate)
+        await wait_durable()
+    
+        return {
+            "success": report.failed == 0,
+            "auth_method": auth.get("auth_type"),
+            "data": dict(collection=collection, format=format, **report.to_dict())
+        }
+    finally:
+        if form is not None:
+            # Closes the spooled upload files
+            await form.close()
+
+# Background jobs
+
+def job_queue_full(detail: str = "Too many jobs are queued") -> HTTPException:
+    return HTTPException(status_code=503, detail=f"{detail}; retry later", headers={"Retry-After": "5"})
+
+def job_links(job: Job) -> Dict[str, str]:
+    return {"status_url": f"/api/v1/jobs/{job.id}", "result_url": f"/api/v1/jobs/{job.id}/result"}
+
+def submit_job(kind: str, params: Dict[str, Any], auth: Dict[str, Any], spool_dir: Optional[str] = None) -> JSONResponse:
+    """Queue a job owned by the caller's credential and acknowledge it with 202 and its status URL"""
+    try:
+        job = JOBS.submit(kind, params, owner=credential_key(auth), spool_dir=spool_dir)
+    except JobQueueFull as e:
+        raise job_queue_full(str(e))
+    links = job_links(job)
+    return FastJSONResponse(
+        status_code=202,
+        content={
+            "success": True,
+            "auth_method": auth.get("auth_type"),
+            "message": f"{kind.capitalize()} job accepted",
+            "data": {**job.to_dict(), **links},
+        },
+        headers={"Location": links["status_url"]},
+    )
+
+def get_own_job(job_id: str, auth: Dict[str, Any]) -> Job:
+    """A job submitted with the same credential; other callers' jobs are reported as not found"""
+    job = JOBS.get(job_id)
+    if job is None or job.owner != credential_key(auth):
+        raise HTTPException(status_code=404, detail=f"Job '{job_id}' not found (it may have expired)")
+    return job
+
+@app.post("/api/v1/jobs", status_code=202)
+async def create_job(
+    job_request: JobRequest,
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """
+    Submit a long-running operation as a background job - accepts any valid authentication.
+    Returns 202 with the job id at once; poll the status URL and fetch the result when it has succeeded.
+    """
+    if job_request.type not in SUBMITTABLE_JOBS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown job type '{job_request.type}'. Submittable: {', '.join(SUBMITTABLE_JOBS)} "
+                   "(imports run in the background with POST /api/v1/import/{collection}?background=true)"
+        )
+    params = dict(job_request.params)
+    # Reject bad parameters now rather than as a failed job
+    export_plan(params.get("collection"), params.get("filters"))
+    if isinstance(params.get("fields"), str):
+        params["fields"] = parse_fields(params["fields"])
+    elif params.get("fields") is not None and not (
+        isinstance(params["fields"], list) and all(isinstance(f, str) for f in params["fields"])
+    ):
+        raise HTTPException(status_code=400, detail="fields must be a list or a comma-separated string of field names")
+    return submit_job(job_request.type, params, auth)
+
+@app.get("/api/v1/jobs")
+async def list_jobs(auth: Dict[str, Any] = Depends(verify_any_auth)):
+    """List the caller's jobs, most recent first - accepts any valid authentication"""
+    jobs = [{**job.to_dict(), **job_links(job)} for job in JOBS.list(owner=credential_key(auth))]
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": {"jobs": jobs, "total": len(jobs)}
+    }
+
+@app.get("/api/v1/jobs/{job_id}")
+async def get_job(job_id: str, auth: Dict[str, Any] = Depends(verify_any_auth)):
+    """Job status and progress - accepts any valid authentication"""
+    job = get_own_job(job_id, auth)
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": {**job.to_dict(), **job_links(job)}
+    }
+
+def result_filename(job: Job, result: FileResult) -> str:
+    """Download name of a job's file result, such as orders-1a2b3c4d.ndjson"""
+    extension = RESULT_EXTENSIONS.get(result.media_type.split(";")[0].strip(), "bin")
+    return f"{job.params.get('collection', job.kind)}-{job.id[:8]}.{extension}"
+
+@app.get("/api/v1/jobs/{job_id}/result")
+async def get_job_result(job_id: str, auth: Dict[str, Any] = Depends(verify_any_auth)):
+    """Result of a succeeded job: a file download (exports) or JSON (imports) - accepts any valid authentication"""
+    job = get_own_job(job_id, auth)
+    if job.status != SUCCEEDED:
+        detail = f"Job is {job.status}; no result available"
+        raise HTTPException(status_code=409, detail=f"{detail}: {job.error}" if job.error else detail)
+    if isinstance(job.result, FileResult):
+        return FileResponse(
+            job.result.path,
+            media_type=job.result.media_type,
+            filename=result_filename(job, job.result),
+        )
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": job.result
+    }
+
+@app.delete("/api/v1/jobs/{job_id}")
+async def cancel_job(job_id: str, auth: Dict[str, Any] = Depends(verify_any_auth)):
+    """Cancel a queued or running job - accepts any valid authentication"""
+    job = JOBS.cancel(get_own_job(job_id, auth).id)
+    # Let a running job reach its checkpoint so the response already shows it cancelled
+    for _ in range(10):
+        if job.finished:
+            break
+        await asyncio.sleep(0)
+    return {
+        "success": True,
+        "auth_method": auth.get("auth_type"),
+        "data": {**job.to_dict(), **job_links(job)}
+    }
+
+# Columnar export (/api/v1/export/{collection}): column -> type name (see columnar_export.arrow_type).
+# Nested fields are flattened into dotted column names.
+EXPORT_SCHEMAS = {
+    "products": {
+        "id": "int64", "name": "string", "category": "category", "status": "category",
+        "price": "float64", "stock": "int64", "description": "string",
+    },
+    "orders": {
+        "id": "string", "user_id": "string", "status": "category", "total": "float64",
+        "items": "list<int64>", "created_at": "timestamp",
+    },
+    "users": {
+        "id": "string", "username": "string", "email": "string", "first_name": "string",
+        "last_name": "string", "status": "category", "created_at": "timestamp", "last_login": "timestamp",
+        "roles": "list<string>", "metadata.department": "category", "metadata.location": "category",
+    },
+}
+# Records per Arrow record batch / Parquet row group
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+@app.get("/api/v1/export/{collection}")
+async def export_collection(
+    collection: str,
+    format: str = Query("arrow", description="arrow (Arrow IPC stream) or parquet"),
+    columns: Optional[str] = Query(None, description="Comma-separated columns to export (default: all)"),
+    filters: Optional[str] = Query(None, description='JSON filter on columns, e.g. {"status":"active","price":{"gte":10}}'),
+    auth: Dict[str, Any] = Depends(verify_any_auth)
+):
+    """
+    Stream a collection as Arrow IPC record batches or Parquet row groups - accepts any valid authentication.
+    Filters are pushed down: index lookups select the candidates, the other conditions are checked
+    column by column, and only the selected columns are read and encoded.
+    """
+    if not export_available():
+        raise HTTPException(status_code=501, detail="Columnar export needs the optional pyarrow package")
+    if collection not in EXPORT_SCHEMAS:
+        raise HTTPException(status_code=400, detail=f"Unknown collection '{collection}'. Exportable: {', '.join(EXPORT_SCHEMAS)}")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'. Supported: {', '.join(EXPORT_FORMATS)}")
+    try:
+        conditions = parse_filter_text(filters) if filters else []
+        export = ColumnarExport(REPOSITORIES[collection], EXPORT_SCHEMAS[collection], parse_fields(columns), conditions)
+    except (FilterError, ExportError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    media_type, extension = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        export.stream(export.ids(), format, EXPORT_BATCH_SIZE),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{collection}.{extension}"'},
+    )
+
 # Specific authentication method endpoints (for testing each type)
 
 @app.get("/api/v1/auth/basic-only")
@@ -571,7 +1592,8 @@ async def bearer_auth_only(auth: Dict[str, str] = Depends(verify_bearer_token)):
         "success": True,
         "auth_method": "bearer",
         "message": "Successfully authenticated with bearer token",
-        "token": auth.get("token")[:10] + "..."
+        # Static tokens are echoed truncated; JWTs are identified by their subject
+        **({"token": auth["token"][:10] + "..."} if "token" in auth else {"subject": auth.get("subject")})
     }
 
 @app.get("/api/v1/auth/apikey-only")
@@ -597,10 +1619,14 @@ async def keyvalue_auth_only(auth: Dict[str, str] = Depends(verify_key_value)):
 # Error handlers
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
-    return {
-        "error": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "error": exc.detail,
+            "status_code": exc.status_code
+        },
+        headers=getattr(exc, "headers", None)
+    )
 
 if __name__ == "__main__":
     import uvicorn
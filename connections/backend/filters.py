@@ -0,0 +1,250 @@
+"""
+Filter expressions for the search endpoint.
+A filter is a JSON object mapping fields (dotted, like metadata.department,
+or as nested objects) to a value to match or to an object of operators:
+
+    {"status": "active", "price": {"gte": 10, "lt": 100},
+     "category": {"in": ["office", "lighting"]}, "metadata": {"department": "Sales"}}
+
+Expressions are compiled once per collection into index lookups (eq and in on
+indexed fields) and predicate functions (everything else), and compiled plans
+are kept in an LRU keyed by the filter string, so a repeated filter skips both
+parsing and planning.
+"""
+import json
+import math
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+from auth_store import TTLCache
+from repository import Repository, get_field
+
+COMPARISONS = {
+    "gt": lambda value, bound: value > bound,
+    "gte": lambda value, bound: value >= bound,
+    "lt": lambda value, bound: value < bound,
+    "lte": lambda value, bound: value <= bound,
+}
+OPERATORS = ("eq", "in", *COMPARISONS)
+
+Predicate = Callable[[Dict[str, Any]], bool]
+
+
+class FilterError(ValueError):
+    """A filter expression that cannot be parsed"""
+
+
+class Condition(NamedTuple):
+    """One operator applied to one field"""
+    field: str
+    op: str
+    value: Any
+
+
+def _equals(actual: Any, expected: Any) -> bool:
+    """Equality, where a list field matches if it contains the value (e.g. roles)"""
+    return actual == expected or (isinstance(actual, list) and expected in actual)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def _in_range(actual: Any, bound: float, compare: Callable[[Any, Any], bool]) -> bool:
+    return _is_number(actual) and compare(actual, bound)
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def parse_filters(data: Any, prefix: str = "") -> List[Condition]:
+    """Flatten a decoded filter object into conditions; raises FilterError if malformed"""
+    if not isinstance(data, dict):
+        raise FilterError("Filters must be a JSON object")
+    conditions = []
+    for name, value in data.items():
+        field = f"{prefix}{name}"
+        if not name:
+            raise FilterError("Filter field names must not be empty")
+        if not isinstance(value, dict):
+            conditions.append(_condition(field, "eq", value))
+        elif value and all(key in OPERATORS for key in value):
+            conditions.extend(_condition(field, op, operand) for op, operand in value.items())
+        elif any(key in OPERATORS for key in value):
+            raise FilterError(f"Filter on '{field}' mixes operators and nested fields")
+        else:
+            conditions.extend(parse_filters(value, f"{field}."))
+    return conditions
+
+
+def parse_filter_text(text: str) -> List[Condition]:
+    """Conditions of a JSON filter string; raises FilterError if it is invalid"""
+    try:
+        data = json.loads(text)
+    except ValueError:
+        raise FilterError("Invalid JSON in filters parameter")
+    return parse_filters(data)
+
+
+def _condition(field: str, op: str, value: Any) -> Condition:
+    if op == "eq":
+        if not _is_scalar(value):
+            raise FilterError(f"Filter on '{field}' must compare against a string, number, boolean or null")
+    elif op == "in":
+        if not isinstance(value, list) or not all(_is_scalar(item) for item in value):
+            raise FilterError(f"'in' filter on '{field}' needs a list of strings, numbers, booleans or nulls")
+        value = tuple(value)
+    elif not _is_number(value):
+        raise FilterError(f"'{op}' filter on '{field}' needs a number")
+    return Condition(field, op, value)
+
+
+def normalize_filters(conditions: Sequence[Condition]) -> str:
+    """Canonical text of a condition list; equivalent filter strings normalize identically"""
+    return json.dumps(sorted(conditions, key=lambda c: (c.field, c.op, repr(c.value))), separators=(",", ":"))
+
+
+def compile_check(condition: Condition) -> Callable[[Any], bool]:
+    """Test of one condition against a field value (rather than a record)"""
+    _, op, value = condition
+    if op == "eq":
+        return lambda actual: _equals(actual, value)
+    if op == "in":
+        return lambda actual: any(_equals(actual, v) for v in value)
+    compare = COMPARISONS[op]
+    return lambda actual: _in_range(actual, value, compare)
+
+
+def compile_predicate(conditions: Sequence[Condition]) -> Optional[Predicate]:
+    """One predicate testing all conditions, or None if there are none"""
+    checks: List[Predicate] = [
+        lambda r, field=condition.field, check=compile_check(condition): check(get_field(r, field))
+        for condition in conditions
+    ]
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    return lambda r: all(check(r) for check in checks)
+
+
+class CollectionFilter:
+    """
+    Compiled filter for one collection: eq/in conditions on indexed fields
+    become index lookups on record ids, the rest a predicate on records.
+    Conditions on fields the collection does not expose are ignored.
+    """
+
+    def __init__(self, conditions: Sequence[Condition], indexed: Sequence[str]):
+        self.lookups: List[Tuple[str, Tuple[Hashable, ...]]] = []
+        residual: List[Condition] = []
+        for condition in conditions:
+            # Indexes skip missing values, so null has to be checked on the record
+            if condition.field in indexed and condition.op in ("eq", "in") and None not in _operands(condition):
+                self.lookups.append((condition.field, _operands(condition)))
+            else:
+                residual.append(condition)
+        self.residual = residual
+        self.predicate = compile_predicate(residual)
+
+    def candidate_ids(self, repository: Repository) -> List[Any]:
+        """Ids passing the index lookups, enumerated from the most selective one"""
+        if not self.lookups:
+            return repository.ids()
+        lookups = sorted(self.lookups, key=lambda lookup: sum(
+            len(repository.lookup(lookup[0], value)) for value in lookup[1]
+        ))
+        (field, values), others = lookups[0], lookups[1:]
+        if len(values) == 1:
+            ids = repository.lookup(field, values[0])
+        else:
+            ids = dict.fromkeys(record_id for value in values for record_id in repository.lookup(field, value))
+        if not others:
+            return list(ids)
+        buckets = [[repository.lookup(field, value) for value in values] for field, values in others]
+        return [
+            record_id for record_id in ids
+            if all(any(record_id in bucket for bucket in alternatives) for alternatives in buckets)
+        ]
+
+    def accepts_id(self, repository: Repository, record_id: Any) -> bool:
+        """Check the index lookups, which need only the record id"""
+        for field, values in self.lookups:
+            if not any(record_id in repository.lookup(field, value) for value in values):
+                return False
+        return True
+
+    def accepts(self, record: Dict[str, Any]) -> bool:
+        return self.predicate is None or self.predicate(record)
+
+
+def _operands(condition: Condition) -> Tuple[Any, ...]:
+    return condition.value if condition.op == "in" else (condition.value,)
+
+
+class FilterPlan:
+    """Compiled filters for every searchable collection"""
+
+    def __init__(self, key: str, collections: Dict[str, CollectionFilter]):
+        self.key = key
+        self.collections = collections
+
+    def bind(self, repositories: Dict[str, Repository]) -> Tuple[
+        Callable[[str, Any], bool], Optional[Callable[[str, Dict[str, Any]], bool]]
+    ]:
+        """(id check, record check) callables for SearchEngine.search; the record check is None if no collection needs one"""
+        collections = self.collections
+
+        def accepts_id(collection: str, record_id: Any) -> bool:
+            compiled = collections.get(collection)
+            return compiled is None or compiled.accepts_id(repositories[collection], record_id)
+
+        def accepts(collection: str, record: Dict[str, Any]) -> bool:
+            compiled = collections.get(collection)
+            return compiled is None or compiled.accepts(record)
+
+        if all(compiled.predicate is None for compiled in collections.values()):
+            return accepts_id, None
+        return accepts_id, accepts
+
+
+class FilterCache:
+    """LRU of compiled plans, keyed by both the raw and the normalized filter string"""
+
+    def __init__(
+        self,
+        fields: Dict[str, Sequence[str]],
+        repositories: Dict[str, Repository],
+        maxsize: int = 256,
+    ):
+        # collection -> fields that may be filtered on
+        self.fields = fields
+        self.repositories = repositories
+        self.plans = TTLCache(maxsize=maxsize, ttl=math.inf)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str) -> FilterPlan:
+        """Compiled plan for a JSON filter string; raises FilterError if it is invalid"""
+        plan = self.plans.get(text)
+        if plan is not None:
+            self.hits += 1
+            return plan
+        self.misses += 1
+        conditions = parse_filter_text(text)
+        key = normalize_filters(conditions)
+        plan = self.plans.get(key)
+        if plan is None:
+            plan = self.compile(key, conditions)
+            self.plans.set(key, plan)
+        self.plans.set(text, plan)
+        return plan
+
+    def compile(self, key: str, conditions: Sequence[Condition]) -> FilterPlan:
+        collections = {}
+        for collection, fields in self.fields.items():
+            applicable = [condition for condition in conditions if condition.field in fields]
+            collections[collection] = CollectionFilter(
+                applicable, self.repositories[collection].indexed_fields
+            )
+        return FilterPlan(key, collections)
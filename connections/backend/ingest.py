@@ -0,0 +1,219 @@
+"""
+Streaming bulk ingestion for the FastAPI backend.
+Parses NDJSON or CSV uploads line by line from an async byte stream,
+validates rows in fixed-size chunks and inserts each valid chunk into a
+repository in one batch, so memory use is bounded by the chunk size rather
+than the upload size.
+"""
+import csv
+import json
+from contextlib import nullcontext
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from repository import Repository
+
+DEFAULT_CHUNK_SIZE = 1000
+# Per-row errors kept in the report; further errors are only counted
+MAX_REPORTED_ERRORS = 1000
+# Longest line (NDJSON) or record (CSV, which may span lines) accepted, in bytes
+MAX_LINE_BYTES = 1 << 20
+TOO_LONG = f"Row exceeds {MAX_LINE_BYTES} bytes"
+
+Row = Tuple[int, Optional[Dict[str, Any]], Optional[str]]
+
+
+def _decode(line: bytes) -> str:
+    return line.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+async def iter_lines(chunks: AsyncIterator[bytes], max_line: int = MAX_LINE_BYTES) -> AsyncIterator[Optional[str]]:
+    """
+    Split an async stream of byte chunks into decoded lines. A line longer
+    than max_line bytes is never buffered whole: its bytes are dropped up to
+    the next newline and None is yielded in its place.
+    """
+    pending = bytearray()
+    oversized = False
+    first = True
+    async for chunk in chunks:
+        if first and chunk:
+            chunk = chunk[3:] if chunk.startswith(b"\xef\xbb\xbf") else chunk
+            first = False
+        *complete, tail = chunk.split(b"\n")
+        for part in complete:
+            if oversized or len(pending) + len(part) > max_line:
+                yield None
+            elif pending:
+                pending += part
+                yield _decode(pending)
+            else:
+                yield _decode(part)
+            pending.clear()
+            oversized = False
+        if oversized:
+            continue
+        if len(pending) + len(tail) > max_line:
+            pending.clear()
+            oversized = True
+        else:
+            pending += tail
+    if oversized:
+        yield None
+    elif pending:
+        yield _decode(pending)
+
+
+async def iter_ndjson_rows(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Row]:
+    """Yield (row number, object, error) for each non-blank NDJSON line"""
+    row_number = 0
+    async for line in lines:
+        if line is None:
+            row_number += 1
+            yield row_number, None, TOO_LONG
+            continue
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            value = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, None, f"Invalid JSON: {e.msg}"
+            continue
+        if not isinstance(value, dict):
+            yield row_number, None, "Each line must be a JSON object"
+            continue
+        yield row_number, value, None
+
+
+async def iter_csv_rows(lines: AsyncIterator[Optional[str]]) -> AsyncIterator[Row]:
+    """
+    Yield (row number, object, error) for each CSV record after the header row.
+    A record longer than MAX_LINE_BYTES (e.g. behind an unterminated quote) is
+    reported as one bad row, and parsing resumes at the next line.
+    """
+    header: Optional[List[str]] = None
+    pending: List[str] = []
+    pending_size = 0
+    quotes = 0
+    row_number = 0
+    async for line in lines:
+        if line is not None:
+            # A record may span several lines while a quoted field is open
+            pending.append(line)
+            pending_size += len(line) + 1
+            quotes += line.count('"')
+        if line is None or pending_size > MAX_LINE_BYTES:
+            pending, pending_size, quotes = [], 0, 0
+            row_number += 1
+            yield row_number, None, TOO_LONG
+            continue
+        if quotes % 2:
+            continue
+        text = "\n".join(pending)
+        pending, pending_size, quotes = [], 0, 0
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row_number += 1
+        if len(values) != len(header):
+            yield row_number, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield row_number, {name: value for name, value in zip(header, values) if value != ""}, None
+    if pending:
+        yield row_number + 1, None, "Unterminated quoted field"
+
+
+def format_validation_error(error: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into a single message"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}" for item in error.errors()
+    )
+
+
+class IngestReport:
+    """Counts and bounded per-row error list for one import"""
+
+    def __init__(self):
+        self.received = 0
+        self.imported = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def error(self, row: int, message: str) -> None:
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "received": self.received,
+            "imported": self.imported,
+            "failed": self.failed,
+            "errors": sorted(self.errors, key=lambda e: e["row"]),
+            "errors_truncated": self.failed > len(self.errors)
+        }
+
+
+async def ingest(
+    rows: AsyncIterator[Row],
+    repository: Repository,
+    prepare: Callable[[Any], Dict[str, Any]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    transaction: Callable[[], AsyncContextManager] = nullcontext,
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None,
+) -> IngestReport:
+    """
+    Validate rows and insert them into the repository chunk by chunk.
+    validate() checks a raw row on its own and prepare() turns the result into the
+    record to store; both raise ValidationError or ValueError for invalid rows, and
+    rows whose primary key already exists are rejected. Each chunk is validated
+    first and then prepared and inserted inside one transaction() context, so the
+    transaction only covers the steps that depend on the repository's contents.
+    """
+    report = IngestReport()
+    chunk: List[Tuple[int, Any]] = []
+
+    def check(row_number: int, step: Callable[[Any], Any], value: Any) -> Any:
+        try:
+            return step(value)
+        except ValidationError as e:
+            report.error(row_number, format_validation_error(e))
+        except ValueError as e:
+            report.error(row_number, str(e))
+        return None
+
+    async def flush() -> None:
+        if validate is not None:
+            validated = [(row_number, check(row_number, validate, raw)) for row_number, raw in chunk]
+            chunk[:] = [(row_number, value) for row_number, value in validated if value is not None]
+        batch: Dict[Any, Dict[str, Any]] = {}
+        async with transaction():
+            for row_number, value in chunk:
+                record = check(row_number, prepare, value)
+                if record is None:
+                    continue
+                record_id = record[repository.key]
+                if record_id in repository or record_id in batch:
+                    report.error(row_number, f"Duplicate {repository.key} '{record_id}'")
+                    continue
+                batch[record_id] = record
+            repository.insert_many(batch.values())
+        report.imported += len(batch)
+        chunk.clear()
+
+    async for row_number, raw, error in rows:
+        report.received += 1
+        if error is not None:
+            report.error(row_number, error)
+            continue
+        chunk.append((row_number, raw))
+        if len(chunk) >= chunk_size:
+            await flush()
+    if chunk:
+        await flush()
+    return report
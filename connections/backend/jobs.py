@@ -0,0 +1,250 @@
+"""
+Background jobs for long-running backend operations.
+A submitted job is queued and acknowledged immediately; a fixed number of
+worker tasks on the event loop run queued jobs one at a time each. Runners
+are coroutines that report progress on their Job and yield at checkpoints,
+which is also where cancellation is delivered. Results are kept in memory,
+or in a spool file for large outputs, until the job expires.
+"""
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class FileResult(NamedTuple):
+    """Job result stored in a spool file rather than in memory"""
+    path: str
+    media_type: str
+    size: int
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are already waiting to run"""
+
+
+class Job:
+    """State, progress and result of one submitted job"""
+
+    def __init__(self, kind: str, params: Dict[str, Any], owner: Optional[str] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.owner = owner
+        self.status = QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.done = 0
+        self.total: Optional[int] = None
+        self.message: Optional[str] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.spool_dir: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def progress(self, done: int, total: Optional[int] = None, message: Optional[str] = None) -> None:
+        """Report units of work done (and the total, once known)"""
+        self.done = done
+        if total is not None:
+            self.total = total
+        if message is not None:
+            self.message = message
+
+    async def checkpoint(self) -> None:
+        """Yield to the event loop between units of work; a pending cancellation is raised here"""
+        await asyncio.sleep(0)
+
+    def spool(self, name: str) -> str:
+        """Path for a result file, removed together with the job"""
+        if self.spool_dir is None:
+            self.spool_dir = tempfile.mkdtemp(prefix=f"job-{self.id[:8]}-")
+        return os.path.join(self.spool_dir, name)
+
+    def discard(self) -> None:
+        if self.spool_dir is not None:
+            shutil.rmtree(self.spool_dir, ignore_errors=True)
+            self.spool_dir = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        percent = None
+        if self.status == SUCCEEDED:
+            percent = 100.0
+        elif self.total:
+            percent = round(min(100.0, 100.0 * self.done / self.total), 1)
+        data = {
+            "id": self.id,
+            "type": self.kind,
+            "status": self.status,
+            "progress": {"done": self.done, "total": self.total, "percent": percent, "message": self.message},
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at),
+            "finished_at": _timestamp(self.finished_at),
+            "error": self.error,
+        }
+        if isinstance(self.result, FileResult):
+            data["result"] = {"media_type": self.result.media_type, "size": self.result.size}
+        return data
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(value))
+
+
+Runner = Callable[[Job], Awaitable[Any]]
+
+
+class JobManager:
+    """Bounded pool of worker tasks running queued jobs, with expiry of finished ones"""
+
+    def __init__(self, workers: int = 2, max_pending: int = 100, retention: float = 3600.0, max_jobs: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        # Finished jobs are dropped after retention seconds, or oldest first beyond max_jobs
+        self.retention = retention
+        self.max_jobs = max_jobs
+        self._runners: Dict[str, Runner] = {}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    @property
+    def kinds(self) -> List[str]:
+        return sorted(self._runners)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def register(self, kind: str, runner: Runner) -> None:
+        self._runners[kind] = runner
+
+    async def start(self) -> None:
+        """Start the worker tasks on the running event loop"""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel running and queued jobs and stop the workers"""
+        for job in list(self._jobs.values()):
+            if not job.finished:
+                self.cancel(job.id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        for job in self._jobs.values():
+            job.discard()
+        self._jobs.clear()
+
+    @property
+    def full(self) -> bool:
+        return self._queue is not None and self._queue.qsize() >= self.max_pending
+
+    def submit(
+        self,
+        kind: str,
+        params: Optional[Dict[str, Any]] = None,
+        owner: Optional[str] = None,
+        spool_dir: Optional[str] = None,
+    ) -> Job:
+        """
+        Queue a job; raises KeyError for an unknown kind and JobQueueFull when the queue is full.
+        spool_dir holds input files prepared for the job and is removed together with it.
+        """
+        if kind not in self._runners:
+            raise KeyError(kind)
+        if self._queue is None:
+            raise RuntimeError("Job workers are not running")
+        self._expire()
+        if self.full:
+            raise JobQueueFull(f"{self._queue.qsize()} jobs are already queued")
+        job = Job(kind, params or {}, owner)
+        job.spool_dir = spool_dir
+        self._jobs[job.id] = job
+        self._queue.put_nowait(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+        return self._jobs.get(job_id)
+
+    def list(self, owner: Optional[str] = None) -> List[Job]:
+        """Known jobs, most recent first"""
+        self._expire()
+        return [job for job in reversed(self._jobs.values()) if owner is None or job.owner == owner]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged"""
+        job = self._jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job._task is None:
+            # Still queued: the worker that picks it up skips it
+            self._finish(job, CANCELLED)
+        else:
+            job._task.cancel()
+            job.message = "Cancellation requested"
+        return job
+
+    async def _work(self) -> None:
+        while True:
+            job = await self._queue.get()
+            if job.finished:
+                continue
+            job.status = RUNNING
+            job.started_at = time.time()
+            job._task = asyncio.create_task(self._runners[job.kind](job))
+            try:
+                await asyncio.wait({job._task})
+            except asyncio.CancelledError:
+                # The worker itself is stopping
+                job._task.cancel()
+                self._finish(job, CANCELLED)
+                raise
+            if job._task.cancelled():
+                self._finish(job, CANCELLED)
+            elif job._task.exception() is not None:
+                error = job._task.exception()
+                self._finish(job, FAILED, error=str(error) or type(error).__name__)
+            else:
+                self._finish(job, SUCCEEDED, result=job._task.result())
+            job._task = None
+
+    def _finish(self, job: Job, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        job.status = status
+        job.finished_at = time.time()
+        job.result = result
+        job.error = error
+        if status != SUCCEEDED:
+            job.discard()
+
+    def _expire(self) -> None:
+        deadline = time.time() - self.retention
+        finished = [job for job in self._jobs.values() if job.finished]
+        excess = len(self._jobs) - self.max_jobs
+        for job in finished:
+            if job.finished_at < deadline or excess > 0:
+                excess -= 1
+                job.discard()
+                del self._jobs[job.id]
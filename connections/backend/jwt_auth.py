@@ -0,0 +1,192 @@
+"""
+Locally verified JWT bearer tokens for the FastAPI backend.
+Tokens are checked with PyJWT against the keys of a local JWKS file (RSA keys
+for RS256/384/512, symmetric keys for HS256/384/512), then their exp, nbf, aud
+and (optionally) iss claims are validated. Verified tokens are cached by
+signature until they expire, so each token's signature is checked once rather
+than on every request. PyJWT (with cryptography for RSA keys) is optional; it
+is only needed when JWT verification is configured.
+"""
+import hmac
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from auth_store import TTLCache
+
+try:
+    import jwt
+except ImportError:  # pragma: no cover - optional dependency
+    jwt = None
+
+RSA_ALGORITHMS = ("RS256", "RS384", "RS512")
+HMAC_ALGORITHMS = ("HS256", "HS384", "HS512")
+ALGORITHMS = (*RSA_ALGORITHMS, *HMAC_ALGORITHMS)
+
+MIN_RSA_BITS = 2048
+MIN_HMAC_BYTES = 32
+
+
+class InvalidToken(Exception):
+    """A bearer token that is malformed, wrongly signed or not (or no longer) valid"""
+
+
+def looks_like_jwt(token: str) -> bool:
+    return token.count(".") == 2
+
+
+class JWK:
+    """Verification key from a JWKS entry"""
+
+    def __init__(self, data: Dict[str, Any]):
+        self.kid: Optional[str] = data.get("kid")
+        self.alg: Optional[str] = data.get("alg")
+        self.kty = data.get("kty")
+        if data.get("use", "sig") != "sig":
+            raise ValueError(f"Key {self.kid!r} is not a signing key")
+        if self.kty == "RSA":
+            self.algorithms = RSA_ALGORITHMS
+        elif self.kty == "oct":
+            self.algorithms = HMAC_ALGORITHMS
+        else:
+            raise ValueError(f"Unsupported key type {self.kty!r}")
+        if self.alg is not None and self.alg not in self.algorithms:
+            raise ValueError(f"Key {self.kid!r} declares unsupported algorithm {self.alg!r}")
+        try:
+            self.key = jwt.PyJWK(data, algorithm=self.alg or self.algorithms[0]).key
+        except (jwt.PyJWKError, jwt.InvalidKeyError, KeyError, ValueError) as e:
+            raise ValueError(f"Invalid key {self.kid!r}: {e}")
+        if self.kty == "RSA" and self.key.key_size < MIN_RSA_BITS:
+            raise ValueError(f"RSA key {self.kid!r} is shorter than {MIN_RSA_BITS} bits")
+        if self.kty == "oct" and len(self.key) < MIN_HMAC_BYTES:
+            raise ValueError(f"Symmetric key {self.kid!r} is shorter than {MIN_HMAC_BYTES} bytes")
+
+    def accepts(self, alg: str) -> bool:
+        """Whether this key may verify alg (never an HMAC with an RSA key or the reverse)"""
+        return alg in self.algorithms and (self.alg is None or self.alg == alg)
+
+
+def load_jwks(path: str) -> List[JWK]:
+    """Signing keys of a JWKS file ({"keys": [...]})"""
+    with open(path) as f:
+        data = json.load(f)
+    keys = [JWK(entry) for entry in data.get("keys", [])]
+    if not keys:
+        raise ValueError(f"No keys in JWKS file {path}")
+    return keys
+
+
+class JWTVerifier:
+    """Verifies JWTs against a local JWKS file, caching verified claims by signature"""
+
+    def __init__(
+        self,
+        jwks_path: str,
+        audience: str,
+        issuer: Optional[str] = None,
+        leeway: float = 30.0,
+        algorithms: Sequence[str] = ALGORITHMS,
+        cache_size: int = 10_000,
+        cache_ttl: float = 3600.0,
+        refresh_interval: float = 60.0,
+    ):
+        if jwt is None:
+            raise RuntimeError("JWT verification requires PyJWT (pip install 'PyJWT[crypto]')")
+        self.jwks_path = jwks_path
+        self.audience = audience
+        self.issuer = issuer
+        # Clock skew tolerated on exp and nbf, in seconds
+        self.leeway = leeway
+        self.algorithms = tuple(algorithms)
+        # Longest a verified token stays cached, even if it expires later
+        self.cache_ttl = cache_ttl
+        # signature segment -> (signed header.payload, claims)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.refresh_interval = refresh_interval
+        self.verifications = 0
+        self._lock = threading.Lock()
+        self._keys: List[JWK] = []
+        self._mtime: Optional[float] = None
+        self._checked_at = 0.0
+        self._reload()
+
+    def _reload(self) -> None:
+        """(Re)read the JWKS file; cached verifications are dropped with the old keys"""
+        mtime = os.path.getmtime(self.jwks_path)
+        self._keys = load_jwks(self.jwks_path)
+        self._mtime = mtime
+        self.cache.clear()
+
+    def _refresh(self) -> None:
+        """Pick up a rotated JWKS file, checking its mtime at most every refresh_interval seconds"""
+        now = time.monotonic()
+        if now - self._checked_at < self.refresh_interval:
+            return
+        with self._lock:
+            if now - self._checked_at < self.refresh_interval:
+                return
+            self._checked_at = now
+            try:
+                if os.path.getmtime(self.jwks_path) != self._mtime:
+                    self._reload()
+            except (OSError, ValueError):
+                # Keep serving with the last good key set
+                pass
+
+    def _key_for(self, header: Dict[str, Any]) -> JWK:
+        alg, kid = header.get("alg"), header.get("kid")
+        if alg not in self.algorithms:
+            raise InvalidToken(f"Algorithm {alg!r} is not accepted")
+        candidates = [key for key in self._keys if key.accepts(alg) and (kid is None or key.kid == kid)]
+        if len(candidates) != 1:
+            raise InvalidToken("No unique key for this token" if candidates else "Unknown signing key")
+        return candidates[0]
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """Return the claims of a valid token; raises InvalidToken otherwise"""
+        self._refresh()
+        if not token.isascii():
+            raise InvalidToken("Malformed token")
+        signing_input, _, signature_segment = token.rpartition(".")
+        cached: Optional[Tuple[str, Dict[str, Any]]] = self.cache.get(signature_segment)
+        if cached is not None and hmac.compare_digest(cached[0], signing_input):
+            claims = cached[1]
+            # The entry expires with the token, but nbf and exp are rechecked against the leeway
+            self._check_times(claims, time.time())
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError:
+            raise InvalidToken("Malformed token")
+        if header.get("crit"):
+            raise InvalidToken("Critical header parameters are not supported")
+        key = self._key_for(header)
+        self.verifications += 1
+        try:
+            claims = jwt.decode(
+                token,
+                key.key,
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={"require": ["exp"]},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidToken(str(e))
+
+        now = time.time()
+        ttl = min(self.cache_ttl, claims["exp"] + self.leeway - now)
+        # Tokens that only become valid later are verified again rather than cached
+        if ttl > 0 and claims.get("nbf", 0) <= now:
+            self.cache.set(signature_segment, (signing_input, claims), ttl=ttl)
+        return claims
+
+    def _check_times(self, claims: Dict[str, Any], now: float) -> None:
+        if now > claims["exp"] + self.leeway:
+            raise InvalidToken("Token has expired")
+        if "nbf" in claims and now + self.leeway < claims["nbf"]:
+            raise InvalidToken("Token is not valid yet")
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Concurrent load generator for the FastAPI backend.
+Drives a weighted mix of endpoints and auth methods (the demo credentials
+from test_multi_auth.py) with an async HTTP client, either against a live
+server or against the app object in-process over ASGI, and reports
+throughput plus p50/p95/p99 latency per endpoint and per auth method.
+
+Usage:
+    python load_test.py [--url http://localhost:8000] [--concurrency 32] [--requests 5000]
+    python load_test.py --duration 30 --endpoint /api/v1/products@3 --endpoint /api/v1/orders?expand=items
+    python load_test.py --auth bearer@4 --auth basic
+
+Without --url the app is imported and served in-process (no network, no
+server needed); rate limiting is then disabled unless --rate-limit is given.
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+
+from benchmark import BLUE, GREEN, NC, YELLOW, print_table
+from test_multi_auth import AUTH_METHODS
+
+# Endpoint mix of test_multi_auth.py plus the list, search and analytics reads
+DEFAULT_ENDPOINTS = [
+    ("/api/v1/data", 1),
+    ("/api/v1/users/123", 1),
+    ("/api/v1/products", 1),
+    ("/api/v1/dashboard", 1),
+    ("/api/v1/orders?expand=items", 1),
+    ("/api/v1/users?limit=20", 1),
+    ("/api/v1/search?q=pro", 1),
+    ("/api/v1/analytics", 1),
+]
+
+
+def parse_weighted(value: str) -> Tuple[str, float]:
+    """Parse 'NAME' or 'NAME@WEIGHT'"""
+    name, _, weight = value.rpartition("@") if "@" in value else (value, "", "1")
+    try:
+        weight = float(weight)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid weight in '{value}'")
+    if weight <= 0:
+        raise argparse.ArgumentTypeError(f"Weight must be positive in '{value}'")
+    return name, weight
+
+
+def auth_kwargs(method: str) -> Dict[str, Any]:
+    """httpx request arguments for one of the AUTH_METHODS"""
+    config = AUTH_METHODS[method]
+    kwargs: Dict[str, Any] = {"headers": config["headers"]}
+    if config["credentials"]:
+        kwargs["auth"] = config["credentials"]
+    return kwargs
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Sample:
+    __slots__ = ("endpoint", "auth", "status", "latency")
+
+    def __init__(self, endpoint: str, auth: str, status: int, latency: float):
+        self.endpoint = endpoint
+        self.auth = auth
+        self.status = status
+        self.latency = latency
+
+
+def summarize(samples: List[Sample], elapsed: float, group: str) -> List[Dict[str, Any]]:
+    """Per-group request count, errors, throughput and latency percentiles (milliseconds)"""
+    groups: Dict[str, List[Sample]] = {}
+    for sample in samples:
+        groups.setdefault(getattr(sample, group), []).append(sample)
+    rows = []
+    for name, members in groups.items():
+        latencies = sorted(s.latency * 1000 for s in members)
+        rows.append({
+            group: name,
+            "requests": len(members),
+            "errors": sum(1 for s in members if not 200 <= s.status < 400),
+            "rps": len(members) / elapsed if elapsed else 0.0,
+            "mean_ms": sum(latencies) / len(latencies),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        })
+    return sorted(rows, key=lambda row: row[group])
+
+
+def print_summary(title: str, rows: List[Dict[str, Any]], group: str) -> None:
+    print_table(
+        title,
+        (group, "requests", "errors", "req/s", "mean ms", "p50 ms", "p95 ms", "p99 ms"),
+        [
+            (row[group], row["requests"], row["errors"], f"{row['rps']:,.0f}", f"{row['mean_ms']:.2f}",
+             f"{row['p50_ms']:.2f}", f"{row['p95_ms']:.2f}", f"{row['p99_ms']:.2f}")
+            for row in rows
+        ],
+    )
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    endpoints: Sequence[Tuple[str, float]],
+    auth_methods: Sequence[Tuple[str, float]],
+    concurrency: int,
+    requests: Optional[int] = None,
+    duration: Optional[float] = None,
+    seed: int = 0,
+) -> Tuple[List[Sample], float]:
+    """
+    Send requests from concurrency tasks until requests have been sent or
+    duration seconds have passed; returns the samples and the elapsed time.
+    """
+    rng = random.Random(seed)
+    paths, path_weights = zip(*endpoints)
+    methods, method_weights = zip(*auth_methods)
+    kwargs = {method: auth_kwargs(method) for method in methods}
+    samples: List[Sample] = []
+    remaining = requests
+    deadline = time.perf_counter() + duration if duration else None
+
+    async def worker():
+        nonlocal remaining
+        while True:
+            if remaining is not None:
+                if remaining <= 0:
+                    return
+                remaining -= 1
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            path = rng.choices(paths, path_weights)[0]
+            method = rng.choices(methods, method_weights)[0]
+            start = time.perf_counter()
+            try:
+                response = await client.get(path, **kwargs[method])
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            samples.append(Sample(path, method, status, time.perf_counter() - start))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - start
+
+
+async def main_async(args) -> int:
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(retries=0)
+        base_url = args.url.rstrip("/")
+        lifespan = None
+    else:
+        from fastapi_app import app
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://testserver"
+        lifespan = app.router.lifespan_context(app)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        if lifespan is not None:
+            await lifespan.__aenter__()
+        try:
+            if args.warmup:
+                await run_load(client, args.endpoint, args.auth, args.concurrency, requests=args.warmup)
+            samples, elapsed = await run_load(
+                client, args.endpoint, args.auth, args.concurrency,
+                requests=None if args.duration else args.requests, duration=args.duration, seed=args.seed,
+            )
+        finally:
+            if lifespan is not None:
+                await lifespan.__aexit__(None, None, None)
+
+    target = args.url or "in-process ASGI app"
+    errors = sum(1 for s in samples if not 200 <= s.status < 400)
+    print(f"{YELLOW}Target: {target}, concurrency {args.concurrency}{NC}")
+    print(f"{GREEN}{len(samples)} requests in {elapsed:.2f}s: {len(samples) / elapsed:,.0f} req/s, {errors} errors{NC}")
+    print_summary("Latency per endpoint", summarize(samples, elapsed, "endpoint"), "endpoint")
+    print_summary("Latency per auth method", summarize(samples, elapsed, "auth"), "auth")
+    if errors:
+        statuses: Dict[int, int] = {}
+        for sample in samples:
+            if not 200 <= sample.status < 400:
+                statuses[sample.status] = statuses.get(sample.status, 0) + 1
+        print(f"\n{BLUE}Error statuses:{NC} " + ", ".join(f"{k or 'connection error'}: {v}" for k, v in sorted(statuses.items())))
+    return 1 if errors and args.fail_on_error else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load generator for the FastAPI backend")
+    parser.add_argument("--url", default=None, help="Live server base URL (default: run the app in-process)")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent in-flight requests")
+    parser.add_argument("--requests", type=int, default=2000, help="Total requests to send")
+    parser.add_argument("--duration", type=float, default=None, help="Run for this many seconds instead of --requests")
+    parser.add_argument("--warmup", type=int, default=100, help="Unmeasured requests sent first")
+    parser.add_argument(
+        "--endpoint", type=parse_weighted, action="append", default=None,
+        help="Path to request, optionally weighted as PATH@WEIGHT; repeat for a mix",
+    )
+    parser.add_argument(
+        "--auth", type=parse_weighted, action="append", default=None,
+        help=f"Auth method ({', '.join(AUTH_METHODS)}), optionally weighted as METHOD@WEIGHT; repeat for a mix",
+    )
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the endpoint and auth mix")
+    parser.add_argument("--rate-limit", action="store_true", help="Keep rate limiting enabled in-process")
+    parser.add_argument("--fail-on-error", action="store_true", help="Exit with status 1 if any request failed")
+    args = parser.parse_args()
+
+    args.endpoint = args.endpoint or DEFAULT_ENDPOINTS
+    args.auth = args.auth or [(method, 1.0) for method in AUTH_METHODS]
+    for method, _ in args.auth:
+        if method not in AUTH_METHODS:
+            parser.error(f"Unknown auth method '{method}'. Choose from: {', '.join(AUTH_METHODS)}")
+    if not args.url and not args.rate_limit:
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+    return asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
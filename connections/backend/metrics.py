@@ -0,0 +1,180 @@
+"""
+Request metrics for the FastAPI backend with Prometheus text exposition.
+An ASGI middleware records per-route latency and response-size histograms,
+status codes and in-flight requests, labelled with the auth method that
+verify_any_auth resolved for the request.
+"""
+import bisect
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Key in the ASGI scope state where verify_any_auth records the resolved auth method
+AUTH_METHOD_STATE_KEY = "auth_method"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0) -> None:
+        self.values[label_values] = self.values.get(label_values, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, lv)} {_format_value(v)}"
+            for lv, v in sorted(self.values.items())
+        ]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+
+    kind = "gauge"
+
+    def dec(self, *label_values: str, amount: float = 1.0) -> None:
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        entry = self.values.get(label_values)
+        if entry is None:
+            entry = self.values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def samples(self) -> List[str]:
+        lines = []
+        names = self.labels + ("le",)
+        for lv, (counts, total, count) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(names, lv + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, lv)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, lv)} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """The backend's HTTP request metrics"""
+
+    def __init__(self, registry: Optional[Registry] = None):
+        self.registry = registry or Registry()
+        self.requests = self.registry.register(Counter(
+            "http_requests_total", "HTTP requests by route, method, status code and auth method",
+            ("route", "method", "status", "auth_method"),
+        ))
+        self.latency = self.registry.register(Histogram(
+            "http_request_duration_seconds", "Request latency in seconds",
+            ("route", "method", "auth_method"), LATENCY_BUCKETS,
+        ))
+        self.response_size = self.registry.register(Histogram(
+            "http_response_size_bytes", "Response body size in bytes",
+            ("route", "method"), SIZE_BUCKETS,
+        ))
+        self.in_flight = self.registry.register(Gauge(
+            "http_requests_in_flight", "Requests currently being processed",
+        ))
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware (keeps streaming responses streaming) that feeds RequestMetrics"""
+
+    def __init__(self, app, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+        response = {"status": 500, "size": 0}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.in_flight.dec()
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            auth_method = state.get(AUTH_METHOD_STATE_KEY, "none")
+            metrics.requests.inc(route, method, str(response["status"]), auth_method)
+            metrics.latency.observe(elapsed, route, method, auth_method)
+            metrics.response_size.observe(response["size"], route, method)
@@ -0,0 +1,208 @@
+"""
+Token-bucket admission control for the FastAPI backend.
+Every authenticated request draws a token from its credential's bucket and
+from its route's bucket. A request that finds a bucket empty may wait in a
+short bounded queue (modelled as token debt, so it needs no extra state);
+beyond that it is rejected with 429 and a Retry-After hint. Bucket state
+lives in memory or, for multi-worker deployments, in a shared SQLite file.
+"""
+import math
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Priority classes: critical routes are never limited, bulk routes get tighter budgets
+PRIORITY_CRITICAL = "critical"
+PRIORITY_DEFAULT = "default"
+PRIORITY_BULK = "bulk"
+
+# Buckets untouched for this long are dropped from the store
+IDLE_BUCKET_TTL = 3600.0
+
+
+class Limit(NamedTuple):
+    """Refill rate (tokens/second), bucket capacity and queue depth (requests)"""
+    rate: float
+    burst: int
+    queue: int = 0
+
+
+class Decision(NamedTuple):
+    """Outcome of an admission check: wait this long before running, or retry later"""
+    admitted: bool
+    delay: float = 0.0
+    retry_after: float = 0.0
+
+
+def refill(tokens: float, updated: float, now: float, limit: Limit) -> float:
+    return min(float(limit.burst), tokens + max(0.0, now - updated) * limit.rate)
+
+
+def take(tokens: float, limit: Limit) -> Tuple[float, Decision]:
+    """Draw one token, queueing on debt up to limit.queue; returns (new tokens, decision)"""
+    if tokens >= 1.0:
+        return tokens - 1.0, Decision(True)
+    if tokens - 1.0 >= -limit.queue:
+        return tokens - 1.0, Decision(True, delay=(1.0 - tokens) / limit.rate)
+    return tokens, Decision(False, retry_after=(1.0 - tokens) / limit.rate)
+
+
+def combine(decisions: Sequence[Decision]) -> Decision:
+    """A request is admitted only if every bucket admits it"""
+    if all(d.admitted for d in decisions):
+        return Decision(True, delay=max((d.delay for d in decisions), default=0.0))
+    return Decision(False, retry_after=max(d.retry_after for d in decisions if not d.admitted))
+
+
+class MemoryBucketStore:
+    """Per-process bucket state"""
+
+    blocking = False
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_prune = time.monotonic()
+
+    def acquire(self, buckets: List[Tuple[str, Limit]], now: Optional[float] = None) -> Decision:
+        """Atomically draw one token from every bucket, or from none of them"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            updates, decisions = [], []
+            for key, limit in buckets:
+                tokens, updated = self._buckets.get(key, (float(limit.burst), now))
+                tokens, decision = take(refill(tokens, updated, now, limit), limit)
+                updates.append((key, tokens))
+                decisions.append(decision)
+            decision = combine(decisions)
+            if decision.admitted:
+                for key, tokens in updates:
+                    self._buckets[key] = (tokens, now)
+            if now - self._last_prune > IDLE_BUCKET_TTL:
+                self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < IDLE_BUCKET_TTL}
+                self._last_prune = now
+        return decision
+
+    def reset(self) -> None:
+        with self._lock:
+            self._buckets.clear()
+
+
+class SQLiteBucketStore:
+    """Bucket state in a SQLite file shared by all worker processes on a host"""
+
+    blocking = True
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._last_prune = time.time()
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, buckets: List[Tuple[str, Limit]], now: Optional[float] = None) -> Decision:
+        """Atomically draw one token from every bucket, or from none of them"""
+        # Wall-clock time, since monotonic clocks are not comparable across processes
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            updates, decisions = [], []
+            for key, limit in buckets:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (float(limit.burst), now)
+                tokens, decision = take(refill(tokens, updated, now, limit), limit)
+                updates.append((key, tokens, now))
+                decisions.append(decision)
+            decision = combine(decisions)
+            if decision.admitted:
+                conn.executemany(
+                    "INSERT INTO buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                    updates,
+                )
+            if now - self._last_prune > IDLE_BUCKET_TTL:
+                # Each worker prunes idle buckets at most once per TTL, inside its write transaction
+                self._last_prune = now
+                self._prune(conn, now)
+            conn.execute("COMMIT")
+        except sqlite3.OperationalError as e:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            if "locked" not in str(e) and "busy" not in str(e):
+                raise
+            # Other workers held the lock for the whole timeout: shed load rather than fail
+            return Decision(False, retry_after=self.timeout)
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        return decision
+
+    @staticmethod
+    def _prune(conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM buckets WHERE updated < ?", (now - IDLE_BUCKET_TTL,))
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """Drop buckets untouched for IDLE_BUCKET_TTL; acquire also does this periodically"""
+        self._prune(self._connect(), time.time() if now is None else now)
+
+    def reset(self) -> None:
+        self._connect().execute("DELETE FROM buckets")
+
+
+class AdmissionController:
+    """Maps a request's route and credential to buckets and decides whether it may run"""
+
+    def __init__(
+        self,
+        store,
+        credential_limits: Dict[str, Optional[Limit]],
+        route_limits: Dict[str, Optional[Limit]],
+        route_classes: Optional[Dict[str, str]] = None,
+    ):
+        self.store = store
+        self.credential_limits = credential_limits
+        self.route_limits = route_limits
+        self.route_classes = route_classes or {}
+
+    def priority(self, route: str) -> str:
+        return self.route_classes.get(route, PRIORITY_DEFAULT)
+
+    def buckets(self, route: str, credential: str) -> List[Tuple[str, Limit]]:
+        """Buckets a request must draw from; empty for critical routes"""
+        priority = self.priority(route)
+        if priority == PRIORITY_CRITICAL:
+            return []
+        buckets = []
+        credential_limit = self.credential_limits.get(priority)
+        if credential_limit is not None:
+            buckets.append((f"cred:{priority}:{credential}", credential_limit))
+        route_limit = self.route_limits.get(route, self.route_limits.get(priority))
+        if route_limit is not None:
+            buckets.append((f"route:{route}", route_limit))
+        return buckets
+
+    def check(self, route: str, credential: str) -> Decision:
+        buckets = self.buckets(route, credential)
+        if not buckets:
+            return Decision(True)
+        return self.store.acquire(buckets)
+
+
+def retry_after_header(decision: Decision) -> str:
+    """Retry-After takes whole seconds; round up so clients never retry too early"""
+    return str(max(1, math.ceil(decision.retry_after)))
@@ -0,0 +1,489 @@
+"""
+In-memory repository layer for the FastAPI backend.
+Stores records by primary key and maintains secondary hash indexes so that
+filtered reads cost O(matches) instead of a scan of the whole collection.
+In compact mode records are kept as encoded rows (see compact.py) and only
+turned back into dicts when they are returned.
+"""
+import base64
+import bisect
+import heapq
+import itertools
+import json
+from itertools import islice
+from operator import itemgetter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from compact import RecordCodec
+
+_MISSING = object()
+
+# Listener signature: (event, record_id, old_record, new_record) where event is
+# "insert", "update" or "delete"; old_record is None on insert, new_record is None on delete
+Listener = Callable[[str, Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None]
+
+
+class Range(NamedTuple):
+    """Filter value matching low < value < high; a bound of None is unbounded"""
+    low: Any = None
+    high: Any = None
+
+    def matches(self, value: Any) -> bool:
+        if value is None:
+            return False
+        return (self.low is None or value > self.low) and (self.high is None or value < self.high)
+
+
+def _matches(value: Any, expected: Any) -> bool:
+    if isinstance(expected, Range):
+        return expected.matches(value)
+    return value == expected
+
+
+def get_field(record: Dict[str, Any], path: str, default: Any = None) -> Any:
+    """Read a possibly nested field using dotted notation (e.g. metadata.department)"""
+    value: Any = record
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return default
+        value = value.get(part, _MISSING)
+        if value is _MISSING:
+            return default
+    return value
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """Split a sort expression like '-price' into (field, descending)"""
+    if sort.startswith("-"):
+        return sort[1:], True
+    return sort.lstrip("+"), False
+
+
+def project(record: Dict[str, Any], fields: Sequence[str]) -> Dict[str, Any]:
+    """Return a copy of a record reduced to the given (possibly dotted) fields"""
+    result: Dict[str, Any] = {}
+    for path in fields:
+        value = get_field(record, path, _MISSING)
+        if value is _MISSING:
+            continue
+        target = result
+        parts = path.split(".")
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = value
+    return result
+
+
+def encode_cursor(sort: Optional[str], position: Sequence[Any]) -> str:
+    """Encode a keyset position into an opaque, URL-safe cursor string"""
+    payload = json.dumps({"s": sort or "", "k": list(position)}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: Optional[str]) -> Tuple[Any, ...]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if invalid or for another sort"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_sort, position = payload["s"], tuple(payload["k"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != (sort or ""):
+        raise ValueError("Cursor was issued for a different sort order")
+    return position
+
+
+class Repository:
+    """Primary-key store with secondary hash and sorted indexes and top-k sorted reads"""
+
+    def __init__(
+        self,
+        name: str,
+        key: str = "id",
+        indexes: Sequence[str] = (),
+        sortable: Sequence[str] = (),
+        ranges: Sequence[str] = (),
+        compact: bool = False,
+        shared: Sequence[str] = (),
+    ):
+        self.name = name
+        self.key = key
+        self.sortable = tuple(sortable)
+        # Stored records: the dicts themselves, or encoded rows in compact mode
+        self._records: Dict[Any, Any] = {}
+        # Values of indexed and shared fields are interned in compact mode
+        self._codec = RecordCodec((*indexes, *shared)) if compact else None
+        self._field = self._codec.field if compact else get_field
+        self._id_of = (lambda row: self._codec.field(row, key)) if compact else itemgetter(key)
+        # field -> value -> ordered set of primary keys (dict keys keep insertion order)
+        self._indexes: Dict[str, Dict[Any, Dict[Any, None]]] = {field: {} for field in indexes}
+        # field -> sorted list of (value, seq, primary key), answering Range filters by bisection;
+        # seq is unique, so comparisons never reach the primary key
+        self._ranges: Dict[str, List[Tuple[Any, int, Any]]] = {field: [] for field in ranges}
+        self._listeners: List[Listener] = []
+        # Incremented on every write; lets caches detect stale data without diffing
+        self.version = 0
+        # Insertion sequence numbers give every record a stable position for keyset pagination
+        self._seq: Dict[Any, int] = {}
+        self._seq_counter = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __contains__(self, record_id: Any) -> bool:
+        return record_id in self._records
+
+    @property
+    def indexed_fields(self) -> Tuple[str, ...]:
+        return tuple(self._indexes)
+
+    @property
+    def compact(self) -> bool:
+        return self._codec is not None
+
+    def _materialize(self, rows: Iterable[Any]) -> List[Dict[str, Any]]:
+        if self._codec is None:
+            return rows if isinstance(rows, list) else list(rows)
+        decode = self._codec.decode
+        return [decode(row) for row in rows]
+
+    # Reads
+
+    def get(self, record_id: Any) -> Optional[Dict[str, Any]]:
+        """Return a record by primary key, or None"""
+        row = self._records.get(record_id)
+        if self._codec is None or row is None:
+            return row
+        return self._codec.decode(row)
+
+    def rows(self) -> List[Any]:
+        """
+        Point-in-time copy of the stored rows, one reference per record. Stored
+        rows are never modified in place (updates replace them), so the copy
+        stays consistent while writes continue; decode it with materialize().
+        """
+        return list(self._records.values())
+
+    def materialize(self, rows: List[Any]) -> List[Dict[str, Any]]:
+        """Records of rows taken with rows()"""
+        return self._materialize(rows)
+
+    def all(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over all records in insertion order"""
+        if self._codec is None:
+            return iter(self._records.values())
+        return map(self._codec.decode, self._records.values())
+
+    def count(self, filters: Optional[Dict[str, Any]] = None) -> int:
+        """Count records matching equality and Range filters"""
+        filters = _active(filters)
+        if not filters:
+            return len(self._records)
+        if len(filters) == 1:
+            ((field, value),) = filters.items()
+            if isinstance(value, Range) and field in self._ranges:
+                start, stop = self._range_bounds(field, value)
+                return max(0, stop - start)
+            if field in self._indexes and not isinstance(value, Range):
+                return len(self._indexes[field].get(value, ()))
+        return sum(1 for _ in self._find(filters))
+
+    def _range_bounds(self, field: str, value: Range) -> Tuple[int, int]:
+        """Slice of the sorted index strictly inside the range"""
+        entries = self._ranges[field]
+        start = 0 if value.low is None else bisect.bisect_right(entries, (value.low, float("inf")))
+        stop = len(entries) if value.high is None else bisect.bisect_left(entries, (value.high, -1))
+        return start, stop
+
+    def _bucket(self, field: str, value: Any) -> Optional[Dict[Any, None]]:
+        """Index bucket (ordered set of primary keys) for a filter, or None if the field has no usable index"""
+        if isinstance(value, Range):
+            if field not in self._ranges:
+                return None
+            start, stop = self._range_bounds(field, value)
+            return {record_id: None for _, _, record_id in self._ranges[field][start:stop]}
+        if field in self._indexes:
+            return self._indexes[field].get(value, {})
+        return None
+
+    def lookup(self, field: str, value: Any) -> Dict[Any, None]:
+        """Primary keys whose indexed field equals value, as a live read-only ordered set"""
+        return self._indexes[field].get(value, {})
+
+    def find(self, filters: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yield records matching all filters: plain values match by equality,
+        Range values by interval. Indexed fields are resolved by intersecting
+        hash buckets and sorted-index slices, starting from the smallest one;
+        remaining fields are checked on the candidates only.
+        """
+        if self._codec is None:
+            return self._find(filters)
+        return map(self._codec.decode, self._find(filters))
+
+    def ids(self, filters: Optional[Dict[str, Any]] = None) -> List[Any]:
+        """Primary keys of matching records in insertion order, without materializing them"""
+        ids = [self._id_of(row) for row in self._find(filters)]
+        if _active(filters):
+            # Index buckets keep the order records entered them, not the order they were inserted
+            ids.sort(key=self._seq.__getitem__)
+        return ids
+
+    def columns(self, ids: Iterable[Any], fields: Sequence[str]) -> Dict[str, List[Any]]:
+        """Field values of the given records, column by column, read without materializing them; missing ids are skipped"""
+        rows = [row for row in map(self._records.get, ids) if row is not None]
+        columns = {}
+        for field in fields:
+            if self._codec is None and "." not in field:
+                # Plain dict rows: skip get_field's path walk for top-level fields
+                columns[field] = [row.get(field) for row in rows]
+            else:
+                read = self._field
+                columns[field] = [read(row, field) for row in rows]
+        return columns
+
+    def _find(self, filters: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        """Stored records matching filters"""
+        filters = _active(filters)
+        if not filters:
+            yield from self._records.values()
+            return
+
+        buckets = []
+        residual = []
+        for field, value in filters.items():
+            bucket = self._bucket(field, value)
+            if bucket is not None:
+                buckets.append(bucket)
+            else:
+                residual.append((field, value))
+
+        read = self._field
+        if buckets:
+            buckets.sort(key=len)
+            smallest, others = buckets[0], buckets[1:]
+            for record_id in smallest:
+                if all(record_id in bucket for bucket in others):
+                    record = self._records[record_id]
+                    if all(_matches(read(record, f), v) for f, v in residual):
+                        yield record
+        else:
+            for record in self._records.values():
+                if all(_matches(read(record, f), v) for f, v in residual):
+                    yield record
+
+    def query(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Return matching records, optionally sorted and truncated.
+        With both sort and limit set only the top-k records are kept (heap selection).
+        """
+        matches = self._find(filters)
+        if not sort:
+            return self._materialize(matches if limit is None else islice(matches, limit))
+
+        key, descending = self.sort_key(sort)
+        if limit is None:
+            return self._materialize(sorted(matches, key=key, reverse=descending))
+        if descending:
+            return self._materialize(heapq.nlargest(limit, matches, key=key))
+        return self._materialize(heapq.nsmallest(limit, matches, key=key))
+
+    def page(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        sort: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Sequence[Any]] = None,
+    ) -> Tuple[List[Dict[str, Any]], Optional[Tuple[Any, ...]]]:
+        """
+        Keyset pagination over matching records.
+        Records are ordered by the sort field with the insertion sequence as tie-breaker
+        (or by insertion sequence alone). Returns (records, position) where position is
+        the key of the last record if more records follow, otherwise None.
+        """
+        key, descending = self._position_key(sort)
+        matches = self._find(filters)
+        if after is not None:
+            after = tuple(after)
+            try:
+                if descending:
+                    matches = [r for r in matches if key(r) < after]
+                else:
+                    matches = [r for r in matches if key(r) > after]
+            except TypeError:
+                raise ValueError("Invalid cursor")
+
+        if limit is None:
+            return self._materialize(sorted(matches, key=key, reverse=descending)), None
+
+        select = heapq.nlargest if descending else heapq.nsmallest
+        records = select(limit + 1, matches, key=key)
+        if len(records) > limit:
+            records = records[:limit]
+            return self._materialize(records), key(records[-1])
+        return self._materialize(records), None
+
+    def _position_key(self, sort: Optional[str]) -> Tuple[Callable[[Any], Tuple[Any, ...]], bool]:
+        seq, id_of = self._seq, self._id_of
+        if not sort:
+            return (lambda r: (seq[id_of(r)],)), False
+        field_key, descending = self.sort_key(sort)
+        return (lambda r: field_key(r) + (seq[id_of(r)],)), descending
+
+    def sort_key(self, sort: str) -> Tuple[Callable[[Any], Any], bool]:
+        """Build a key function over stored records for a sort expression; missing values always sort last"""
+        field, descending = parse_sort(sort)
+        if field not in self.sortable:
+            raise ValueError(
+                f"Cannot sort {self.name} by '{field}'. Sortable fields: {', '.join(self.sortable)}"
+            )
+        read = self._field
+        if descending:
+            return (lambda r: (read(r, field) is not None, read(r, field))), True
+        return (lambda r: (read(r, field) is None, read(r, field))), False
+
+    # Writes
+
+    def subscribe(self, listener: Listener) -> None:
+        """Register a callback invoked after every insert, update and delete"""
+        self._listeners.append(listener)
+
+    def _notify(self, event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        self.version += 1
+        for listener in self._listeners:
+            listener(event, record_id, old, new)
+
+    def insert(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        """Add a new record; raises KeyError if the primary key already exists"""
+        record_id = record[self.key]
+        if record_id in self._records:
+            raise KeyError(f"{self.name} record '{record_id}' already exists")
+        self._records[record_id] = record if self._codec is None else self._codec.encode(record)
+        self._seq[record_id] = next(self._seq_counter)
+        self._index_add(record_id, record)
+        self._notify("insert", record_id, None, record)
+        return record
+
+    def load(self, records: Iterable[Dict[str, Any]]) -> None:
+        """Bulk insert records"""
+        self.insert_many(records)
+
+    def insert_many(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert a batch of new records, updating each index bucket once per distinct value.
+        The whole batch is rejected with KeyError if any primary key already exists.
+        """
+        batch = list(records)
+        ids = [record[self.key] for record in batch]
+        if len(set(ids)) != len(ids) or any(record_id in self._records for record_id in ids):
+            raise KeyError(f"Batch contains duplicate or existing {self.name} keys")
+
+        encode = self._codec.encode if self._codec is not None else None
+        for record_id, record in zip(ids, batch):
+            self._records[record_id] = record if encode is None else encode(record)
+            self._seq[record_id] = next(self._seq_counter)
+        for field, index in self._indexes.items():
+            grouped: Dict[Any, List[Any]] = {}
+            for record_id, record in zip(ids, batch):
+                value = get_field(record, field)
+                if value is not None:
+                    grouped.setdefault(value, []).append(record_id)
+            for value, value_ids in grouped.items():
+                index.setdefault(value, {}).update(dict.fromkeys(value_ids))
+        for field, entries in self._ranges.items():
+            added = sorted(
+                (value, self._seq[record_id], record_id)
+                for record_id, record in zip(ids, batch)
+                if (value := get_field(record, field)) is not None
+            )
+            # Batches often arrive in value order (e.g. timestamps) and can just be appended;
+            # otherwise one merge sort beats one insort per record
+            in_order = not entries or not added or entries[-1] < added[0]
+            entries.extend(added)
+            if not in_order:
+                entries.sort()
+        for record_id, record in zip(ids, batch):
+            self._notify("insert", record_id, None, record)
+        return len(batch)
+
+    def update(self, record_id: Any, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply top-level field changes to a record and re-index it"""
+        if self._codec is None:
+            # Copy on write: the previous dict is left as it was, for readers still holding it
+            old = self._records[record_id]
+            record = {**old, **changes}
+            self._records[record_id] = record
+        else:
+            old = self._codec.decode(self._records[record_id])
+            record = {**old, **changes}
+            self._records[record_id] = self._codec.encode(record)
+        # Only move index entries whose value changed so buckets keep their order
+        for field, index in self._indexes.items():
+            before, after = get_field(old, field), get_field(record, field)
+            if before != after:
+                self._index_discard(index, before, record_id)
+                if after is not None:
+                    index.setdefault(after, {})[record_id] = None
+        seq = self._seq[record_id]
+        for field, entries in self._ranges.items():
+            before, after = get_field(old, field), get_field(record, field)
+            if before != after:
+                self._range_discard(entries, before, seq)
+                if after is not None:
+                    bisect.insort(entries, (after, seq, record_id))
+        self._notify("update", record_id, old, record)
+        return record
+
+    def delete(self, record_id: Any) -> Dict[str, Any]:
+        """Remove a record by primary key"""
+        record = self._records.pop(record_id)
+        if self._codec is not None:
+            record = self._codec.decode(record)
+        self._index_remove(record_id, record)
+        seq = self._seq.pop(record_id)
+        for field, entries in self._ranges.items():
+            self._range_discard(entries, get_field(record, field), seq)
+        self._notify("delete", record_id, record, None)
+        return record
+
+    def _index_add(self, record_id: Any, record: Dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            value = get_field(record, field)
+            if value is not None:
+                index.setdefault(value, {})[record_id] = None
+        for field, entries in self._ranges.items():
+            value = get_field(record, field)
+            if value is not None:
+                bisect.insort(entries, (value, self._seq[record_id], record_id))
+
+    def _index_remove(self, record_id: Any, record: Dict[str, Any]) -> None:
+        for field, index in self._indexes.items():
+            self._index_discard(index, get_field(record, field), record_id)
+
+    @staticmethod
+    def _range_discard(entries: List[Tuple[Any, int, Any]], value: Any, seq: int) -> None:
+        if value is None:
+            return
+        i = bisect.bisect_left(entries, (value, seq))
+        if i < len(entries) and entries[i][1] == seq:
+            del entries[i]
+
+    @staticmethod
+    def _index_discard(index: Dict[Any, Dict[Any, None]], value: Any, record_id: Any) -> None:
+        bucket = index.get(value)
+        if bucket is not None:
+            bucket.pop(record_id, None)
+            if not bucket:
+                del index[value]
+
+
+def _active(filters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Drop filters whose value is None (i.e. query parameters that were not supplied)"""
+    if not filters:
+        return {}
+    return {field: value for field, value in filters.items() if value is not None}
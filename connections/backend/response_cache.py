@@ -0,0 +1,80 @@
+"""
+Serialized-response cache with strong ETags for the FastAPI backend.
+Entries hold already-encoded JSON bytes keyed on (route, normalized query,
+auth method, dataset version), so repeated polls skip both the query and
+the serialization, and matching If-None-Match requests get a bodiless 304.
+The cache is bounded by total body size as well as entry count; bodies too
+large to be worth keeping are served with an ETag but not cached.
+"""
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Sequence, Tuple
+
+from fastapi import Request, Response
+
+from auth_store import TTLCache
+from encoding import encode_json
+from repository import Repository
+
+
+def make_etag(body: bytes) -> str:
+    """Strong ETag derived from the exact response bytes"""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires)"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """LRU of encoded response bodies and their ETags, bounded by count and total bytes"""
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600.0,
+        encoder: Callable[[Any], bytes] = encode_json,
+        max_bytes: int = 64 * 1024 * 1024,
+        max_entry_bytes: int = 4 * 1024 * 1024,
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl, maxweight=max_bytes, weigh=lambda entry: len(entry[0]))
+        self.encoder = encoder
+        # Larger bodies are rebuilt on every request rather than crowding out many small ones
+        self.max_entry_bytes = max_entry_bytes
+
+    def key(self, request: Request, auth: Dict[str, Any], repositories: Sequence[Repository]) -> Hashable:
+        """Cache key: route, normalized query, auth method and the version of every source repository"""
+        query = tuple(sorted(request.query_params.multi_items()))
+        versions = tuple(repository.version for repository in repositories)
+        return (request.url.path, query, str(auth.get("auth_type")), versions)
+
+    def respond(
+        self,
+        request: Request,
+        auth: Dict[str, Any],
+        repositories: Sequence[Repository],
+        build: Callable[[], Any],
+    ) -> Response:
+        """Serve a cached body (or 304) for this request, building and encoding it on a miss"""
+        key = self.key(request, auth, repositories)
+        entry: Tuple[bytes, str] = self.entries.get(key)
+        if entry is None:
+            body = self.encoder(build())
+            entry = (body, make_etag(body))
+            if len(body) <= self.max_entry_bytes:
+                self.entries.set(key, entry)
+
+        body, etag = entry
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
@@ -10,6 +10,7 @@ PORT=8000
 HOST="0.0.0.0"
 APP_FILE="fastapi_app.py"
 LOG_FILE="$SCRIPT_DIR/fastapi.log"
+STATE_DIR="${STATE_DIR:-/tmp/fastapi-backend-state}"
 
 # Color codes for output
 GREEN='\033[0;32m'
@@ -28,6 +29,7 @@ usage() {
     echo "  start               Start the FastAPI server"
     echo "  start-dev           Start in development mode with auto-reload"
     echo "  start-background    Start server in background"
+    echo "  start-workers N     Start N worker processes sharing state (default: CPU count)"
     echo "  stop                Stop the server running in background"
     echo "  status              Check if server is running"
     echo "  test-auth           Test basic authentication"
@@ -36,6 +38,7 @@ usage() {
     echo ""
     echo "Examples:"
     echo "  $0 start-dev        # Start with auto-reload for development"
+    echo "  $0 start-workers 4  # Start 4 workers behind one port"
     echo "  $0 test-auth        # Test authentication endpoints"
     exit 1
 }
@@ -115,6 +118,26 @@ start_background() {
     fi
 }
 
+# Function to start several worker processes sharing state
+start_workers() {
+    local workers=${1:-$(nproc 2>/dev/null || echo 1)}
+    echo -e "${BLUE}Starting FastAPI server with $workers workers...${NC}"
+    
+    if check_port; then
+        echo -e "${YELLOW}⚠ Port $PORT is already in use${NC}"
+        echo -e "${YELLOW}Run '$0 stop' to stop the existing server${NC}"
+        exit 1
+    fi
+    
+    echo -e "${GREEN}Starting server at http://$HOST:$PORT${NC}"
+    echo -e "${GREEN}Writes are shared between workers through $STATE_DIR${NC}"
+    echo -e "${YELLOW}Press Ctrl+C to stop${NC}"
+    echo ""
+    
+    cd "$SCRIPT_DIR"
+    python3 serve_workers.py --workers "$workers" --host $HOST --port $PORT --state-dir "$STATE_DIR"
+}
+
 # Function to stop server
 stop_server() {
     echo -e "${BLUE}Stopping FastAPI server...${NC}"
@@ -228,6 +251,10 @@ case "$1" in
         start_background
         ;;
         
+    start-workers)
+        start_workers "$2"
+        ;;
+        
     stop)
         stop_server
         ;;
@@ -0,0 +1,173 @@
+"""
+BM25 full-text search for the FastAPI backend.
+Maintains a tokenized inverted index over repository records and keeps it in
+sync incrementally through repository write notifications.
+"""
+import heapq
+import math
+import re
+from operator import itemgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from repository import Repository, get_field
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+DocKey = Tuple[str, Hashable]
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase and split text into alphanumeric tokens"""
+    if not text:
+        return []
+    return TOKEN_RE.findall(str(text).lower())
+
+
+class BM25Index:
+    """Inverted index with Okapi BM25 scoring and incremental add/remove"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        # term -> doc key -> weighted term frequency
+        self._postings: Dict[str, Dict[DocKey, float]] = {}
+        # doc key -> term -> weighted term frequency (needed to remove a document)
+        self._doc_terms: Dict[DocKey, Dict[str, float]] = {}
+        self._doc_lengths: Dict[DocKey, float] = {}
+        self._total_length = 0.0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    def add(self, doc_key: DocKey, fields: Iterable[Tuple[Optional[str], float]]) -> None:
+        """Index a document from (text, weight) pairs, replacing any previous version"""
+        if doc_key in self._doc_terms:
+            self.remove(doc_key)
+
+        terms: Dict[str, float] = {}
+        length = 0.0
+        for text, weight in fields:
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0.0) + weight
+                length += weight
+
+        self._doc_terms[doc_key] = terms
+        self._doc_lengths[doc_key] = length
+        self._total_length += length
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[doc_key] = tf
+
+    def remove(self, doc_key: DocKey) -> None:
+        """Drop a document from the index"""
+        terms = self._doc_terms.pop(doc_key, None)
+        if terms is None:
+            return
+        self._total_length -= self._doc_lengths.pop(doc_key)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[doc_key]
+            if not postings:
+                del self._postings[term]
+
+    def score(self, query: str) -> Dict[DocKey, float]:
+        """Return BM25 scores for every document containing at least one query term"""
+        n_docs = len(self._doc_lengths)
+        if not n_docs:
+            return {}
+        avg_length = self._total_length / n_docs or 1.0
+        k1, b = self.k1, self.b
+
+        scores: Dict[DocKey, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            df = len(postings)
+            idf = math.log(1.0 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_key, tf in postings.items():
+                norm = k1 * (1.0 - b + b * self._doc_lengths[doc_key] / avg_length)
+                scores[doc_key] = scores.get(doc_key, 0.0) + idf * tf * (k1 + 1.0) / (tf + norm)
+        return scores
+
+
+class SearchEngine:
+    """BM25 search across several repositories with per-collection field weights"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.index = BM25Index(k1=k1, b=b)
+        self._collections: Dict[str, Tuple[Repository, Dict[str, float]]] = {}
+
+    def register(self, collection: str, repository: Repository, fields: Dict[str, float]) -> None:
+        """Index every record of a repository and follow its subsequent writes"""
+        self._collections[collection] = (repository, fields)
+        for record in repository.all():
+            self._index_record(collection, record[repository.key], record)
+
+        def on_write(event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+            if new is None:
+                self.index.remove((collection, record_id))
+            else:
+                self._index_record(collection, record_id, new)
+
+        repository.subscribe(on_write)
+
+    def _index_record(self, collection: str, record_id: Any, record: Dict[str, Any]) -> None:
+        _, fields = self._collections[collection]
+        self.index.add(
+            (collection, record_id),
+            ((get_field(record, field), weight) for field, weight in fields.items()),
+        )
+
+    def search(
+        self,
+        query: str,
+        predicate: Optional[Callable[[str, Dict[str, Any]], bool]] = None,
+        offset: int = 0,
+        limit: int = 10,
+        accepts_id: Optional[Callable[[str, Any], bool]] = None,
+    ) -> Tuple[int, List[Tuple[str, Dict[str, Any], float]]]:
+        """
+        Rank matching records by BM25 score.
+        Returns (total_matches, page) where page holds (collection, record, score)
+        tuples for the requested offset/limit window. accepts_id is checked before
+        a record is fetched (e.g. against index buckets), predicate after. Without
+        a predicate only the records of the page are fetched.
+        """
+        if predicate is not None:
+            return self._search_records(query, predicate, offset, limit, accepts_id)
+
+        matches = []
+        for (collection, record_id), score in self.index.score(query).items():
+            if accepts_id is not None and not accepts_id(collection, record_id):
+                continue
+            matches.append((score, collection, record_id))
+
+        top = heapq.nlargest(offset + limit, matches, key=itemgetter(0))
+        page = []
+        for score, collection, record_id in top[offset:]:
+            record = self._collections[collection][0].get(record_id)
+            if record is not None:
+                page.append((collection, record, score))
+        return len(matches), page
+
+    def _search_records(
+        self,
+        query: str,
+        predicate: Callable[[str, Dict[str, Any]], bool],
+        offset: int,
+        limit: int,
+        accepts_id: Optional[Callable[[str, Any], bool]],
+    ) -> Tuple[int, List[Tuple[str, Dict[str, Any], float]]]:
+        """search() for a record predicate, which needs every candidate record fetched"""
+        matches = []
+        for (collection, record_id), score in self.index.score(query).items():
+            if accepts_id is not None and not accepts_id(collection, record_id):
+                continue
+            record = self._collections[collection][0].get(record_id)
+            if record is None or not predicate(collection, record):
+                continue
+            matches.append((score, collection, record))
+
+        top = heapq.nlargest(offset + limit, matches, key=itemgetter(0))
+        page = [(collection, record, score) for score, collection, record in top[offset:]]
+        return len(matches), page
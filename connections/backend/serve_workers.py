@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Run fastapi_app in several uvicorn worker processes that share one listening
+socket and one state directory (mutation journal and rate-limit buckets).
+
+Usage:
+    python serve_workers.py --workers 4 [--host 0.0.0.0] [--port 8000] [--state-dir DIR]
+
+The listening socket is created with IPPROTO_TCP so that asyncio enables
+TCP_NODELAY on accepted connections; uvicorn's own --workers socket does not,
+which adds a delayed-ACK stall of ~40ms to every response.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+
+import uvicorn
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(sock: socket.socket, log_level: str) -> None:
+    config = uvicorn.Config("fastapi_app:app", log_level=log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the FastAPI backend with several worker processes")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Number of worker processes")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--state-dir", default=None, help="Directory for shared state (default: a fresh temp dir)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    state_dir = args.state_dir or os.path.join("/tmp", f"fastapi-backend-{args.port}")
+    os.makedirs(state_dir, exist_ok=True)
+    # The journal only replicates writes between live workers, so each cluster starts fresh
+    for name in ("shared_state.db", "rate_limit.db"):
+        for suffix in ("", "-wal", "-shm"):
+            path = os.path.join(state_dir, name + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+    os.environ.setdefault("SHARED_STATE_DB", os.path.join(state_dir, "shared_state.db"))
+    os.environ.setdefault("RATE_LIMIT_DB", os.path.join(state_dir, "rate_limit.db"))
+
+    sock = bind_socket(args.host, args.port)
+    context = multiprocessing.get_context("spawn")
+    workers = [context.Process(target=run_worker, args=(sock, args.log_level)) for _ in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    print(f"Started {args.workers} workers on http://{args.host}:{args.port} (state: {state_dir})", flush=True)
+
+    def shutdown(signum, frame):
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+
+    signal.signal(signal.SIGINT, shutdown)
+    signal.signal(signal.SIGTERM, shutdown)
+    for worker in workers:
+        worker.join()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,179 @@
+"""
+Shared state for running the FastAPI backend with several worker processes.
+Every repository write is appended to a mutation journal in a SQLite file
+(WAL mode); each worker tails the journal before handling a request, so all
+workers converge on the same records. Writes run inside an exclusive journal
+transaction that first catches up with other workers, which keeps checks
+such as "username already exists" or "next free id" consistent cluster-wide.
+Waiting for another worker's transaction happens in the threadpool, on a
+connection of its own, so the event loop keeps serving reads meanwhile.
+"""
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+
+from repository import Repository
+
+Mutation = Tuple[str, str, Any, Optional[Dict[str, Any]]]
+
+
+class SharedJournal:
+    """Replicates repository writes between processes through a SQLite journal"""
+
+    def __init__(self, path: str, repositories: Dict[str, Repository], timeout: float = 30.0):
+        self.path = path
+        self.repositories = repositories
+        # Tailing reads use _conn; write transactions use _write_conn, whose BEGIN may
+        # wait up to timeout for other workers without holding up the reads
+        self._conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._write_conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._write_conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, collection TEXT NOT NULL, "
+            "event TEXT NOT NULL, record_id TEXT NOT NULL, record TEXT)"
+        )
+        # Cluster-wide identifier of this journal's lifetime; the first worker to start picks it
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('epoch', ?)", (uuid.uuid4().hex[:16],))
+        self.epoch: str = self._conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+        self._lock = threading.RLock()
+        # Serializes this process's write transactions
+        self._writer = asyncio.Lock()
+        self._applied = 0
+        self._data_version: Optional[int] = None
+        # Local writes made inside write() are captured here and appended on commit
+        self._pending: Optional[List[Mutation]] = None
+        self._replaying = False
+        for name, repository in repositories.items():
+            repository.subscribe(self._listener(name))
+
+    def _listener(self, collection: str):
+        def on_write(event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+            if self._replaying:
+                return
+            if self._pending is None:
+                raise RuntimeError(f"Write to '{collection}' outside a shared journal transaction")
+            self._pending.append((collection, event, record_id, new))
+        return on_write
+
+    @property
+    def applied(self) -> int:
+        """Sequence number of the last journal entry applied to this process"""
+        return self._applied
+
+    def sync(self) -> int:
+        """Apply journal entries written by other workers; returns how many were applied"""
+        with self._lock:
+            # data_version only changes when another connection commits, so idle syncs are free
+            data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if data_version == self._data_version:
+                return 0
+            self._data_version = data_version
+            return self._catch_up(self._conn)
+
+    def _catch_up(self, conn: sqlite3.Connection) -> int:
+        rows = conn.execute(
+            "SELECT seq, collection, event, record_id, record FROM journal WHERE seq > ? ORDER BY seq",
+            (self._applied,),
+        ).fetchall()
+        if not rows:
+            return 0
+        self._replaying = True
+        try:
+            inserts: List[Dict[str, Any]] = []
+            inserts_into: Optional[Repository] = None
+            for _, collection, event, record_id, payload in rows:
+                repository = self.repositories[collection]
+                if inserts and (event != "insert" or repository is not inserts_into):
+                    inserts_into.insert_many(inserts)
+                    inserts = []
+                if event == "insert":
+                    # Consecutive inserts are applied as one batch
+                    inserts.append(json.loads(payload))
+                    inserts_into = repository
+                elif event == "update":
+                    repository.update(json.loads(record_id), json.loads(payload))
+                elif event == "delete":
+                    repository.delete(json.loads(record_id))
+            if inserts:
+                inserts_into.insert_many(inserts)
+        finally:
+            self._replaying = False
+        self._applied = rows[-1][0]
+        return len(rows)
+
+    def _append(self, conn: sqlite3.Connection, mutations: List[Mutation]) -> None:
+        conn.executemany(
+            "INSERT INTO journal (collection, event, record_id, record) VALUES (?, ?, ?, ?)",
+            [
+                (collection, event, json.dumps(record_id), json.dumps(record) if record is not None else None)
+                for collection, event, record_id, record in mutations
+            ],
+        )
+        if mutations:
+            # Still inside the transaction, so no other worker can have appended after us
+            self._applied = conn.execute("SELECT MAX(seq) FROM journal").fetchone()[0]
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        """
+        Exclusive write transaction: catch up with other workers, run the
+        caller's repository writes, then append them to the journal.
+        Only taking the lock is awaited; the caller's writes must not await,
+        so that no other request sees them before they are journaled.
+        Writes already applied in memory are journaled even if the caller raises.
+        """
+        conn = self._write_conn
+        async with self._writer:
+            try:
+                # Not abandoned on cancellation, so the transaction is always rolled back below
+                await run_in_threadpool(conn.execute, "BEGIN IMMEDIATE")
+                self._catch_up(conn)
+                self._pending = []
+                try:
+                    yield
+                finally:
+                    self._append(conn, self._pending)
+                    conn.execute("COMMIT")
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                self._pending = None
+
+
+class LocalWrites:
+    """Stand-in for SharedJournal in single-process mode: writes apply directly"""
+
+    applied = 0
+    epoch = None
+
+    def sync(self) -> int:
+        return 0
+
+    @asynccontextmanager
+    async def write(self) -> AsyncIterator[None]:
+        yield
+
+
+class SharedStateMiddleware:
+    """Pure ASGI middleware that brings this worker up to date before each request"""
+
+    def __init__(self, app, journal: SharedJournal):
+        self.app = app
+        self.journal = journal
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            self.journal.sync()
+        await self.app(scope, receive, send)
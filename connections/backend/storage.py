@@ -0,0 +1,371 @@
+"""
+Durable storage for the FastAPI backend's in-memory repositories.
+Repository writes are appended to a write-ahead log; a background thread
+gathers appends from concurrent requests into one write and fsync (group
+commit). Periodic snapshots store every collection in one compact
+marshal-encoded file that is memory-mapped at startup, after which only the
+log written since the snapshot is replayed.
+"""
+import asyncio
+import gc
+import json
+import marshal
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from repository import Repository
+
+MARSHAL_VERSION = 4
+
+SNAPSHOT_MAGIC = b"FBSNAP01"
+SNAPSHOT_FILE = "snapshot.bin"
+
+# WAL entry header: payload length, payload crc32, log sequence number
+WAL_HEADER = struct.Struct("<IIQ")
+WAL_PREFIX = "wal-"
+WAL_SUFFIX = ".log"
+# Segments following a damaged one are renamed, not replayed
+CORRUPT_SUFFIX = ".corrupt"
+
+Entry = Tuple[str, str, Any, Optional[Dict[str, Any]]]
+
+
+@contextmanager
+def gc_paused() -> Iterator[None]:
+    """
+    Suspend the cyclic garbage collector while millions of dicts are created;
+    otherwise repeated full collections make restore time grow superlinearly.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _fsync_directory(directory: str) -> None:
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteAheadLog:
+    """Append-only, segmented log of repository writes with group commit"""
+
+    def __init__(self, directory: str, group_window: float = 0.002, fsync: bool = True):
+        self.directory = directory
+        self.group_window = group_window
+        self.fsync = fsync
+        os.makedirs(directory, exist_ok=True)
+        self.lsn = 0
+        self.durable_lsn = 0
+        self._buffer: List[bytes] = []
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._cond = threading.Condition()
+        # Held while the flusher writes, so rotation never interleaves with a write
+        self._io_lock = threading.Lock()
+        self._file = None
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+    def segments(self) -> List[Tuple[int, str]]:
+        """(first lsn, path) of every segment, oldest first"""
+        found = []
+        for name in os.listdir(self.directory):
+            if name.startswith(WAL_PREFIX) and name.endswith(WAL_SUFFIX):
+                found.append((int(name[len(WAL_PREFIX):-len(WAL_SUFFIX)]), os.path.join(self.directory, name)))
+        return sorted(found)
+
+    def replay(self, after_lsn: int = 0) -> Iterator[Tuple[int, Entry]]:
+        """
+        Yield (lsn, entry) for every logged write after after_lsn. Replay stops
+        at the first torn or corrupt entry, or at a gap in the lsn sequence:
+        that segment is truncated there and any later segments are set aside
+        (renamed with CORRUPT_SUFFIX), since their writes would be applied on
+        top of the missing ones.
+        """
+        segments = self.segments()
+        for position, (_, path) in enumerate(segments):
+            with open(path, "rb") as f:
+                data = f.read()
+            offset = 0
+            while offset + WAL_HEADER.size <= len(data):
+                length, crc, lsn = WAL_HEADER.unpack_from(data, offset)
+                start = offset + WAL_HEADER.size
+                payload = data[start:start + length]
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                if self.lsn and lsn != self.lsn + 1:
+                    break
+                offset = start + length
+                self.lsn = lsn
+                if lsn > after_lsn:
+                    yield lsn, marshal.loads(payload)
+            if offset < len(data):
+                with open(path, "r+b") as f:
+                    f.truncate(offset)
+                for _, later in segments[position + 1:]:
+                    os.replace(later, later + CORRUPT_SUFFIX)
+                break
+        self.durable_lsn = self.lsn
+
+    def open(self) -> None:
+        """Start a fresh segment and the group-commit flusher"""
+        self._file = open(self._segment_path(self.lsn + 1), "ab")
+        self._flusher = threading.Thread(target=self._flush_loop, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def _segment_path(self, first_lsn: int) -> str:
+        return os.path.join(self.directory, f"{WAL_PREFIX}{first_lsn:020d}{WAL_SUFFIX}")
+
+    def append(self, entry: Entry) -> int:
+        """Buffer an entry for the next group commit and return its lsn"""
+        payload = marshal.dumps(entry, MARSHAL_VERSION)
+        with self._cond:
+            self.lsn += 1
+            self._buffer.append(WAL_HEADER.pack(len(payload), zlib.crc32(payload), self.lsn) + payload)
+            self._cond.notify()
+            return self.lsn
+
+    async def wait_durable(self, lsn: Optional[int] = None) -> None:
+        """Wait until the entry with this lsn (default: everything appended so far) is on disk"""
+        with self._cond:
+            lsn = self.lsn if lsn is None else lsn
+            if lsn <= self.durable_lsn:
+                return
+            future = asyncio.get_running_loop().create_future()
+            self._waiters.append((lsn, future))
+        await future
+
+    def _flush_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._buffer:
+                    return
+            # Let concurrent writers join this commit
+            time.sleep(self.group_window)
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._io_lock:
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+                last_lsn = self.lsn
+            if batch:
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                if self.fsync:
+                    os.fsync(self._file.fileno())
+            with self._cond:
+                self.durable_lsn = max(self.durable_lsn, last_lsn)
+                ready = [(lsn, f) for lsn, f in self._waiters if lsn <= self.durable_lsn]
+                self._waiters = [(lsn, f) for lsn, f in self._waiters if lsn > self.durable_lsn]
+        for _, future in ready:
+            future.get_loop().call_soon_threadsafe(_resolve, future)
+
+    def rotate(self) -> int:
+        """Flush, then continue in a new segment; returns the last lsn of the closed segments"""
+        with self._io_lock:
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+                last_lsn = self.lsn
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = open(self._segment_path(last_lsn + 1), "ab")
+                self.durable_lsn = max(self.durable_lsn, last_lsn)
+        return last_lsn
+
+    def remove_through(self, lsn: int) -> None:
+        """Delete segments whose entries are all covered by a snapshot at lsn"""
+        segments = self.segments()
+        for (first, path), (next_first, _) in zip(segments, segments[1:]):
+            if next_first <= lsn + 1:
+                os.remove(path)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flush()
+        if self._file is not None:
+            self._file.close()
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def write_snapshot(path: str, collections: Dict[str, List[Dict[str, Any]]], lsn: int) -> int:
+    """
+    Atomically write a snapshot: magic, header length, JSON header with the
+    covered lsn and per-collection (offset, length, count, crc32), then one
+    marshal blob per collection. Returns the file size.
+    """
+    blobs = {name: marshal.dumps(records, MARSHAL_VERSION) for name, records in collections.items()}
+    header: Dict[str, Any] = {"lsn": lsn, "created_at": time.time(), "collections": {}}
+    offset = 0
+    for name, blob in blobs.items():
+        header["collections"][name] = [offset, len(blob), len(collections[name]), zlib.crc32(blob)]
+        offset += len(blob)
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for blob in blobs.values():
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+    return len(SNAPSHOT_MAGIC) + 4 + len(header_bytes) + offset
+
+
+def read_snapshot(path: str) -> Tuple[int, Dict[str, List[Dict[str, Any]]]]:
+    """Memory-map a snapshot and decode each collection straight from the mapping"""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        view = memoryview(mapped)
+        try:
+            if bytes(view[:len(SNAPSHOT_MAGIC)]) != SNAPSHOT_MAGIC:
+                raise ValueError(f"{path} is not a snapshot file")
+            (header_length,) = struct.unpack_from("<I", view, len(SNAPSHOT_MAGIC))
+            base = len(SNAPSHOT_MAGIC) + 4
+            header = json.loads(bytes(view[base:base + header_length]))
+            base += header_length
+            collections = {}
+            for name, (offset, length, _, crc) in header["collections"].items():
+                blob = view[base + offset:base + offset + length]
+                if zlib.crc32(blob) != crc:
+                    raise ValueError(f"Snapshot collection '{name}' is corrupt")
+                collections[name] = marshal.loads(blob)
+                blob.release()
+        finally:
+            view.release()
+    return header["lsn"], collections
+
+
+def apply_entry(repository: Repository, event: str, record_id: Any, record: Optional[Dict[str, Any]]) -> None:
+    """Idempotent replay of one logged write (the snapshot may already contain it)"""
+    if event == "delete":
+        if record_id in repository:
+            repository.delete(record_id)
+    elif record_id in repository:
+        repository.update(record_id, record)
+    else:
+        repository.insert(record)
+
+
+class DurableStorage:
+    """Snapshot + write-ahead log persistence for a set of repositories"""
+
+    def __init__(
+        self,
+        directory: str,
+        repositories: Dict[str, Repository],
+        group_window: float = 0.002,
+        snapshot_interval: float = 300.0,
+        snapshot_min_entries: int = 10_000,
+    ):
+        self.directory = directory
+        self.repositories = repositories
+        self.snapshot_interval = snapshot_interval
+        self.snapshot_min_entries = snapshot_min_entries
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.wal = WriteAheadLog(os.path.join(directory, "wal"), group_window=group_window)
+        self.snapshot_lsn = 0
+        self._snapshot_lock = threading.Lock()
+
+    def restore(self) -> bool:
+        """
+        Load the latest snapshot into the (empty) repositories and replay the
+        log written after it. Returns False when there is no snapshot yet.
+        Must run before attach(), so replayed writes are not logged again.
+        """
+        restored = os.path.exists(self.snapshot_path)
+        with gc_paused():
+            if restored:
+                self.snapshot_lsn, collections = read_snapshot(self.snapshot_path)
+                for name, records in collections.items():
+                    if name in self.repositories:
+                        self.repositories[name].insert_many(records)
+            for _, (collection, event, record_id, record) in self.wal.replay(self.snapshot_lsn):
+                apply_entry(self.repositories[collection], event, record_id, record)
+        # Segments covered by the snapshot are deleted, so the log alone may lag behind it
+        self.wal.lsn = self.wal.durable_lsn = max(self.wal.lsn, self.snapshot_lsn)
+        return restored
+
+    def attach(self) -> None:
+        """Log every subsequent repository write"""
+        self.wal.open()
+        for name, repository in self.repositories.items():
+            repository.subscribe(self._listener(name))
+
+    def _listener(self, collection: str):
+        append = self.wal.append
+
+        def on_write(event: str, record_id: Any, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+            append((collection, event, record_id, new))
+        return on_write
+
+    async def durable(self) -> None:
+        """Wait until every write made so far has been committed to the log"""
+        await self.wal.wait_durable()
+
+    def snapshot(self) -> int:
+        """Write a snapshot of all repositories and drop the log segments it covers"""
+        with self._snapshot_lock:
+            lsn = self.wal.rotate()
+            collections = {name: list(repository.all()) for name, repository in self.repositories.items()}
+            size = write_snapshot(self.snapshot_path, collections, lsn)
+            self.wal.remove_through(lsn)
+            self.snapshot_lsn = lsn
+        return size
+
+    async def snapshot_async(self) -> int:
+        """
+        Snapshot while serving. Only the WAL rotation and a copy of the row
+        references (one pointer per record) run on the event loop; decoding
+        and marshalling run in a worker thread. That work holds the GIL, so
+        requests are slowed while it runs (they interleave at the interpreter's
+        switch interval) rather than stalled for the whole serialization.
+        Records written after the copy are not captured; the log after the
+        snapshot lsn replays them idempotently.
+        """
+        with self._snapshot_lock:
+            lsn = self.wal.rotate()
+            rows = {name: repository.rows() for name, repository in self.repositories.items()}
+        size = await asyncio.to_thread(self._write_rows, rows, lsn)
+        self.wal.remove_through(lsn)
+        self.snapshot_lsn = lsn
+        return size
+
+    def _write_rows(self, rows: Dict[str, List[Any]], lsn: int) -> int:
+        collections = {name: self.repositories[name].materialize(named) for name, named in rows.items()}
+        return write_snapshot(self.snapshot_path, collections, lsn)
+
+    async def run_periodic_snapshots(self) -> None:
+        """Snapshot every snapshot_interval seconds once enough writes have accumulated"""
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self.wal.lsn - self.snapshot_lsn >= self.snapshot_min_entries:
+                await self.snapshot_async()
+
+    def close(self) -> None:
+        self.wal.close()
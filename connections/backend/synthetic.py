@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic users, products and orders for exercising the
+backend at scale. The same scale and seed always produce the same records;
+each collection draws from its own seeded generator, so the output does not
+depend on how much of another collection was consumed. Orders only reference
+generated users and products, and their totals are the sum of the referenced
+product prices. Records are yielded lazily, so millions of rows can be
+streamed into repositories or NDJSON files without building lists first.
+
+Usage:
+    python synthetic.py --scale 100000 [--seed 42] [--out DIR]
+"""
+import argparse
+import calendar
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+# Share of the total row count given to each collection
+SPLIT = (("users", 0.30), ("products", 0.05), ("orders", 0.65))
+
+# First generated ids, above the hand-written mock records
+FIRST_USER_ID = 1000
+FIRST_PRODUCT_ID = 1000
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Emma", "Farid", "Grace", "Hiro", "Ines", "Jamal", "Kira", "Liam",
+    "Maya", "Noah", "Olga", "Priya", "Quinn", "Rosa", "Sam", "Tariq", "Uma", "Victor", "Wen", "Yusuf", "Zoe",
+]
+LAST_NAMES = [
+    "Johnson", "Smith", "Williams", "Brown", "Garcia", "Miller", "Davis", "Martinez", "Lopez", "Wilson",
+    "Anderson", "Taylor", "Thomas", "Moore", "Nguyen", "Kim", "Patel", "Okafor", "Rossi", "Schmidt",
+]
+# (value, weight) pairs
+DEPARTMENTS = [
+    ("Engineering", 30), ("Sales", 20), ("Marketing", 12), ("Support", 15),
+    ("Finance", 8), ("Operations", 10), ("HR", 5),
+]
+LOCATIONS = [
+    ("San Francisco", 20), ("New York", 25), ("Boston", 10), ("Austin", 12),
+    ("Chicago", 10), ("London", 13), ("Berlin", 10),
+]
+USER_STATUSES = [("active", 85), ("inactive", 15)]
+PRODUCT_STATUSES = [("active", 90), ("inactive", 10)]
+ORDER_STATUSES = [("completed", 60), ("shipped", 15), ("pending", 15), ("cancelled", 10)]
+
+# category -> (weight, median price, product nouns)
+CATEGORIES = {
+    "electronics": (35, 120.0, ["Laptop", "Monitor", "Keyboard", "Mouse", "Headphones", "USB-C Hub", "Webcam"]),
+    "furniture": (20, 250.0, ["Desk", "Office Chair", "Bookshelf", "Filing Cabinet", "Standing Desk"]),
+    "lighting": (10, 45.0, ["Desk Lamp", "Floor Lamp", "LED Strip", "Ceiling Light"]),
+    "office": (20, 15.0, ["Notebook", "Pen Set", "Stapler", "Organizer", "Whiteboard"]),
+    "kitchen": (15, 35.0, ["Coffee Maker", "Kettle", "Mug Set", "Water Bottle"]),
+}
+ADJECTIVES = ["Pro", "Ultra", "Compact", "Deluxe", "Ergonomic", "Wireless", "Classic", "Smart", "Eco", "Premium"]
+
+WEIGHTED_BLOCK = 4096
+
+USERS_SINCE = "2022-01-01T00:00:00Z"
+ORDERS_SINCE = "2025-01-01T00:00:00Z"
+ORDERS_UNTIL = "2026-07-01T00:00:00Z"
+
+
+def split_scale(scale: int) -> Dict[str, int]:
+    """Record count per collection for a total of scale rows (at least one of each)"""
+    return {name: max(1, int(scale * share)) for name, share in SPLIT}
+
+
+def _rng(seed: int, collection: str) -> random.Random:
+    return random.Random(f"{seed}:{collection}")
+
+
+def _epoch(timestamp: str) -> int:
+    return calendar.timegm(time.strptime(timestamp, "%Y-%m-%dT%H:%M:%SZ"))
+
+
+def _timestamp(epoch: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch))
+
+
+def _weighted(rng: random.Random, choices: List[Tuple[str, int]]) -> Iterator[str]:
+    """Endless weighted draws, made in blocks since random.choices is much cheaper per value that way"""
+    values, weights = zip(*choices)
+    cumulative = list(itertools.accumulate(weights))
+    while True:
+        yield from rng.choices(values, cum_weights=cumulative, k=WEIGHTED_BLOCK)
+
+
+def skewed_index(rng: random.Random, n: int, exponent: float = 3.0) -> int:
+    """Index in [0, n) biased towards 0, giving a few popular items and a long tail"""
+    return int(n * rng.random() ** exponent)
+
+
+def generate_users(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Users with weighted departments, locations and statuses; last_login follows created_at"""
+    rng = _rng(seed, "users")
+    departments = _weighted(rng, DEPARTMENTS)
+    locations = _weighted(rng, LOCATIONS)
+    statuses = _weighted(rng, USER_STATUSES)
+    since, until = _epoch(USERS_SINCE), _epoch(ORDERS_UNTIL)
+    for i in range(count):
+        user_id = str(FIRST_USER_ID + i)
+        created = rng.uniform(since, until - 86400)
+        # Recent logins are more common than old ones
+        last_login = until - (until - created) * rng.random() ** 3
+        roles = ["user"]
+        roll = rng.random()
+        if roll < 0.03:
+            roles.append("admin")
+        elif roll < 0.23:
+            roles.append("editor")
+        yield {
+            "id": user_id,
+            "username": f"user_{user_id}",
+            "email": f"user_{user_id}@example.com",
+            "first_name": rng.choice(FIRST_NAMES),
+            "last_name": rng.choice(LAST_NAMES),
+            "status": next(statuses),
+            "created_at": _timestamp(created),
+            "last_login": _timestamp(last_login),
+            "roles": roles,
+            "metadata": {"department": next(departments), "location": next(locations)},
+        }
+
+
+def generate_products(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Products with log-normal prices around a per-category median and long-tailed stock"""
+    rng = _rng(seed, "products")
+    categories = _weighted(rng, [(name, weight) for name, (weight, _, _) in CATEGORIES.items()])
+    statuses = _weighted(rng, PRODUCT_STATUSES)
+    for i in range(count):
+        category = next(categories)
+        _, median, nouns = CATEGORIES[category]
+        noun, adjective = rng.choice(nouns), rng.choice(ADJECTIVES)
+        price = max(0.99, round(median * rng.lognormvariate(0.0, 0.6)) - 0.01)
+        stock = 0 if rng.random() < 0.05 else int(rng.expovariate(1 / 60.0)) + 1
+        yield {
+            "id": FIRST_PRODUCT_ID + i,
+            "name": f"{adjective} {noun} {i % 1000:03d}",
+            "category": category,
+            "status": next(statuses),
+            "price": round(price, 2),
+            "stock": stock,
+            "description": f"{adjective} {noun.lower()} for {category}",
+        }
+
+
+def generate_orders(count: int, users: int, products: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """
+    Orders placed by generated users for generated products. A few users and
+    products account for most orders; totals are the sum of item prices.
+    """
+    prices = [product["price"] for product in generate_products(products, seed)]
+    rng = _rng(seed, "orders")
+    statuses = _weighted(rng, ORDER_STATUSES)
+    since, until = _epoch(ORDERS_SINCE), _epoch(ORDERS_UNTIL)
+    # Orders are created in id order, so created_at grows with the id
+    step = (until - since) / max(1, count)
+    for i in range(count):
+        items = [skewed_index(rng, products) for _ in range(min(5, 1 + int(rng.expovariate(1.0))))]
+        yield {
+            "id": f"ORD-{i + 1:08d}",
+            "user_id": str(FIRST_USER_ID + skewed_index(rng, users, 2.0)),
+            "status": next(statuses),
+            "total": round(sum(prices[index] for index in items), 2),
+            "items": [FIRST_PRODUCT_ID + index for index in items],
+            "created_at": _timestamp(since + i * step + rng.uniform(0, step)),
+        }
+
+
+def generate_dataset(scale: int, seed: int = 42) -> Dict[str, Iterator[Dict[str, Any]]]:
+    """Lazy record streams per collection for a total of scale rows"""
+    sizes = split_scale(scale)
+    return {
+        "users": generate_users(sizes["users"], seed),
+        "products": generate_products(sizes["products"], seed),
+        "orders": generate_orders(sizes["orders"], sizes["users"], sizes["products"], seed),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Write a deterministic synthetic dataset as NDJSON files")
+    parser.add_argument("--scale", type=int, required=True, help="Total number of records across collections")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default=".", help="Directory for users.ndjson, products.ndjson and orders.ndjson")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, records in generate_dataset(args.scale, args.seed).items():
+        path = os.path.join(args.out, f"{name}.ndjson")
+        with open(path, "w") as f:
+            written = 0
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+                written += 1
+        print(f"{path}: {written} records")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+"""
+Shared fixtures for the backend test suite.
+Run from connections/backend with: python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Configure the app before it is first imported: no rate limiting and no persistence
+os.environ.setdefault("RATE_LIMIT_ENABLED", "0")
+for name in ("DATA_DIR", "SHARED_STATE_DB", "RATE_LIMIT_DB", "JWT_JWKS_FILE", "SYNTHETIC_SCALE"):
+    os.environ.pop(name, None)
+
+API_KEY_HEADERS = {"x-api-key": "demo-api-key"}
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import fastapi_app
+    return fastapi_app
+
+
+@pytest.fixture(scope="session")
+def client(app_module):
+    from fastapi.testclient import TestClient
+    with TestClient(app_module.app) as client:
+        yield client
+
+
+@pytest.fixture
+def compress_everything(app_module, client, monkeypatch):
+    """Drop the compression size threshold, so the small mock responses get compressed"""
+    from compression import CompressionMiddleware
+    node = app_module.app.middleware_stack
+    while not isinstance(node, CompressionMiddleware):
+        node = node.app
+    monkeypatch.setattr(node, "minimum_size", 0)
+    return node
@@ -0,0 +1,58 @@
+"""Credential store hashing and the per-credential verification caches"""
+import base64
+
+from auth_store import CredentialStore
+from conftest import API_KEY_HEADERS
+
+
+def basic(username, password):
+    return {"authorization": "Basic " + base64.b64encode(f"{username}:{password}".encode()).decode()}
+
+
+def test_store_checks_passwords_and_tokens():
+    store = CredentialStore(iterations=1000)
+    store.add_password("alice", "s3cret")
+    store.add_token("api_key", "key-1")
+    assert store.check_password("alice", "s3cret")
+    assert not store.check_password("alice", "wrong")
+    assert not store.check_password("bob", "s3cret")
+    assert store.check_token("api_key", "key-1")
+    assert not store.check_token("bearer", "key-1")
+    store.revoke_token("api_key", "key-1")
+    assert not store.check_token("api_key", "key-1")
+
+
+def test_each_credential_is_cached_separately(app_module, client):
+    credentials = app_module.CREDENTIALS
+    credentials.cache.clear()
+    # A bad Authorization header does not stop the valid API key from resolving
+    headers = {**API_KEY_HEADERS, "authorization": "Bearer not-a-token"}
+    assert client.get("/api/v1/data", headers=headers).json()["auth_method"] == "api_key"
+    assert credentials.cache.get(credentials.fingerprint("x-api-key", "demo-api-key")) is not None
+    assert credentials.failures.get(credentials.fingerprint("authorization", "Bearer not-a-token"))
+    # The cached API key serves a request with a different (or no) Authorization header
+    assert client.get("/api/v1/data", headers=API_KEY_HEADERS).status_code == 200
+
+
+def test_failed_credentials_are_not_rehashed(app_module, client, monkeypatch):
+    calls = []
+    check = app_module.CREDENTIALS.check_password
+    monkeypatch.setattr(app_module.CREDENTIALS, "check_password", lambda *a: calls.append(a) or check(*a))
+    headers = basic("demo", "not-the-password")
+    for _ in range(3):
+        assert client.get("/api/v1/data", headers=headers).status_code == 401
+    assert len(calls) == 1
+    assert client.get("/api/v1/data", headers=basic("demo", "demo123")).status_code == 200
+
+
+def test_basic_only_endpoint_uses_the_credential_cache(app_module, client, monkeypatch):
+    app_module.CREDENTIALS.cache.clear()
+    calls = []
+    check = app_module.CREDENTIALS.check_password
+    monkeypatch.setattr(app_module.CREDENTIALS, "check_password", lambda *a: calls.append(a) or check(*a))
+    for _ in range(3):
+        response = client.get("/api/v1/auth/basic-only", headers=basic("user", "password"))
+        assert response.status_code == 200 and response.json()["user"] == "user"
+    assert client.get("/api/v1/auth/basic-only", headers=basic("user", "nope")).status_code == 401
+    assert client.get("/api/v1/auth/basic-only", headers=API_KEY_HEADERS).status_code == 401
+    assert len(calls) == 2
@@ -0,0 +1,74 @@
+"""In-process batch execution: sub-request lifecycle, timeouts and rejected paths"""
+import asyncio
+import time
+
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from batch import call_app, route_path, run_batch
+from conftest import API_KEY_HEADERS
+
+
+async def finite_stream(request):
+    async def chunks():
+        for i in range(3):
+            await asyncio.sleep(0.01)
+            yield f"{i}\n".encode()
+    return StreamingResponse(chunks())
+
+
+async def endless_stream(request):
+    async def chunks():
+        while True:
+            await asyncio.sleep(0.01)
+            yield b"."
+    return StreamingResponse(chunks())
+
+
+STREAMING_APP = Starlette(routes=[Route("/finite", finite_stream), Route("/endless/{name}", endless_stream)])
+
+
+def test_streamed_sub_request_completes_without_spinning():
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        task = asyncio.create_task(ticker())
+        started = time.process_time()
+        result = await call_app(STREAMING_APP, "/finite")
+        task.cancel()
+        return result, ticks, time.process_time() - started
+
+    (status, _, body), ticks, cpu = asyncio.run(run())
+    assert status == 200 and body == b"0\n1\n2\n"
+    # The event loop kept running other tasks and was not busy-polling receive()
+    assert ticks >= 3 and cpu < 0.5
+
+
+def test_sub_request_times_out():
+    results = asyncio.run(run_batch(STREAMING_APP, [("/endless/x", None), ("/finite", None)], {}, timeout=0.2))
+    assert [r["status"] for r in results] == [504, 200]
+
+
+def test_route_path_resolves_templates():
+    assert route_path(STREAMING_APP, "/endless/abc") == "/endless/{name}"
+    assert route_path(STREAMING_APP, "/missing") is None
+
+
+def test_batch_runs_reads_and_rejects_streaming_routes(client):
+    response = client.post(
+        "/api/v1/batch",
+        headers=API_KEY_HEADERS,
+        json={"requests": [{"path": "/api/v1/products", "query": {"limit": 1}}, {"path": "/api/v1/data"}]},
+    )
+    assert response.status_code == 200
+    assert [r["status"] for r in response.json()["data"]["results"]] == [200, 200]
+    for path in ("/api/v1/jobs/abc/result", "/api/v1/changes/stream?since=0", "/api/v1/export/orders"):
+        response = client.post("/api/v1/batch", headers=API_KEY_HEADERS, json={"requests": [{"path": path}]})
+        assert response.status_code == 400, path
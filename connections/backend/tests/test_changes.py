@@ -0,0 +1,59 @@
+"""Change feed retention and resync"""
+import pytest
+
+from changes import ChangeFeed, ChangeFeedExpired
+from conftest import API_KEY_HEADERS
+from repository import Repository
+
+
+def make_feed(max_changes=3, preload=0):
+    items = Repository("items")
+    items.load({"id": i} for i in range(preload))
+    return items, ChangeFeed({"items": items}, max_changes=max_changes)
+
+
+def test_records_loaded_at_startup_are_not_logged():
+    items, feed = make_feed(preload=1000)
+    assert feed.version == feed.horizon == 1 and not feed._latest
+    with pytest.raises(ChangeFeedExpired):
+        feed.since(0)
+    items.update(5, {"name": "five"})
+    changes, version, has_more = feed.since(1)
+    assert [(c.version, c.record_id, c.record) for c in changes] == [(2, 5, {"id": 5, "name": "five"})]
+    assert (version, has_more) == (2, False)
+
+
+def test_empty_feed_serves_everything_from_zero():
+    items, feed = make_feed()
+    items.insert({"id": 1})
+    items.delete(1)
+    changes, _, _ = feed.since(0)
+    assert [(c.version, c.record_id, c.to_dict()["op"]) for c in changes] == [(2, 1, "delete")]
+
+
+def test_only_the_newest_changes_are_retained():
+    items, feed = make_feed(max_changes=3)
+    for i in range(1, 6):
+        items.insert({"id": i})
+    # Rewriting a record moves it to the front of the window
+    items.update(3, {"name": "three"})
+    assert len(feed._latest) == 3 and feed.horizon == 2
+    changes, version, _ = feed.since(2)
+    assert [c.record_id for c in changes] == [4, 5, 3] and version == 6
+    with pytest.raises(ChangeFeedExpired):
+        feed.since(1)
+    # The log is compacted, so it stays proportional to the window too
+    for n in range(3000):
+        items.update(4, {"n": n})
+    assert len(feed._log) <= 2 * 3 + 1024
+
+
+def test_positions_behind_the_window_get_a_resync_answer(app_module, client, monkeypatch):
+    feed = app_module.CHANGES
+    monkeypatch.setattr(feed, "horizon", feed.version)
+    response = client.get("/api/v1/changes", params={"since": 0}, headers=API_KEY_HEADERS)
+    assert response.status_code == 410
+    body = response.json()["error"]
+    assert body["resync"] is True and body["version"] == feed.version and body["epoch"] == feed.epoch
+    response = client.get("/api/v1/changes", params={"since": body["version"]}, headers=API_KEY_HEADERS)
+    assert response.status_code == 200 and response.json()["data"]["changes"] == []
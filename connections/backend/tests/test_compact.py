@@ -0,0 +1,53 @@
+"""Compact row encoding and its bound on compiled shapes"""
+from compact import PLAIN, RecordCodec
+from repository import Range, Repository
+
+RECORDS = [
+    {"id": 1, "status": "active", "roles": ["a", "b"], "metadata": {"department": "Sales", "location": None}},
+    {"id": 2, "status": "active", "price": 3.5},
+    {"id": 3, "tags": [], "metadata": {"department": "Ops", "nested": {"deep": [1, 2]}}},
+    {"id": 4, "status": "inactive", "roles": ["a", "b"], "extra": True},
+]
+
+
+def test_rows_round_trip_and_read_fields():
+    for max_shapes in (0, 1, 1024):
+        codec = RecordCodec(shared=("status", "roles"), max_shapes=max_shapes)
+        rows = [codec.encode(record) for record in RECORDS]
+        assert codec.shapes <= max_shapes
+        for record, row in zip(RECORDS, rows):
+            assert codec.decode(row) == record
+            assert codec.field(row, "id") == record["id"]
+            assert codec.field(row, "metadata.department") == record.get("metadata", {}).get("department")
+            assert codec.field(row, "metadata.missing", "x") == "x"
+            assert codec.field(row, "status.nested") is None
+
+
+def test_plain_rows_once_the_shape_limit_is_reached():
+    codec = RecordCodec(max_shapes=2)
+    rows = [codec.encode(record) for record in RECORDS]
+    assert codec.shapes == 2
+    assert [row[0] is PLAIN for row in rows] == [False, False, True, True]
+    # Rows keep a private copy: neither the input nor a decoded record aliases the stored one
+    record = {"id": 5, "metadata": {"tags": ["x"]}}
+    row = codec.encode(record)
+    record["metadata"]["tags"].append("y")
+    decoded = codec.decode(row)
+    decoded["metadata"]["tags"].append("z")
+    assert codec.decode(row) == {"id": 5, "metadata": {"tags": ["x"]}}
+    # A known layout still uses its compiled shape
+    assert codec.encode({"id": 9, "status": "x", "roles": [], "metadata": {"department": "", "location": ""}})[0] is not PLAIN
+
+
+def test_repository_with_more_layouts_than_shapes():
+    repository = Repository("items", indexes=("group",), sortable=("price",), ranges=("price",), compact=True)
+    repository._codec.max_shapes = 3
+    records = [{"id": i, "group": "ab"[i % 2], "price": i, f"field{i % 10}": i} for i in range(40)]
+    repository.load(records)
+    assert repository._codec.shapes == 3
+    assert list(repository.all()) == records
+    assert repository.ids({"group": "a"}) == list(range(0, 40, 2))
+    assert [r["id"] for r in repository.page({"price": Range(10, 20)}, sort="-price")[0]] == list(range(19, 10, -1))
+    repository.update(7, {"group": "a", "new": 1})
+    assert repository.get(7) == {**records[7], "group": "a", "new": 1}
+    assert 7 in repository.ids({"group": "a"})
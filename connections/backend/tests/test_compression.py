@@ -0,0 +1,113 @@
+"""Negotiated compression: encoding choice, variant ETags and responses left alone"""
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from compression import CompressionMiddleware, negotiate_encoding
+
+BODY = b'{"items": "' + b"x" * 2000 + b'"}'
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0.5, identity", "gzip"),
+    ("gzip;q=0", None),
+    ("deflate", None),
+    ("*", "gzip"),
+    ("*;q=0.2, gzip;q=0", None),
+    ("", None),
+    ("GZIP;q=bogus, gzip", "gzip"),
+])
+def test_negotiate_encoding(accept, expected):
+    assert negotiate_encoding(accept, ("gzip",)) == expected
+
+
+def test_brotli_is_preferred_when_weighted_equally():
+    assert negotiate_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert negotiate_encoding("gzip, br;q=0.5", ("br", "gzip")) == "gzip"
+
+
+def endpoint(**options):
+    async def handler(request):
+        if request.headers.get("if-none-match") == '"v1"':
+            return Response(status_code=304, headers={"etag": '"v1"'})
+        return Response(BODY, **options)
+    return handler
+
+
+async def events(request):
+    async def stream():
+        yield b"data: 1\n\n"
+        yield b"data: 2\n\n"
+    return StreamingResponse(stream(), media_type="text/event-stream")
+
+
+async def ndjson(request):
+    async def stream():
+        for i in range(3):
+            yield b'{"id": %d}\n' % i
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+@pytest.fixture(scope="module")
+def compressed():
+    app = Starlette(routes=[
+        Route("/etag", endpoint(media_type="application/json", headers={"etag": '"v1"'})),
+        Route("/plain", endpoint(media_type="application/json")),
+        Route("/small", lambda request: Response(b"{}", media_type="application/json")),
+        Route("/image", endpoint(media_type="image/png")),
+        Route("/encoded", lambda request: Response(gzip.compress(BODY), media_type="application/json",
+                                                   headers={"content-encoding": "gzip"})),
+        Route("/partial", endpoint(media_type="application/json", status_code=206,
+                                   headers={"content-range": f"bytes 0-{len(BODY) - 1}/9999"})),
+        Route("/events", events),
+        Route("/ndjson", ndjson),
+    ])
+    middleware = CompressionMiddleware(app)
+    return middleware, TestClient(middleware)
+
+
+def get(client, path, **headers):
+    return client.get(path, headers={"accept-encoding": "gzip", **headers})
+
+
+def test_variant_etag_is_cached_and_revalidated(compressed):
+    middleware, client = compressed
+    response = get(client, "/etag")
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"v1-gzip"'
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert response.content == BODY
+    assert middleware.variants.get(('"v1"', "gzip")) is not None
+    # The compressed variant's ETag revalidates against the identity ETag and is echoed back
+    revalidated = get(client, "/etag", **{"if-none-match": '"v1-gzip"'})
+    assert revalidated.status_code == 304 and revalidated.headers["etag"] == '"v1-gzip"'
+    identity = client.get("/etag", headers={"accept-encoding": "identity"})
+    assert "content-encoding" not in identity.headers and identity.headers["etag"] == '"v1"'
+
+
+def test_streams_are_compressed_chunk_by_chunk(compressed):
+    _, client = compressed
+    response = get(client, "/ndjson")
+    assert response.headers["content-encoding"] == "gzip" and "content-length" not in response.headers
+    assert response.content == b'{"id": 0}\n{"id": 1}\n{"id": 2}\n'
+    response = get(client, "/plain")
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(BODY)
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/partial", "/events"])
+def test_passthrough(compressed, path):
+    _, client = compressed
+    response = get(client, path)
+    assert "content-encoding" not in response.headers
+
+
+def test_already_encoded_bodies_are_not_compressed_twice(compressed):
+    _, client = compressed
+    response = get(client, "/encoded")
+    assert response.headers["content-encoding"] == "gzip" and response.content == BODY
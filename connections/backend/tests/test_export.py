@@ -0,0 +1,29 @@
+"""Columnar export parameters and output"""
+import io
+
+import pytest
+
+from conftest import API_KEY_HEADERS
+
+pa = pytest.importorskip("pyarrow")
+
+
+def test_export_streams_selected_columns(client):
+    response = client.get(
+        "/api/v1/export/products",
+        headers=API_KEY_HEADERS,
+        params={"columns": "id,price", "filters": '{"price": {"gte": 50}}'},
+    )
+    assert response.status_code == 200
+    table = pa.ipc.open_stream(io.BytesIO(response.content)).read_all()
+    assert table.column_names == ["id", "price"]
+    assert table.num_rows and all(price >= 50 for price in table.column("price").to_pylist())
+
+
+def test_unknown_collection_is_a_bad_request_like_export_jobs(client):
+    response = client.get("/api/v1/export/nope", headers=API_KEY_HEADERS)
+    assert response.status_code == 400
+    response = client.post("/api/v1/jobs", headers=API_KEY_HEADERS, json={"type": "export", "params": {"collection": "nope"}})
+    assert response.status_code == 400
+    for params in ({"format": "csv"}, {"columns": "id,missing"}, {"filters": "{"}):
+        assert client.get("/api/v1/export/products", headers=API_KEY_HEADERS, params=params).status_code == 400
@@ -0,0 +1,119 @@
+"""Search filter parsing, compiled plans and the plan cache"""
+import pytest
+
+from filters import Condition, FilterCache, FilterError, normalize_filters, parse_filter_text, parse_filters
+from repository import Repository
+
+FIELDS = {"products": ("status", "category", "price"), "users": ("status", "metadata.department")}
+
+
+@pytest.fixture
+def repositories():
+    products = Repository("products", indexes=("status", "category"))
+    products.load([
+        {"id": 1, "status": "active", "category": "office", "price": 10},
+        {"id": 2, "status": "active", "category": "lighting", "price": 100},
+        {"id": 3, "status": "archived", "category": "office", "price": 55.5},
+        {"id": 4, "status": None, "category": "office", "price": True},
+    ])
+    users = Repository("users", indexes=("status",))
+    users.load([
+        {"id": "a", "status": "active", "metadata": {"department": "Sales"}},
+        {"id": "b", "status": "inactive", "metadata": {"department": "IT"}},
+    ])
+    return {"products": products, "users": users}
+
+
+def test_parse_flattens_nested_fields_and_operators():
+    conditions = parse_filters({"status": "active", "price": {"gte": 10, "lt": 100},
+                                "metadata": {"department": {"in": ["Sales", None]}}})
+    assert conditions == [
+        Condition("status", "eq", "active"),
+        Condition("price", "gte", 10),
+        Condition("price", "lt", 100),
+        Condition("metadata.department", "in", ("Sales", None)),
+    ]
+    # Key order does not change the normalized form
+    assert normalize_filters(parse_filter_text('{"b": 1, "a": {"eq": "x"}}')) == \
+        normalize_filters(parse_filter_text('{"a": "x", "b": {"eq": 1}}'))
+
+
+@pytest.mark.parametrize("text, message", [
+    ("{not json", "Invalid JSON"),
+    ("[1, 2]", "JSON object"),
+    ('{"": 1}', "empty"),
+    ('{"price": {"gte": 1, "currency": "EUR"}}', "mixes operators"),
+    ('{"status": ["a"]}', "must compare"),
+    ('{"status": {"eq": {"a": 1}}}', "must compare"),
+    ('{"status": {"in": "active"}}', "needs a list"),
+    ('{"status": {"in": [["nested"]]}}', "needs a list"),
+    ('{"price": {"gt": "10"}}', "needs a number"),
+    ('{"price": {"lt": true}}', "needs a number"),
+    ('{"price": {"lte": NaN}}', "needs a number"),
+])
+def test_malformed_filters_are_rejected(text, message):
+    with pytest.raises(FilterError, match=message):
+        parse_filter_text(text)
+
+
+def run(plan, repositories):
+    """Ids of each collection accepted by a bound plan"""
+    accepts_id, accepts = plan.bind(repositories)
+    return {
+        collection: [
+            record["id"] for record in repository.all()
+            if accepts_id(collection, record["id"]) and (accepts is None or accepts(collection, record))
+        ]
+        for collection, repository in repositories.items()
+    }
+
+
+def test_plans_split_index_lookups_from_predicates(repositories):
+    cache = FilterCache(FIELDS, repositories)
+    plan = cache.get('{"status": "active", "category": {"in": ["office", "lighting"]}}')
+    products = plan.collections["products"]
+    assert products.lookups == [("status", ("active",)), ("category", ("office", "lighting"))]
+    assert products.predicate is None and plan.collections["users"].lookups == [("status", ("active",))]
+    assert products.candidate_ids(repositories["products"]) == [1, 2]
+    # Only id checks are needed, so bind returns no record check
+    assert plan.bind(repositories)[1] is None
+    assert run(plan, repositories) == {"products": [1, 2], "users": ["a"]}
+
+
+def test_bound_plans_evaluate_residual_conditions(repositories):
+    cache = FilterCache(FIELDS, repositories)
+    # Ranges skip non-numbers (including booleans); null equality is checked on the record
+    assert run(cache.get('{"price": {"gt": 10, "lte": 100}}'), repositories) == {"products": [2, 3], "users": ["a", "b"]}
+    assert run(cache.get('{"status": null}'), repositories) == {"products": [4], "users": []}
+    plan = cache.get('{"metadata": {"department": "IT"}, "category": "office"}')
+    assert plan.collections["users"].lookups == [] and plan.collections["products"].residual == []
+    # Each collection ignores the fields it does not expose
+    assert run(plan, repositories) == {"products": [1, 3, 4], "users": ["b"]}
+
+
+def test_cache_hits_on_raw_and_normalized_text(repositories):
+    cache = FilterCache(FIELDS, repositories)
+    plan = cache.get('{"status": "active", "price": {"lt": 50}}')
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert cache.get('{"status": "active", "price": {"lt": 50}}') is plan
+    assert (cache.hits, cache.misses) == (1, 1)
+    # An equivalent spelling is parsed but not recompiled
+    assert cache.get('{"price": {"lt": 50}, "status": {"eq": "active"}}') is plan
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_stays_within_its_size_bound(repositories):
+    cache = FilterCache(FIELDS, repositories, maxsize=4)
+    first = cache.get('{"price": {"gt": 0}}')
+    for bound in range(1, 20):
+        cache.get(f'{{"price": {{"gt": {bound}}}}}')
+        assert len(cache.plans) <= 4
+    # The least recently used plans were evicted and are compiled again
+    again = cache.get('{"price": {"gt": 0}}')
+    assert again is not first and again.key == first.key
+    assert cache.hits == 0 and cache.misses == 21
+    # A plan that keeps being used survives newer entries
+    for bound in range(100, 110):
+        assert cache.get('{"price": {"gt": 0}}') is again
+        cache.get(f'{{"price": {{"gt": {bound}}}}}')
+    assert cache.hits == 10 and len(cache.plans) == 4
@@ -0,0 +1,150 @@
+"""Streaming NDJSON/CSV import: line splitting, row parsing, chunked inserts and the import endpoint"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import pytest
+from pydantic import BaseModel
+
+from conftest import API_KEY_HEADERS
+from ingest import MAX_LINE_BYTES, TOO_LONG, ingest, iter_csv_rows, iter_lines, iter_ndjson_rows
+from repository import Repository
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def collect(rows):
+    async def run():
+        return [row async for row in rows]
+    return asyncio.run(run())
+
+
+def csv_rows(*chunks):
+    return collect(iter_csv_rows(iter_lines(stream(*chunks))))
+
+
+def test_lines_across_chunks_with_bom_and_crlf():
+    lines = collect(iter_lines(stream(b"\xef\xbb\xbfa,b\r\n1,", b"2\r\n3", b",4")))
+    assert lines == ["a,b", "1,2", "3,4"]
+
+
+def test_overlong_lines_are_dropped_without_buffering():
+    big = b"x" * (MAX_LINE_BYTES // 4)
+    # An upload without newlines arrives in many chunks; only one chunk's worth is ever held
+    chunks = [b'{"id": 1}\n'] + [big] * 8 + [b'\n{"id": 2}\n', big * 5 + b"\n"]
+    rows = collect(iter_ndjson_rows(iter_lines(stream(*chunks))))
+    assert rows == [(1, {"id": 1}, None), (2, None, TOO_LONG), (3, {"id": 2}, None), (4, None, TOO_LONG)]
+
+
+def test_csv_quoted_fields_may_span_lines():
+    rows = csv_rows(b'id,name,description\n1,"Desk, oak","two\nlines ""quoted"""\n', b'2,Lamp,\n')
+    assert rows == [
+        (1, {"id": "1", "name": "Desk, oak", "description": 'two\nlines "quoted"'}, None),
+        (2, {"id": "2", "name": "Lamp"}, None),
+    ]
+
+
+def test_csv_bad_rows_are_reported():
+    rows = csv_rows(b'id,name\n1\n2,ok\n3,"never closed\n')
+    assert rows == [
+        (1, None, "Expected 2 columns, got 1"),
+        (2, {"id": "2", "name": "ok"}, None),
+        (3, None, "Unterminated quoted field"),
+    ]
+
+
+def test_csv_unterminated_quote_does_not_swallow_the_upload():
+    line = b"y" * (MAX_LINE_BYTES // 8) + b"\n"
+    rows = csv_rows(b'id,name\n1,"open\n', *[line] * 10, b"2,after\n")
+    errors = [row for row in rows if row[2] == TOO_LONG]
+    assert len(errors) == 1
+    assert rows[-1][1] == {"id": "2", "name": "after"}
+
+
+class Item(BaseModel):
+    id: int
+    name: str
+
+
+def run_ingest(lines, repository, chunk_size=2, transaction=None):
+    rows = iter_ndjson_rows(stream(*lines))
+    options = {"transaction": transaction} if transaction else {}
+    return asyncio.run(ingest(rows, repository, Item.model_dump, chunk_size=chunk_size,
+                              validate=Item.model_validate, **options))
+
+
+def test_bad_rows_do_not_reject_their_chunk():
+    items = Repository("items")
+    items.insert({"id": 1, "name": "existing"})
+    report = run_ingest(['{"id": 2, "name": "a"}', '{"id": 1, "name": "dup"}', '{"id": "x"}',
+                        "not json", '{"id": 3, "name": "b"}', '{"id": 3, "name": "again"}'], items)
+    assert items.ids() == [1, 2, 3]
+    data = report.to_dict()
+    assert (data["received"], data["imported"], data["failed"]) == (6, 2, 4)
+    assert [error["row"] for error in data["errors"]] == [2, 3, 4, 6]
+
+
+def test_failed_transaction_rolls_back_only_its_chunk():
+    items = Repository("items")
+    entered = []
+
+    @asynccontextmanager
+    async def transaction():
+        entered.append(True)
+        if len(entered) == 2:
+            raise RuntimeError("journal unavailable")
+        yield
+
+    lines = [json.dumps({"id": i, "name": str(i)}) for i in range(1, 6)]
+    with pytest.raises(RuntimeError):
+        run_ingest(lines, items, transaction=transaction)
+    # The first chunk was committed; nothing of the failed one was inserted
+    assert items.ids() == [1, 2]
+
+
+@pytest.fixture
+def cleanup_products(app_module):
+    yield
+    for product_id in range(9000, 9010):
+        if product_id in app_module.PRODUCTS:
+            app_module.PRODUCTS.delete(product_id)
+
+
+def test_csv_upload_with_bom_and_multiline_fields(client, app_module, cleanup_products):
+    body = (
+        '\ufeffid,name,category,price,description\n'
+        '9000,"Desk, oak",furniture,120.5,"Solid\nwood"\n'
+        '9001,Lamp,furniture,-1,\n'
+        '9002,Chair,furniture,80,\n'
+    ).encode("utf-8")
+    response = client.post("/api/v1/import/products", content=body,
+                           headers={**API_KEY_HEADERS, "content-type": "text/csv"})
+    data = response.json()["data"]
+    assert response.status_code == 200 and data["format"] == "csv"
+    assert (data["imported"], data["failed"]) == (2, 1)
+    assert data["errors"][0]["row"] == 2 and "price" in data["errors"][0]["error"]
+    assert app_module.PRODUCTS.get(9000)["description"] == "Solid\nwood"
+
+
+def test_multipart_upload_closes_its_spool_file(client, app_module, cleanup_products, monkeypatch):
+    from starlette.datastructures import UploadFile
+    closed = []
+    original = UploadFile.close
+
+    async def close(self):
+        closed.append(self.filename)
+        await original(self)
+
+    monkeypatch.setattr(UploadFile, "close", close)
+    ndjson = b'{"id": 9003, "name": "Shelf", "category": "furniture", "price": 40}\n'
+    response = client.post("/api/v1/import/products", files={"file": ("shelf.ndjson", ndjson)}, headers=API_KEY_HEADERS)
+    assert response.json()["data"]["imported"] == 1
+    assert closed == ["shelf.ndjson"]
+
+
+def test_unknown_collection_is_a_bad_request(client):
+    response = client.post("/api/v1/import/orders", content=b"{}\n", headers=API_KEY_HEADERS)
+    assert response.status_code == 400
@@ -0,0 +1,148 @@
+"""Job manager cancellation, expiry and spool cleanup, and job result downloads"""
+import asyncio
+import os
+import tempfile
+import time
+
+from conftest import API_KEY_HEADERS
+from jobs import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, FileResult, Job, JobManager
+
+
+async def settle(job, steps=100):
+    for _ in range(steps):
+        if job.finished:
+            return
+        await asyncio.sleep(0)
+    raise AssertionError(f"job is still {job.status}")
+
+
+async def spooling(job):
+    """Write a spool file, then work until cancelled or told to stop"""
+    path = job.spool("out.ndjson")
+    with open(path, "w") as f:
+        f.write("{}\n")
+    while not job.params.get("stop"):
+        await job.checkpoint()
+    if job.params.get("fail"):
+        raise ValueError("boom")
+    return FileResult(path, "application/x-ndjson", os.path.getsize(path))
+
+
+def make_manager(**kwargs):
+    manager = JobManager(**kwargs)
+    manager.register("spool", spooling)
+    return manager
+
+
+def test_cancelling_a_queued_job_skips_it_and_removes_its_input():
+    async def run():
+        manager = make_manager(workers=1)
+        await manager.start()
+        first = manager.submit("spool")
+        await asyncio.sleep(0)
+        queued = manager.submit("spool", spool_dir=tempfile.mkdtemp())
+        spool_dir = queued.spool_dir
+        assert (first.status, queued.status) == (RUNNING, QUEUED)
+        assert manager.cancel(queued.id).status == CANCELLED
+        assert not os.path.exists(spool_dir) and queued.spool_dir is None
+        first.params["stop"] = True
+        await settle(first)
+        # The worker picked the cancelled job off the queue without running it
+        await asyncio.sleep(0)
+        assert first.status == SUCCEEDED and queued.started_at is None
+        await manager.stop()
+    asyncio.run(run())
+
+
+def test_cancelling_a_running_job_discards_its_spool():
+    async def run():
+        manager = make_manager(workers=1)
+        await manager.start()
+        job = manager.submit("spool")
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        spool_dir = job.spool_dir
+        assert job.status == RUNNING and os.path.isdir(spool_dir)
+        manager.cancel(job.id)
+        assert job.message == "Cancellation requested"
+        await settle(job)
+        assert job.status == CANCELLED and job.result is None and not os.path.exists(spool_dir)
+        # Cancelling a finished job changes nothing
+        assert manager.cancel(job.id) is job and job.status == CANCELLED
+        await manager.stop()
+    asyncio.run(run())
+
+
+def test_failed_jobs_report_the_error_and_discard_their_spool():
+    async def run():
+        manager = make_manager()
+        await manager.start()
+        job = manager.submit("spool", {"stop": True, "fail": True})
+        await settle(job)
+        assert job.status == FAILED and job.error == "boom" and job.spool_dir is None
+        await manager.stop()
+    asyncio.run(run())
+
+
+def test_finished_jobs_expire_with_their_spool(monkeypatch):
+    async def run():
+        manager = make_manager(retention=60)
+        await manager.start()
+        job = manager.submit("spool", {"stop": True})
+        await settle(job)
+        assert job.status == SUCCEEDED and os.path.exists(job.result.path)
+        path = job.result.path
+        running = manager.submit("spool")
+        await asyncio.sleep(0)
+        now = time.time()
+        monkeypatch.setattr(time, "time", lambda: now + 30)
+        assert manager.get(job.id) is job
+        monkeypatch.setattr(time, "time", lambda: now + 120)
+        # Only finished jobs expire
+        assert manager.get(job.id) is None and manager.get(running.id) is running
+        assert not os.path.exists(path)
+        await manager.stop()
+        assert running.status == CANCELLED and manager.list() == []
+    asyncio.run(run())
+
+
+def test_oldest_finished_jobs_are_dropped_beyond_max_jobs():
+    async def run():
+        manager = make_manager(max_jobs=2)
+        await manager.start()
+        jobs = [manager.submit("spool", {"stop": True}) for _ in range(3)]
+        for job in jobs:
+            await settle(job)
+        paths = [job.result.path for job in jobs]
+        assert manager.list() == [jobs[2], jobs[1]]
+        assert [os.path.exists(path) for path in paths] == [False, True, True]
+        # Stopping the manager removes the spools of the jobs it still holds
+        await manager.stop()
+        assert not any(os.path.exists(path) for path in paths)
+    asyncio.run(run())
+
+
+def test_result_filename_follows_the_media_type(app_module):
+    job = Job("export", {"collection": "orders"})
+    name = lambda media_type: app_module.result_filename(job, FileResult("x", media_type, 0))
+    assert name("application/x-ndjson") == f"orders-{job.id[:8]}.ndjson"
+    assert name("application/vnd.apache.parquet").endswith(".parquet")
+    assert name("application/vnd.apache.arrow.stream; charset=binary").endswith(".arrows")
+    assert name("application/octet-stream").endswith(".bin")
+
+
+def test_export_job_result_download(client):
+    response = client.post(
+        "/api/v1/jobs", headers=API_KEY_HEADERS,
+        json={"type": "export", "params": {"collection": "orders", "fields": ["id"]}},
+    )
+    assert response.status_code == 202
+    status_url, result_url = response.json()["data"]["status_url"], response.json()["data"]["result_url"]
+    for _ in range(50):
+        if client.get(status_url, headers=API_KEY_HEADERS).json()["data"]["status"] == SUCCEEDED:
+            break
+    response = client.get(result_url, headers=API_KEY_HEADERS)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert ".ndjson" in response.headers["content-disposition"]
+    assert response.text.splitlines() == ['{"id":"ORD-001"}', '{"id":"ORD-002"}', '{"id":"ORD-003"}']
@@ -0,0 +1,214 @@
+"""JWT verification against a local JWKS file"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from jwt_auth import InvalidToken, JWTVerifier
+
+AUDIENCE = "api-data-fetcher"
+SECRET = b"s" * 32
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode("ascii").rstrip("=")
+
+
+def rsa_jwk(private_key, kid):
+    numbers = private_key.public_key().public_numbers()
+    to_bytes = lambda n: n.to_bytes((n.bit_length() + 7) // 8, "big")
+    return {"kty": "RSA", "kid": kid, "n": b64url(to_bytes(numbers.n)), "e": b64url(to_bytes(numbers.e))}
+
+
+@pytest.fixture(scope="module")
+def rsa_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture
+def jwks_file(tmp_path, rsa_key):
+    path = tmp_path / "jwks.json"
+    keys = [rsa_jwk(rsa_key, "rsa-1"), {"kty": "oct", "kid": "hmac-1", "k": b64url(SECRET)}]
+    path.write_text(json.dumps({"keys": keys}))
+    return path
+
+
+@pytest.fixture
+def verifier(jwks_file):
+    return JWTVerifier(str(jwks_file), audience=AUDIENCE, issuer="https://issuer", leeway=5)
+
+
+def claims(**overrides):
+    now = int(time.time())
+    values = {"sub": "alice", "aud": AUDIENCE, "iss": "https://issuer", "iat": now, "exp": now + 300}
+    values.update(overrides)
+    return {name: value for name, value in values.items() if value is not None}
+
+
+def rs256(rsa_key, kid="rsa-1", **overrides):
+    return jwt.encode(claims(**overrides), rsa_key, algorithm="RS256", headers={"kid": kid})
+
+
+def hs256(secret=SECRET, kid="hmac-1", **overrides):
+    return jwt.encode(claims(**overrides), secret, algorithm="HS256", headers={"kid": kid} if kid else None)
+
+
+def test_valid_tokens_are_verified_once(verifier, rsa_key):
+    token = rs256(rsa_key)
+    assert verifier.verify(token)["sub"] == "alice"
+    assert verifier.verify(token)["sub"] == "alice"
+    assert verifier.verify(hs256())["sub"] == "alice"
+    assert verifier.verifications == 2
+
+
+def test_bad_signatures_are_rejected(verifier, rsa_key):
+    header, payload, signature = rs256(rsa_key).split(".")
+    forged_payload = b64url(json.dumps(claims(sub="mallory")).encode())
+    other_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    for token in (
+        f"{header}.{forged_payload}.{signature}",
+        f"{header}.{payload}.{signature[:-4]}AAAA",
+        f"{header}.{payload}.",
+        rs256(other_key),
+        hs256(secret=b"x" * 32),
+    ):
+        with pytest.raises(InvalidToken):
+            verifier.verify(token)
+
+
+def test_cached_signature_is_bound_to_its_token(verifier, rsa_key):
+    header, payload, signature = rs256(rsa_key).split(".")
+    verifier.verify(f"{header}.{payload}.{signature}")
+    forged_payload = b64url(json.dumps(claims(sub="mallory")).encode())
+    with pytest.raises(InvalidToken):
+        verifier.verify(f"{header}.{forged_payload}.{signature}")
+
+
+def test_algorithm_confusion_is_rejected(verifier, rsa_key):
+    public_pem = rsa_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    # HMAC "signed" with the RSA public key, claiming the RSA key's kid
+    header = b64url(json.dumps({"alg": "HS256", "kid": "rsa-1", "typ": "JWT"}).encode())
+    payload = b64url(json.dumps(claims()).encode())
+    signature = b64url(hmac.new(public_pem, f"{header}.{payload}".encode(), hashlib.sha256).digest())
+    for token in (
+        f"{header}.{payload}.{signature}",
+        # alg none, with and without a signature
+        b64url(json.dumps({"alg": "none"}).encode()) + f".{payload}.",
+        b64url(json.dumps({"alg": "none", "kid": "hmac-1"}).encode()) + f".{payload}.{signature}",
+        # An RSA token claiming the symmetric key
+        rs256(rsa_key, kid="hmac-1"),
+    ):
+        with pytest.raises(InvalidToken):
+            verifier.verify(token)
+
+
+def test_expiry_and_not_before(verifier, rsa_key):
+    now = int(time.time())
+    with pytest.raises(InvalidToken):
+        verifier.verify(rs256(rsa_key, exp=now - 10))
+    # Within the leeway
+    assert verifier.verify(rs256(rsa_key, exp=now - 2))
+    with pytest.raises(InvalidToken):
+        verifier.verify(rs256(rsa_key, exp=None))
+    with pytest.raises(InvalidToken):
+        verifier.verify(rs256(rsa_key, nbf=now + 60))
+    token = rs256(rsa_key, nbf=now + 3)
+    assert verifier.verify(token)
+    # Tokens that are not valid yet without the leeway are not cached
+    assert verifier.cache.get(token.rsplit(".", 1)[1]) is None
+
+
+def test_cached_token_expires(verifier, rsa_key, monkeypatch):
+    now = time.time()
+    token = rs256(rsa_key, exp=int(now) + 60)
+    verifier.verify(token)
+    monkeypatch.setattr(time, "time", lambda: now + 120)
+    with pytest.raises(InvalidToken):
+        verifier.verify(token)
+
+
+def test_audience_and_issuer(verifier, rsa_key):
+    assert verifier.verify(rs256(rsa_key, aud=["other", AUDIENCE]))
+    for overrides in ({"aud": "other"}, {"aud": None}, {"iss": "https://elsewhere"}, {"iss": None}):
+        with pytest.raises(InvalidToken):
+            verifier.verify(rs256(rsa_key, **overrides))
+
+
+def test_key_selection_by_kid(tmp_path, verifier, rsa_key):
+    with pytest.raises(InvalidToken):
+        verifier.verify(rs256(rsa_key, kid="unknown"))
+    # Without a kid, the only key of the matching type is used
+    assert verifier.verify(hs256(kid=None))
+    path = tmp_path / "two.json"
+    oct_keys = [{"kty": "oct", "kid": kid, "k": b64url(secret)} for kid, secret in (("a", SECRET), ("b", b"t" * 32))]
+    path.write_text(json.dumps({"keys": oct_keys}))
+    two = JWTVerifier(str(path), audience=AUDIENCE)
+    assert two.verify(hs256(kid="a"))
+    assert two.verify(hs256(secret=b"t" * 32, kid="b"))
+    with pytest.raises(InvalidToken):
+        two.verify(hs256(kid=None))
+    with pytest.raises(InvalidToken):
+        two.verify(hs256(kid="b"))
+
+
+def test_weak_or_unusable_keys_are_refused(tmp_path):
+    weak_rsa = rsa.generate_private_key(public_exponent=65537, key_size=1024)
+    for key in (
+        rsa_jwk(weak_rsa, "weak"),
+        {"kty": "oct", "k": b64url(b"short")},
+        {"kty": "oct", "k": b64url(SECRET), "use": "enc"},
+        {"kty": "oct", "k": b64url(SECRET), "alg": "RS256"},
+        {"kty": "EC", "crv": "P-256", "x": "", "y": ""},
+    ):
+        path = tmp_path / "jwks.json"
+        path.write_text(json.dumps({"keys": [key]}))
+        with pytest.raises(ValueError):
+            JWTVerifier(str(path), audience=AUDIENCE)
+
+
+def test_rotated_jwks_is_picked_up(jwks_file, rsa_key):
+    verifier = JWTVerifier(str(jwks_file), audience=AUDIENCE, refresh_interval=0)
+    token = hs256()
+    assert verifier.verify(token)
+    jwks_file.write_text(json.dumps({"keys": [rsa_jwk(rsa_key, "rsa-1")]}))
+    stat = os.stat(jwks_file)
+    os.utime(jwks_file, (stat.st_atime, stat.st_mtime + 10))
+    with pytest.raises(InvalidToken):
+        verifier.verify(token)
+    assert verifier.verify(rs256(rsa_key))
+
+
+def test_bearer_endpoints_accept_jwts(app_module, client, verifier, rsa_key, monkeypatch):
+    monkeypatch.setattr(app_module, "JWT", verifier)
+    headers = {"authorization": f"Bearer {rs256(rsa_key)}"}
+    response = client.get("/api/v1/auth/bearer-only", headers=headers)
+    assert response.status_code == 200 and response.json()["subject"] == "alice"
+    assert client.get("/api/v1/data", headers=headers).json()["auth_method"] == "bearer"
+    response = client.get("/api/v1/auth/bearer-only", headers={"authorization": "Bearer demo-token-456"})
+    assert response.json()["token"] == "demo-token..."
+    bad = {"authorization": f"Bearer {rs256(rsa_key, aud='other')}"}
+    assert client.get("/api/v1/auth/bearer-only", headers=bad).status_code == 401
+
+
+def test_rotation_revokes_tokens_through_verify_any_auth(app_module, client, jwks_file, rsa_key, monkeypatch):
+    verifier = JWTVerifier(str(jwks_file), audience=AUDIENCE, issuer="https://issuer", refresh_interval=0)
+    monkeypatch.setattr(app_module, "JWT", verifier)
+    headers = {"authorization": f"Bearer {hs256()}"}
+    for _ in range(2):
+        assert client.get("/api/v1/data", headers=headers).status_code == 200
+    assert verifier.verifications == 1
+    # The symmetric key is rotated out: its tokens are refused on the next request
+    jwks_file.write_text(json.dumps({"keys": [rsa_jwk(rsa_key, "rsa-1")]}))
+    stat = os.stat(jwks_file)
+    os.utime(jwks_file, (stat.st_atime, stat.st_mtime + 10))
+    assert client.get("/api/v1/data", headers=headers).status_code == 401
+    assert client.get("/api/v1/data", headers={"authorization": f"Bearer {rs256(rsa_key)}"}).status_code == 200
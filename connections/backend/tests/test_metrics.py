@@ -0,0 +1,21 @@
+"""Per-route request metrics"""
+from conftest import API_KEY_HEADERS
+
+
+def route_count(app_module, route):
+    values = app_module.REQUEST_METRICS.requests.values
+    return sum(count for labels, count in values.items() if labels[0] == route)
+
+
+def test_conditional_get_of_a_compressed_variant_keeps_its_route(app_module, client, compress_everything):
+    headers = {**API_KEY_HEADERS, "accept-encoding": "gzip"}
+    first = client.get("/api/v1/products", headers=headers)
+    etag = first.headers["etag"]
+    assert first.headers["content-encoding"] == "gzip" and etag.endswith('-gzip"')
+
+    before = route_count(app_module, "/api/v1/products")
+    unmatched = route_count(app_module, "unmatched")
+    response = client.get("/api/v1/products", headers={**headers, "if-none-match": etag})
+    assert response.status_code == 304 and response.headers["etag"] == etag
+    assert route_count(app_module, "/api/v1/products") == before + 1
+    assert route_count(app_module, "unmatched") == unmatched
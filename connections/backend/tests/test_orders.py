@@ -0,0 +1,86 @@
+"""Order listing: created_at ranges and product expansion"""
+import json
+
+import pytest
+
+from conftest import API_KEY_HEADERS
+
+
+def order_ids(client, **params):
+    response = client.get("/api/v1/orders", params=params, headers=API_KEY_HEADERS)
+    assert response.status_code == 200, response.text
+    data = response.json()["data"]
+    assert data["total"] == len(data["items"])
+    return [order["id"] for order in data["items"]]
+
+
+def test_created_at_bounds_are_exclusive(client):
+    # Mock orders were created at 2026-01-15T10:00Z, 2026-01-20T14:30Z and 2026-01-25T09:00Z
+    assert order_ids(client, created_after="2026-01-15T10:00:00Z") == ["ORD-002", "ORD-003"]
+    assert order_ids(client, created_before="2026-01-25T09:00:00Z") == ["ORD-001", "ORD-002"]
+    assert order_ids(client, created_after="2026-01-15T10:00:00Z", created_before="2026-01-25T09:00:00Z") == ["ORD-002"]
+    assert order_ids(client, created_after="2026-01-20T14:30:00Z", created_before="2026-01-20T14:30:00Z") == []
+    assert order_ids(client, created_after="2026-01-15T09:59:59Z") == ["ORD-001", "ORD-002", "ORD-003"]
+
+
+def test_created_at_accepts_dates_offsets_and_naive_datetimes(client):
+    # A bare date is midnight UTC
+    assert order_ids(client, created_after="2026-01-20") == ["ORD-002", "ORD-003"]
+    assert order_ids(client, created_before="2026-01-20") == ["ORD-001"]
+    # Offsets are converted to UTC before comparing: 15:30+01:00 is the 14:30Z of ORD-002
+    assert order_ids(client, created_after="2026-01-20T15:30:00+01:00") == ["ORD-003"]
+    assert order_ids(client, created_before="2026-01-20T15:30:01+01:00") == ["ORD-001", "ORD-002"]
+    assert order_ids(client, created_after="2026-01-20T14:29:59") == ["ORD-002", "ORD-003"]
+    # Combined with the index filters and sorting
+    assert order_ids(client, created_after="2026-01-01", user_id="123", sort="-created_at") == ["ORD-003", "ORD-001"]
+
+
+@pytest.mark.parametrize("params", [
+    {"created_after": "yesterday"},
+    {"created_before": "2026-13-01"},
+    {"created_after": "2026-01-20T25:00:00Z"},
+])
+def test_invalid_dates_are_rejected(client, params):
+    response = client.get("/api/v1/orders", params=params, headers=API_KEY_HEADERS)
+    assert response.status_code == 400
+    assert next(iter(params)) in response.json()["error"]
+
+
+def test_expand_items_replaces_product_ids(app_module, client):
+    response = client.get("/api/v1/orders", params={"expand": "items", "user_id": "123"}, headers=API_KEY_HEADERS)
+    assert response.status_code == 200
+    orders = response.json()["data"]["items"]
+    assert [[item["id"] for item in order["items"]] for order in orders] == [[1, 2], [5]]
+    assert orders[0]["items"][0] == app_module.PRODUCTS.get(1)
+    # The stored order keeps its product ids
+    assert app_module.ORDERS.get("ORD-001")["items"] == [1, 2]
+    response = client.get(
+        "/api/v1/orders", params={"expand": "items", "fields": "id,items"},
+        headers={**API_KEY_HEADERS, "accept": "application/x-ndjson"},
+    )
+    orders = [json.loads(line) for line in response.text.splitlines() if line]
+    assert [set(order) for order in orders] == [{"id", "items"}] * 3
+    assert orders[1]["items"] == [app_module.PRODUCTS.get(3)]
+
+
+def test_expand_marks_missing_products_and_follows_product_writes(app_module, client):
+    order = {"id": "ORD-TEST", "user_id": "999", "status": "pending", "total": 1.0,
+             "items": [1, 424242], "created_at": "2026-02-01T00:00:00Z"}
+    app_module.ORDERS.insert(order)
+    name = app_module.PRODUCTS.get(1)["name"]
+    params = {"expand": "items", "user_id": "999"}
+    try:
+        items = client.get("/api/v1/orders", params=params, headers=API_KEY_HEADERS).json()["data"]["items"][0]["items"]
+        assert items[0]["name"] == name and items[1] == {"id": 424242, "missing": True}
+        # A product write invalidates the cached expanded listing
+        app_module.PRODUCTS.update(1, {"name": "Renamed"})
+        items = client.get("/api/v1/orders", params=params, headers=API_KEY_HEADERS).json()["data"]["items"][0]["items"]
+        assert items[0]["name"] == "Renamed"
+    finally:
+        app_module.PRODUCTS.update(1, {"name": name})
+        app_module.ORDERS.delete("ORD-TEST")
+
+
+def test_unsupported_expand_is_rejected(client):
+    response = client.get("/api/v1/orders", params={"expand": "user"}, headers=API_KEY_HEADERS)
+    assert response.status_code == 400
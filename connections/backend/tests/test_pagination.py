@@ -0,0 +1,106 @@
+"""Keyset pagination and streamed listings while records are written"""
+import json
+
+from conftest import API_KEY_HEADERS
+from repository import Range, Repository
+
+
+def make_repository(count=50, compact=False):
+    repository = Repository(
+        "items", indexes=("group",), sortable=("id", "price"), ranges=("price",), compact=compact
+    )
+    repository.load({"id": i, "group": "ab"[i % 2], "price": i % 7} for i in range(count))
+    return repository
+
+
+def page_through(repository, filters=None, sort=None, limit=7, between_pages=None):
+    seen, after = [], None
+    while True:
+        records, after = repository.page(filters, sort=sort, limit=limit, after=after)
+        seen.extend(record["id"] for record in records)
+        if after is None:
+            return seen
+        if between_pages:
+            between_pages(len(seen))
+
+
+def test_pages_cover_every_record_once():
+    for compact in (False, True):
+        repository = make_repository(compact=compact)
+        for sort in (None, "price", "-price", "id"):
+            seen = page_through(repository, sort=sort)
+            assert sorted(seen) == list(range(50))
+            expected = [r["id"] for r in repository.page(sort=sort)[0]]
+            assert seen == expected
+
+
+def test_cursor_is_stable_under_inserts_and_deletes():
+    repository = make_repository()
+    original = set(range(50))
+    deleted = set()
+    next_id = iter(range(1000, 2000))
+
+    def write(position):
+        # Insert records before and after the cursor and delete one not yet returned
+        repository.insert({"id": next(next_id), "group": "a", "price": 0})
+        repository.insert({"id": next(next_id), "group": "a", "price": 6})
+        victim = max(original - deleted)
+        repository.delete(victim)
+        deleted.add(victim)
+
+    seen = page_through(repository, sort="price", between_pages=write)
+    assert len(seen) == len(set(seen)), "a record was returned twice"
+    # Every original record still present at the end was returned exactly once
+    assert original - deleted <= set(seen)
+    assert not deleted & set(seen[-7:])
+
+
+def test_cursor_is_stable_under_updates_of_the_sort_field():
+    repository = make_repository()
+    moved = set()
+
+    def write(position):
+        # Move a record behind the cursor ahead of it and one ahead of it behind:
+        # only the moved records may be missed or repeated
+        last = repository.page(sort="price")[0]
+        ahead, behind = last[-1]["id"], last[0]["id"]
+        repository.update(ahead, {"price": -1})
+        repository.update(behind, {"price": 99})
+        moved.update((ahead, behind))
+
+    seen = page_through(repository, sort="price", between_pages=write)
+    untouched = [record_id for record_id in seen if record_id not in moved]
+    assert sorted(untouched) == sorted(set(range(50)) - moved)
+
+
+def test_ids_are_in_insertion_order():
+    repository = make_repository()
+    repository.update(0, {"group": "b"})
+    repository.update(1, {"group": "a"})
+    for filters in ({"group": "a"}, {"group": "b"}, {"price": Range(1, 5)}, {"group": "a", "price": Range(None, 3)}):
+        expected = [r["id"] for r in repository.page(filters)[0]]
+        assert repository.ids(filters) == expected
+
+
+def test_unsorted_ndjson_matches_json_listing(client):
+    listing = client.get("/api/v1/products", headers=API_KEY_HEADERS).json()["data"]["items"]
+    response = client.get(
+        "/api/v1/products", headers={**API_KEY_HEADERS, "accept": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    assert "x-next-cursor" not in response.headers
+    streamed = [json.loads(line) for line in response.text.splitlines()]
+    assert streamed == listing
+
+
+def test_streamed_ndjson_skips_records_deleted_mid_stream(app_module, monkeypatch):
+    repository = make_repository(count=1200)
+    monkeypatch.setattr(app_module, "NDJSON_CHUNK_SIZE", 500)
+    chunks = app_module.iter_ndjson_ids(repository, repository.ids(), ["id"])
+    first = next(chunks)
+    assert first.count(b"\n") == 500
+    repository.delete(700)
+    repository.insert({"id": 5000, "group": "a", "price": 1})
+    rest = b"".join(chunks)
+    ids = [json.loads(line)["id"] for line in (first + rest).splitlines()]
+    assert ids == [i for i in range(1200) if i != 700]
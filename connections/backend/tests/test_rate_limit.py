@@ -0,0 +1,52 @@
+"""Token buckets and idle-bucket pruning of the admission stores"""
+import sqlite3
+
+from rate_limit import IDLE_BUCKET_TTL, PRIORITY_DEFAULT, Limit, MemoryBucketStore, SQLiteBucketStore
+
+LIMIT = Limit(rate=1.0, burst=2, queue=1)
+
+
+def test_bucket_queues_then_rejects():
+    store = MemoryBucketStore()
+    decisions = [store.acquire([("a", LIMIT)], now=0.0) for _ in range(4)]
+    assert [d.admitted for d in decisions] == [True, True, True, False]
+    assert decisions[2].delay == 1.0 and decisions[3].retry_after > 0
+
+
+def test_sqlite_store_prunes_idle_buckets_on_write(tmp_path):
+    store = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    start = store._last_prune
+    store.acquire([("idle", LIMIT)], now=start)
+    store.acquire([("busy", LIMIT)], now=start + IDLE_BUCKET_TTL - 1)
+    keys = lambda: {row[0] for row in store._connect().execute("SELECT key FROM buckets")}
+    assert keys() == {"idle", "busy"}
+    store.acquire([("busy", LIMIT)], now=start + IDLE_BUCKET_TTL + 2)
+    assert keys() == {"busy"}
+
+
+def test_sqlite_store_sheds_load_when_locked(tmp_path):
+    path = str(tmp_path / "buckets.db")
+    store = SQLiteBucketStore(path, timeout=0.05)
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        decision = store.acquire([("a", LIMIT)])
+    finally:
+        other.execute("ROLLBACK")
+    assert not decision.admitted and decision.retry_after == 0.05
+    assert not store._connect().in_transaction
+    assert store.acquire([("a", LIMIT)]).admitted
+
+
+def test_bulk_routes_have_no_shared_bucket_and_batch_is_default(app_module):
+    admission = app_module.ADMISSION
+    assert admission.priority("/api/v1/batch") == PRIORITY_DEFAULT
+    assert [key for key, _ in admission.buckets("/api/v1/import/{collection}", "c")] == ["cred:bulk:c"]
+    assert [key for key, _ in admission.buckets("/api/v1/batch", "c")] == ["cred:default:c", "route:/api/v1/batch"]
+
+
+def test_env_limit(app_module, monkeypatch):
+    monkeypatch.setenv("SOME_RPS", "20")
+    assert app_module.env_limit("SOME_RPS", "1", queue=3) == Limit(rate=20.0, burst=40, queue=3)
+    monkeypatch.setenv("SOME_RPS", "")
+    assert app_module.env_limit("SOME_RPS", "1", queue=3) is None
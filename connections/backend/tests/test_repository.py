@@ -0,0 +1,124 @@
+"""Hash and range index maintenance, Range bounds and record identity of the repository"""
+import random
+
+import pytest
+
+from repository import Range, Repository, get_field
+
+
+def make_repository(compact=False):
+    return Repository(
+        "items", indexes=("group", "meta.color"), sortable=("price",), ranges=("price",), compact=compact
+    )
+
+
+def assert_indexes_consistent(repository):
+    """Every index agrees with a rebuild from the stored records"""
+    records = {record["id"]: record for record in repository.all()}
+    for field, index in repository._indexes.items():
+        expected = {}
+        for record_id, record in records.items():
+            value = get_field(record, field)
+            if value is not None:
+                expected.setdefault(value, set()).add(record_id)
+        assert {value: set(bucket) for value, bucket in index.items()} == expected, field
+    for field, entries in repository._ranges.items():
+        assert entries == sorted(entries)
+        assert [(value, record_id) for value, _, record_id in entries] == sorted(
+            ((get_field(record, field), record_id) for record_id, record in records.items()
+             if get_field(record, field) is not None),
+            key=lambda pair: (pair[0], repository._seq[pair[1]]),
+        ), field
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_indexes_follow_random_writes(compact):
+    rng = random.Random(7)
+    repository = make_repository(compact)
+    next_id = 0
+    for _ in range(2000):
+        op = rng.random()
+        ids = repository.ids()
+        if op < 0.4 or not ids:
+            record = {"id": next_id, "group": rng.choice("abc"), "price": rng.choice([None, 1, 2, 2.5, 3])}
+            if rng.random() < 0.7:
+                record["meta"] = {"color": rng.choice(["red", "blue"])}
+            repository.insert(record)
+            next_id += 1
+        elif op < 0.8:
+            changes = rng.choice([
+                {"group": rng.choice("abc")},
+                {"price": rng.choice([None, 1, 2, 4])},
+                {"meta": {"color": rng.choice(["red", "green"])}},
+                {"meta": None},
+            ])
+            repository.update(rng.choice(ids), changes)
+        else:
+            repository.delete(rng.choice(ids))
+    assert_indexes_consistent(repository)
+    # Indexed and scanned answers agree
+    for filters in ({"group": "a"}, {"meta.color": "red", "group": "b"}, {"price": Range(1, 4)}):
+        scanned = [r["id"] for r in repository.all() if all(
+            (v.matches(get_field(r, f)) if isinstance(v, Range) else get_field(r, f) == v) for f, v in filters.items()
+        )]
+        assert repository.ids(filters) == scanned
+        assert repository.count(filters) == len(scanned)
+
+
+def test_updates_keep_bucket_order_and_drop_empty_buckets():
+    repository = make_repository()
+    repository.load({"id": i, "group": "a", "price": i} for i in range(4))
+    repository.update(1, {"price": 10})
+    assert list(repository.lookup("group", "a")) == [0, 1, 2, 3]
+    repository.update(2, {"group": "b"})
+    repository.update(2, {"group": "a"})
+    assert repository.ids({"group": "a"}) == [0, 1, 2, 3]
+    repository.update(0, {"group": None})
+    repository.delete(3)
+    repository.update(1, {"group": "c"})
+    repository.update(2, {"group": "c"})
+    assert "a" not in repository._indexes["group"]
+    assert_indexes_consistent(repository)
+
+
+def test_range_bounds_are_exclusive():
+    repository = make_repository()
+    repository.load({"id": i, "price": price} for i, price in enumerate([1, 2, 2, 3, None, 4]))
+    assert repository.ids({"price": Range(2, 4)}) == [3]
+    assert repository.ids({"price": Range(1, None)}) == [1, 2, 3, 5]
+    assert repository.ids({"price": Range(None, 2)}) == [0]
+    assert repository.ids({"price": Range(2, 2)}) == []
+    assert repository.count({"price": Range(1.5, 3.5)}) == 3
+    assert not Range(1, 3).matches(None)
+
+
+def test_get_returns_the_stored_record_until_it_is_replaced():
+    repository = make_repository()
+    record = {"id": 1, "group": "a", "price": 5}
+    repository.insert(record)
+    # Plain repositories hand out the stored dict itself, without a copy
+    assert repository.get(1) is record
+    updated = repository.update(1, {"price": 6})
+    assert repository.get(1) is updated and updated == {"id": 1, "group": "a", "price": 6}
+    # Updates replace the dict, so earlier readers keep a consistent record
+    assert record["price"] == 5
+
+
+def test_compact_get_returns_a_private_copy():
+    repository = make_repository(compact=True)
+    repository.insert({"id": 1, "group": "a", "meta": {"color": "red"}})
+    record = repository.get(1)
+    record["group"] = "z"
+    record["meta"]["color"] = "blue"
+    assert repository.get(1) == {"id": 1, "group": "a", "meta": {"color": "red"}}
+    assert repository.ids({"group": "a"}) == [1]
+
+
+def test_duplicate_keys_are_rejected_without_partial_writes():
+    repository = make_repository()
+    repository.insert({"id": 1, "group": "a"})
+    with pytest.raises(KeyError):
+        repository.insert({"id": 1, "group": "b"})
+    with pytest.raises(KeyError):
+        repository.insert_many([{"id": 2, "group": "b"}, {"id": 1, "group": "b"}])
+    assert repository.ids() == [1] and repository.ids({"group": "b"}) == []
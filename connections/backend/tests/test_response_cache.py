@@ -0,0 +1,32 @@
+"""Size bounds of the response cache and the TTL cache behind it"""
+from auth_store import TTLCache
+
+
+def test_ttl_cache_keeps_total_weight_within_bound():
+    cache = TTLCache(maxsize=100, ttl=60, maxweight=12, weigh=len)
+    for key in "abcd":
+        cache.set(key, b"xxx")
+    assert cache.weight == 12 and cache.get("a") == b"xxx"
+    cache.set("e", b"xxx")
+    # "b" was least recently used once "a" was read
+    assert cache.get("b") is None and cache.weight == 12
+    cache.set("e", b"x")
+    assert cache.weight == sum(len(cache.get(key) or b"") for key in "acde")
+    cache.set("huge", b"x" * 13)
+    assert cache.get("huge") is None
+    cache.clear()
+    assert cache.weight == 0 and len(cache) == 0
+
+
+def test_large_bodies_are_served_but_not_cached(app_module, client, monkeypatch):
+    from conftest import API_KEY_HEADERS
+    cache = app_module.RESPONSE_CACHE
+    cache.entries.clear()
+    monkeypatch.setattr(cache, "max_entry_bytes", 100)
+    response = client.get("/api/v1/products", headers=API_KEY_HEADERS)
+    assert response.status_code == 200 and len(response.content) > 100
+    assert "etag" in response.headers
+    assert len(cache.entries) == 0
+    monkeypatch.setattr(cache, "max_entry_bytes", 1 << 20)
+    client.get("/api/v1/products", headers=API_KEY_HEADERS)
+    assert len(cache.entries) == 1 and cache.entries.weight > 100
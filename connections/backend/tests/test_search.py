@@ -0,0 +1,98 @@
+"""BM25 ranking and incremental index maintenance of the search engine"""
+import math
+
+import pytest
+
+from repository import Repository
+from search_index import BM25Index, SearchEngine
+
+
+def make_engine():
+    products = Repository("products", indexes=("category",))
+    products.load([
+        {"id": 1, "name": "red widget", "description": "a small widget", "category": "tools"},
+        {"id": 2, "name": "blue gadget", "description": "widget compatible", "category": "toys"},
+        {"id": 3, "name": "green thing", "description": "nothing to see", "category": "tools"},
+    ])
+    users = Repository("users")
+    users.load([{"id": 10, "username": "widget_fan", "metadata": {"department": "sales"}}])
+    engine = SearchEngine()
+    engine.register("products", products, {"name": 2.0, "description": 1.0})
+    engine.register("users", users, {"username": 1.0, "metadata.department": 1.0})
+    return engine, products, users
+
+
+def keys(page):
+    return [(collection, record["id"]) for collection, record, _ in page]
+
+
+def test_bm25_scores_match_the_formula():
+    index = BM25Index(k1=1.2, b=0.75)
+    index.add("a", [("apple apple banana", 1.0)])
+    index.add("b", [("banana cherry", 1.0)])
+    index.add("c", [("cherry", 1.0)])
+    scores = index.score("apple banana")
+    avg = 6 / 3
+    idf = lambda df: math.log(1 + (3 - df + 0.5) / (df + 0.5))
+    bm25 = lambda tf, length: tf * 2.2 / (tf + 1.2 * (0.25 + 0.75 * length / avg))
+    assert scores["a"] == pytest.approx(idf(1) * bm25(2, 3) + idf(2) * bm25(1, 3))
+    assert scores["b"] == pytest.approx(idf(2) * bm25(1, 2))
+    assert "c" not in scores
+    # Repeated query terms count once; unknown terms and empty queries score nothing
+    assert index.score("apple apple banana") == scores
+    assert index.score("durian") == {} and index.score("") == {}
+
+
+def test_field_weights_rank_name_matches_first():
+    engine, _, _ = make_engine()
+    total, page = engine.search("widget")
+    assert total == 3
+    # A name match (weight 2) outranks a description match of the same term
+    assert keys(page)[0] == ("products", 1)
+    assert set(keys(page)) == {("products", 1), ("products", 2), ("users", 10)}
+    assert [score for _, _, score in page] == sorted((score for _, _, score in page), reverse=True)
+
+
+def test_pagination_and_unfiltered_fast_path_fetch_only_the_page(monkeypatch):
+    engine, products, users = make_engine()
+    _, everything = engine.search("widget", limit=10)
+    fetched = []
+    for repository in (products, users):
+        get = repository.get
+        monkeypatch.setattr(repository, "get", lambda record_id, get=get: fetched.append(record_id) or get(record_id))
+    total, page = engine.search("widget", offset=1, limit=1)
+    assert total == 3 and keys(page) == keys(everything)[1:2]
+    assert fetched == [keys(everything)[1][1]]
+    # accepts_id filters without fetching records
+    fetched.clear()
+    total, page = engine.search("widget", accepts_id=lambda collection, _: collection == "users")
+    assert total == 1 and keys(page) == [("users", 10)] and fetched == [10]
+
+
+def test_predicate_path_matches_the_fast_path():
+    engine, _, _ = make_engine()
+    accept_all = lambda collection, record: True
+    assert engine.search("widget", predicate=accept_all) == engine.search("widget")
+    total, page = engine.search("widget", predicate=lambda collection, record: record.get("category") == "toys")
+    assert total == 1 and keys(page) == [("products", 2)]
+    assert engine.search("widget", predicate=accept_all, offset=5) == (3, [])
+
+
+def test_index_follows_inserts_updates_and_deletes():
+    engine, products, users = make_engine()
+    products.insert({"id": 4, "name": "widget deluxe", "description": "widget widget"})
+    assert ("products", 4) in keys(engine.search("deluxe")[1])
+    products.update(1, {"name": "red sprocket"})
+    assert engine.search("sprocket")[0] == 1
+    total, page = engine.search("widget")
+    # Record 1 still matches through its description, but now ranks below the name matches
+    assert total == 4 and keys(page)[-1] in {("products", 1), ("users", 10)}
+    assert keys(page)[0] == ("products", 4)
+    users.update(10, {"metadata": {"department": "widgets"}})
+    assert engine.search("sales") == (0, [])
+    products.delete(2)
+    users.delete(10)
+    assert keys(engine.search("widget")[1]) == [("products", 4), ("products", 1)]
+    assert engine.search("gadget") == (0, [])
+    assert "gadget" not in engine.index._postings and len(engine.index) == 3
+    assert engine.index._total_length == pytest.approx(sum(engine.index._doc_lengths.values()))
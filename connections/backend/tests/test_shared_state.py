@@ -0,0 +1,131 @@
+"""Replication of repository writes between workers through the shared journal"""
+import asyncio
+import sqlite3
+
+import pytest
+
+from conftest import API_KEY_HEADERS
+from ingest import ingest, iter_lines, iter_ndjson_rows
+from repository import Repository
+from shared_state import SharedJournal
+
+
+def worker(path):
+    repositories = {"items": Repository("items", indexes=("group",))}
+    return repositories["items"], SharedJournal(path, repositories, timeout=5.0)
+
+
+def test_writes_replicate_between_workers(tmp_path):
+    path = str(tmp_path / "journal.db")
+    items_a, journal_a = worker(path)
+    items_b, journal_b = worker(path)
+
+    async def run():
+        async with journal_a.write():
+            items_a.insert({"id": 1, "group": "x"})
+        assert journal_b.sync() == 1
+        async with journal_b.write():
+            items_b.update(1, {"group": "y"})
+            items_b.insert({"id": 2, "group": "y"})
+        journal_a.sync()
+
+    asyncio.run(run())
+    assert items_a.get(1) == items_b.get(1) == {"id": 1, "group": "y"}
+    assert items_a.ids({"group": "y"}) == [1, 2]
+    assert journal_a.applied == journal_b.applied == 3
+
+
+def test_writes_outside_a_transaction_are_refused(tmp_path):
+    items, _ = worker(str(tmp_path / "journal.db"))
+    with pytest.raises(RuntimeError):
+        items.insert({"id": 1, "group": "x"})
+
+
+def test_waiting_for_the_write_lock_does_not_block_the_event_loop(tmp_path):
+    path = str(tmp_path / "journal.db")
+    items, journal = worker(path)
+    other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+
+    async def run():
+        # Another worker holds the write lock for a while
+        other.execute("BEGIN IMMEDIATE")
+        ticks = 0
+
+        async def write():
+            async with journal.write():
+                items.insert({"id": 1, "group": "x"})
+
+        task = asyncio.create_task(write())
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+            ticks += 1
+            # Reads (tailing the journal) keep working meanwhile
+            journal.sync()
+        assert not task.done()
+        other.execute("COMMIT")
+        await task
+        return ticks
+
+    assert asyncio.run(run()) == 10
+    assert items.get(1) == {"id": 1, "group": "x"}
+
+
+def test_failed_transaction_is_rolled_back(tmp_path):
+    path = str(tmp_path / "journal.db")
+    items, journal = worker(path)
+
+    async def run():
+        with pytest.raises(KeyError):
+            async with journal.write():
+                items.insert({"id": 1, "group": "x"})
+                raise KeyError("boom")
+        # Writes applied in memory before the error are still journaled
+        async with journal.write():
+            items.insert({"id": 2, "group": "x"})
+
+    asyncio.run(run())
+    replica, replica_journal = worker(path)
+    replica_journal.sync()
+    assert replica.ids() == [1, 2]
+
+
+def test_ingest_validates_outside_the_transaction(tmp_path):
+    items = Repository("items")
+    events = []
+
+    class Transaction:
+        async def __aenter__(self):
+            events.append("begin")
+
+        async def __aexit__(self, *exc):
+            events.append("commit")
+
+    def validate(row):
+        events.append("validate")
+        if "id" not in row:
+            raise ValueError("id is required")
+        return row
+
+    def prepare(row):
+        events.append("prepare")
+        return dict(row)
+
+    async def rows():
+        for line in (b'{"id": 1}\n{"name": "no id"}\n{"id": 1}\n{"id": 2}\n',):
+            yield line
+
+    report = asyncio.run(
+        ingest(iter_ndjson_rows(iter_lines(rows())), items, prepare, transaction=Transaction, validate=validate)
+    )
+    assert report.to_dict()["imported"] == 2 and report.failed == 2
+    assert events == ["validate"] * 4 + ["begin"] + ["prepare"] * 3 + ["commit"]
+
+
+def test_import_endpoint(client):
+    response = client.post(
+        "/api/v1/import/products",
+        headers={**API_KEY_HEADERS, "content-type": "application/x-ndjson"},
+        content=b'{"name": "Widget", "price": 9.5, "category": "Tools", "stock": 3}\n{"name": 5}\n',
+    )
+    data = response.json()["data"]
+    assert (data["received"], data["imported"], data["failed"]) == (2, 1, 1)
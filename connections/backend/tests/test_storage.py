@@ -0,0 +1,225 @@
+"""Write-ahead log, group commit and snapshots of the durable storage"""
+import asyncio
+import os
+import threading
+
+from repository import Repository
+from storage import CORRUPT_SUFFIX, WAL_HEADER, DurableStorage, WriteAheadLog, read_snapshot, write_snapshot
+
+
+def make_repositories(compact=False):
+    return {
+        "items": Repository("items", indexes=("group",), compact=compact),
+        "others": Repository("others", compact=compact),
+    }
+
+
+def open_storage(directory, compact=False, **options):
+    repositories = make_repositories(compact)
+    storage = DurableStorage(str(directory), repositories, group_window=0.0, **options)
+    restored = storage.restore()
+    storage.attach()
+    return storage, repositories, restored
+
+
+def contents(repositories):
+    return {name: sorted(repository.all(), key=lambda r: r["id"]) for name, repository in repositories.items()}
+
+
+def write_some(repositories, start=0, count=20):
+    items = repositories["items"]
+    for i in range(start, start + count):
+        items.insert({"id": i, "group": "ab"[i % 2], "tags": [i]})
+    items.update(start, {"group": "c"})
+    items.delete(start + 1)
+    repositories["others"].insert({"id": f"o{start}", "value": None})
+
+
+def test_replay_restores_every_write(tmp_path):
+    storage, repositories, restored = open_storage(tmp_path)
+    assert not restored
+    write_some(repositories)
+    storage.close()
+    expected = contents(repositories)
+
+    storage, replayed, _ = open_storage(tmp_path)
+    assert contents(replayed) == expected
+    assert replayed["items"].ids({"group": "c"}) == [0]
+    assert storage.wal.lsn == 23
+    # New writes continue the sequence
+    replayed["items"].insert({"id": 100, "group": "a"})
+    storage.close()
+    storage, again, _ = open_storage(tmp_path)
+    assert again["items"].get(100) == {"id": 100, "group": "a"}
+    assert storage.wal.lsn == 24
+    storage.close()
+
+
+def segment_files(directory):
+    return [path for _, path in WriteAheadLog(os.path.join(directory, "wal")).segments()]
+
+
+def test_crash_mid_entry_truncates_the_torn_tail(tmp_path):
+    storage, repositories, _ = open_storage(tmp_path)
+    write_some(repositories, count=5)
+    storage.close()
+    expected = contents(repositories)
+    (segment,) = segment_files(tmp_path)
+    size = os.path.getsize(segment)
+    # A crash in the middle of the next group commit leaves half an entry behind
+    with open(segment, "ab") as f:
+        f.write(WAL_HEADER.pack(100, 0, 9) + b"partial")
+
+    storage, recovered, _ = open_storage(tmp_path)
+    assert contents(recovered) == expected
+    assert os.path.getsize(segment) == size
+    recovered["items"].insert({"id": 50, "group": "a"})
+    storage.close()
+    storage, again, _ = open_storage(tmp_path)
+    assert again["items"].get(50) == {"id": 50, "group": "a"}
+    assert contents(again)["others"] == expected["others"]
+    storage.close()
+
+
+def test_corrupt_entry_ends_replay(tmp_path):
+    storage, repositories, _ = open_storage(tmp_path)
+    for i in range(3):
+        repositories["items"].insert({"id": i, "group": "a"})
+    storage.close()
+    (segment,) = segment_files(tmp_path)
+    with open(segment, "r+b") as f:
+        data = bytearray(f.read())
+        # Flip a byte in the last entry's payload: its crc no longer matches
+        data[-2] ^= 0xFF
+        f.seek(0)
+        f.write(data)
+
+    storage, recovered, _ = open_storage(tmp_path)
+    assert recovered["items"].ids() == [0, 1]
+    storage.close()
+
+
+def test_group_commit_keeps_lsn_order(tmp_path):
+    wal = WriteAheadLog(str(tmp_path), group_window=0.001, fsync=False)
+    wal.replay()
+    wal.open()
+
+    def writer(n):
+        for i in range(200):
+            wal.append(("items", "insert", (n, i), {"id": (n, i)}))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    async def wait_all():
+        await asyncio.gather(*(wal.wait_durable(lsn) for lsn in (1, 400, 800)))
+        return wal.durable_lsn
+
+    assert asyncio.run(wait_all()) == 800
+    wal.close()
+
+    replayed = list(WriteAheadLog(str(tmp_path)).replay())
+    assert [lsn for lsn, _ in replayed] == list(range(1, 801))
+    # Each writer's entries are logged in the order it appended them
+    for n in range(4):
+        assert [entry[2][1] for _, entry in replayed if entry[2][0] == n] == list(range(200))
+
+
+def test_snapshot_rotates_and_removes_covered_segments(tmp_path):
+    for compact in (False, True):
+        directory = tmp_path / ("compact" if compact else "plain")
+        storage, repositories, _ = open_storage(directory, compact=compact)
+        write_some(repositories, count=10)
+        storage.snapshot()
+        lsn, collections = read_snapshot(storage.snapshot_path)
+        assert lsn == storage.snapshot_lsn == 13
+        assert len(collections["items"]) == 9
+        write_some(repositories, start=10, count=10)
+        asyncio.run(storage.snapshot_async())
+        write_some(repositories, start=20, count=10)
+        storage.close()
+        expected = contents(repositories)
+
+        # Only the segment written after the last snapshot remains
+        (segment,) = segment_files(directory)
+        assert os.path.basename(segment) == f"wal-{27:020d}.log"
+        storage, restored, was_restored = open_storage(directory, compact=compact)
+        assert was_restored and storage.snapshot_lsn == 26
+        assert contents(restored) == expected
+        assert storage.wal.lsn == 39
+        storage.close()
+
+
+def test_replay_after_snapshot_is_idempotent(tmp_path):
+    storage, repositories, _ = open_storage(tmp_path)
+    write_some(repositories, count=5)
+    lsn = storage.wal.rotate()
+    # A snapshot taken after more writes than its lsn covers (as snapshot_async allows)
+    repositories["items"].update(2, {"group": "late"})
+    repositories["items"].delete(3)
+    write_snapshot(storage.snapshot_path, {n: list(r.all()) for n, r in repositories.items()}, lsn)
+    storage.close()
+    expected = contents(repositories)
+
+    storage, restored, _ = open_storage(tmp_path)
+    assert contents(restored) == expected
+    storage.close()
+
+
+def test_corrupt_middle_segment_sets_later_segments_aside(tmp_path):
+    storage, repositories, _ = open_storage(tmp_path)
+    items = repositories["items"]
+    for i in range(3):
+        items.insert({"id": i, "group": "a"})
+    storage.wal.rotate()
+    for i in range(3, 6):
+        items.insert({"id": i, "group": "a"})
+    storage.wal.rotate()
+    # Written on top of record 4, which the damaged segment will lose
+    items.update(4, {"group": "b"})
+    items.insert({"id": 6, "group": "a"})
+    storage.close()
+    first, middle, last = segment_files(tmp_path)
+    with open(middle, "r+b") as f:
+        data = bytearray(f.read())
+        data[-2] ^= 0xFF
+        f.seek(0)
+        f.write(data)
+
+    storage, recovered, _ = open_storage(tmp_path)
+    assert recovered["items"].ids() == [0, 1, 2, 3, 4]
+    assert recovered["items"].get(4)["group"] == "a"
+    assert storage.wal.lsn == 5
+    assert not os.path.exists(last) and os.path.exists(last + CORRUPT_SUFFIX)
+    # Writes continue the sequence from the last good entry
+    recovered["items"].insert({"id": 7, "group": "c"})
+    storage.close()
+    storage, again, _ = open_storage(tmp_path)
+    assert again["items"].ids() == [0, 1, 2, 3, 4, 7]
+    assert storage.wal.lsn == 6
+    storage.close()
+
+
+def test_snapshot_async_captures_rows_before_later_updates(tmp_path):
+    storage, repositories, _ = open_storage(tmp_path)
+    items = repositories["items"]
+    for i in range(3):
+        items.insert({"id": i, "group": "a"})
+
+    async def snapshot_while_writing():
+        task = asyncio.create_task(storage.snapshot_async())
+        # Runs on the loop after the rows were copied, while the thread serializes them
+        await asyncio.sleep(0)
+        items.update(1, {"group": "b"})
+        return await task
+
+    asyncio.run(snapshot_while_writing())
+    _, collections = read_snapshot(storage.snapshot_path)
+    assert [record["group"] for record in collections["items"]] == ["a", "a", "a"]
+    storage.close()
+    storage, restored, _ = open_storage(tmp_path)
+    assert restored["items"].get(1)["group"] == "b"
+    storage.close()